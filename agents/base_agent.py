@@ -3,6 +3,18 @@ base_agent.py: Defines the base class for agents.
 """
 
 
+def empty_cells(board: list) -> list:
+    """Returns the (row, col) of every empty cell of a board."""
+    return [
+        (row, col) for row in range(3) for col in range(3) if board[row][col] == " "
+    ]
+
+
+def uniform_probabilities(moves) -> dict:
+    """Returns equal probabilities for a list of moves."""
+    return {move: 1.0 / len(moves) for move in moves}
+
+
 class BaseAgent:
     """
     Base class for all agents.
@@ -28,3 +40,20 @@ class BaseAgent:
             tuple[int, int]: The (row, col) of the move.
         """
         raise NotImplementedError("Subclasses must implement this method")
+
+    def get_move_probabilities(self, board: list) -> dict | None:
+        """
+        Gets the probability of each move the agent may play.
+
+        Agents that play deterministically or uniformly at random from a known
+        set of moves override this, so exact_evaluation.py can walk the game
+        tree instead of sampling games.
+
+        Args:
+            board (list): The current game board.
+
+        Returns:
+            dict | None: {(row, col): probability}, empty when the agent has
+                no move, or None when the agent does not expose its moves.
+        """
+        return None
@@ -1,8 +1,19 @@
+import os
 import sqlite3
 import random
 import logging
 
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, empty_cells, uniform_probabilities
+from move_table import (
+    MISSING,
+    TERMINAL,
+    load_database_table,
+    open_move_table,
+    read_database_entries,
+    write_move_table,
+)
+from state_graph import string_to_code
+from symmetry import canonicalize, from_canonical_move
 
 # ロギング設定
 logging.basicConfig(level=logging.INFO)
@@ -11,33 +22,99 @@ logging.basicConfig(level=logging.INFO)
 class DatabaseAgent(BaseAgent):
     """
     SQLite3 データベースを利用するエージェント
+
+    lookup で盤面の引き方を選べる:
+        - "sql": 手ごとに SELECT を実行する（インスタンスごとに接続を開く）。
+        - "memory": テーブルを一度だけ読み込み、盤面コードで引くバイト配列として
+          プロセス内の全インスタンスで共有する。
+        - "mmap": バイナリ出力（move_table 形式）をメモリマップして共有する。
+          ファイルがない、またはデータベースより古い場合は書き出してから使う。
     """
 
-    def __init__(self, player: str, database_file: str = "tictactoe.db"):
+    LOOKUP_MODES = ("sql", "memory", "mmap")
+
+    def __init__(
+        self,
+        player: str,
+        database_file: str = "tictactoe.db",
+        use_symmetry: bool = False,
+        lookup: str = "sql",
+        table_file: str | None = None,
+    ):
+        """
+        Args:
+            player (str): このエージェントが表すプレイヤー ("X" または "O")。
+            database_file (str): SQLite データベースファイルのパス。
+            use_symmetry (bool): True の場合、盤面を正規形（symmetry.canonicalize）で検索する。
+                ``create_database.py --canonical`` で作成したデータベースにも対応する。
+            lookup (str): "sql"、"memory" または "mmap"。
+            table_file (str | None): lookup="mmap" で使うバイナリファイル。
+                省略時は database_file の拡張子を .bin にしたもの。
+        """
         super().__init__(player)
-        self.conn = sqlite3.connect(database_file)
-        self.cursor = self.conn.cursor()
+        if lookup not in self.LOOKUP_MODES:
+            raise ValueError(f"Unknown lookup mode: {lookup}")
+        self.use_symmetry = use_symmetry
+        self.lookup = lookup
+        self.conn = None
+        self.table = None
+        if lookup == "sql":
+            self.conn = sqlite3.connect(database_file)
+            self.cursor = self.conn.cursor()
+        elif lookup == "memory":
+            self.table = load_database_table(database_file)
+        else:
+            if table_file is None:
+                table_file = os.path.splitext(database_file)[0] + ".bin"
+            if not os.path.exists(table_file) or (
+                os.path.getmtime(table_file) < os.path.getmtime(database_file)
+            ):
+                write_move_table(table_file, read_database_entries(database_file))
+            self.table = open_move_table(table_file)
 
     def get_move(self, board: list) -> tuple[int, int] | None:
         """
         盤面に応じたベストムーブを取得。なければランダム。
         """
-        board_str = self.board_to_string(board)
-        self.cursor.execute(
-            "SELECT best_move, result FROM tictactoe WHERE board = ?", (board_str,)
+        best_move = self._lookup(board)
+        if best_move is not None:
+            return best_move if best_move != -1 else None
+        logging.warning(
+            "🔍 データベースに盤面が見つかりません。ランダムな手を選びます。"
         )
-        row = self.cursor.fetchone()
+        return self.get_random_move(board)
 
-        if row:
-            best_move, result = row
-            if best_move == -1:
-                return None
-            return self.index_to_move(best_move)
+    def get_move_probabilities(self, board: list) -> dict:
+        """
+        ベストムーブの確率を 1 とする。データベースにない盤面では空きマスが等確率。
+        """
+        best_move = self._lookup(board)
+        if best_move is not None:
+            return {} if best_move == -1 else {best_move: 1.0}
+        moves = empty_cells(board)
+        return uniform_probabilities(moves) if moves else {}
+
+    def _lookup(self, board: list):
+        # (行, 列)、終局を表す -1、またはデータベースにない場合は None
+        board_str = self.board_to_string(board)
+        transform = None
+        if self.use_symmetry:
+            board_str, transform = canonicalize(board_str)
+        if self.table is not None:
+            entry = self.table[string_to_code(board_str)]
+            best_move = None if entry == MISSING else -1 if entry == TERMINAL else entry
         else:
-            logging.warning(
-                "🔍 データベースに盤面が見つかりません。ランダムな手を選びます。"
+            self.cursor.execute(
+                "SELECT best_move, result FROM tictactoe WHERE board = ?", (board_str,)
             )
-            return self.get_random_move(board)
+            row = self.cursor.fetchone()
+            best_move = row[0] if row else None
+
+        if best_move is None or best_move == -1:
+            return best_move
+        if transform is not None:
+            best_move = from_canonical_move(best_move, transform)
+        return self.index_to_move(best_move)
 
     def board_to_string(self, board: list) -> str:
         return "".join(cell if cell != " " else " " for row in board for cell in row)
@@ -52,4 +129,5 @@ class DatabaseAgent(BaseAgent):
         return random.choice(available_moves) if available_moves else None
 
     def __del__(self):
-        self.conn.close()
+        if getattr(self, "conn", None) is not None:
+            self.conn.close()
@@ -3,6 +3,7 @@ minimax_agent.py: Minimax エージェントを実装します。
 """
 
 from agents.base_agent import BaseAgent
+from game_logic import TicTacToe
 
 
 class MinimaxAgent(BaseAgent):
@@ -32,16 +33,19 @@ class MinimaxAgent(BaseAgent):
         best_score = float("-inf")  # 最良のスコアを負の無限大で初期化
         best_move = None  # 最良の手を None で初期化
 
+        # 盤面は 1 度だけコピーし、1 つの TicTacToe 上で make_move / undo して探索する
+        game = self._make_search_game(board, self.player)
+
         # すべての空いているセルを反復処理
         for row in range(3):
             for col in range(3):
-                if board[row][col] == " ":
-                    # 手を試す
-                    board[row][col] = self.player
+                # 手を試す
+                if game.make_move(row, col):
+                    game.switch_player()
                     # この手のスコアを取得
-                    score = self.minimax(board, 0, False)
+                    score = self._search(game, 0, False)
                     # 手を元に戻す
-                    board[row][col] = " "
+                    game.undo()
 
                     # 必要に応じて最良の手を更新
                     if score > best_score:
@@ -50,6 +54,19 @@ class MinimaxAgent(BaseAgent):
 
         return best_move
 
+    def get_move_probabilities(self, board: list) -> dict:
+        """
+        get_move は決定的なので、その手の確率が 1 になります。
+
+        Args:
+            board (list): 現在のゲーム盤。
+
+        Returns:
+            dict: {(行, 列): 確率}。手がない場合は空。
+        """
+        move = self.get_move(board)
+        return {} if move is None else {move: 1.0}
+
     def minimax(self, board: list, depth: int, is_maximizing: bool) -> int:
         """
         Minimax アルゴリズム。
@@ -59,41 +76,56 @@ class MinimaxAgent(BaseAgent):
             depth (int): 現在の探索の深さ。
             is_maximizing (bool): 最大化プレイヤーのターンなら True。
 
+        Returns:
+            int: 現在の盤面状態のスコア。
+        """
+        to_move = self.player if is_maximizing else self.get_opponent(self.player)
+        return self._search(self._make_search_game(board, to_move), depth, is_maximizing)
+
+    def _make_search_game(self, board: list, to_move: str) -> TicTacToe:
+        """
+        探索用の TicTacToe を作成します。盤面は 1 度だけコピーするため、
+        探索が例外で中断しても呼び出し元の盤面は変更されません。
+        """
+        game = TicTacToe()
+        game.board = [row[:] for row in board]
+        game.current_player = to_move
+        return game
+
+    def _search(self, game: TicTacToe, depth: int, is_maximizing: bool) -> int:
+        """
+        共有された TicTacToe 上で make_move / undo を使って探索する Minimax 本体。
+
+        Args:
+            game (TicTacToe): 探索中のゲーム。手番は game.current_player。
+            depth (int): 現在の探索の深さ。
+            is_maximizing (bool): 最大化プレイヤーのターンなら True。
+
         Returns:
             int: 現在の盤面状態のスコア。
         """
         # 終端状態（勝ち、負け、引き分け）を確認
-        winner = self.check_winner(board)
+        winner = game.check_winner()
         if winner == self.player:
             return 100 - depth  # より早く勝つことを優先
-        if winner == self.get_opponent(self.player):
-            return -100 + depth  # より遅く負けることをペナルティ
-        if self.is_board_full(board):
+        if winner == "draw":
             return 0  # 引き分け
+        if winner is not None:
+            return -100 + depth  # より遅く負けることをペナルティ
 
-        # 最大化プレイヤーのターン（エージェント）
-        if is_maximizing:
-            best_score = float("-inf")
-            for row in range(3):
-                for col in range(3):
-                    if board[row][col] == " ":
-                        board[row][col] = self.player
-                        score = self.minimax(board, depth + 1, False)
-                        board[row][col] = " "
+        # 最大化プレイヤーのターン（エージェント）なら最大値、対戦相手なら最小値を選ぶ
+        best_score = float("-inf") if is_maximizing else float("inf")
+        for row in range(3):
+            for col in range(3):
+                if game.make_move(row, col):
+                    game.switch_player()
+                    score = self._search(game, depth + 1, not is_maximizing)
+                    game.undo()
+                    if is_maximizing:
                         best_score = max(score, best_score)
-            return best_score
-
-        # 最小化プレイヤーのターン（対戦相手）
-        else:
-            best_score = float("inf")
-            for row in range(3):
-                for col in range(3):
-                    if board[row][col] == " ":
-                        board[row][col] = self.get_opponent(self.player)
-                        score = self.minimax(board, depth + 1, True)
-                        board[row][col] = " "
+                    else:
                         best_score = min(score, best_score)
-            return best_score
+        return best_score
 
     def check_winner(self, board: list) -> str | None:
         """
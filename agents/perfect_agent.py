@@ -4,34 +4,79 @@ perfect_agent.py: Implements the Perfect agent.
 
 import json
 import os
+from types import MappingProxyType
 from agents.base_agent import BaseAgent
+from move_table import MISSING, TERMINAL, open_move_table
+from state_graph import board_to_code, string_to_code
+from symmetry import canonicalize, from_canonical_move
+
+# Parsed perfect-move tables shared by every PerfectAgent in the process:
+# absolute path -> ((mtime_ns, size), read-only table).
+_perfect_moves_cache = {}
 
 
 class PerfectAgent(BaseAgent):
     """
     Agent that plays perfectly in Tic Tac Toe.
+
+    The perfect moves are read either from perfect_moves.json or, for files
+    ending in ".bin", from the binary table written by create_database.py
+    (see move_table.py). The binary table is memory-mapped, so loading takes
+    constant time and forked server workers share its pages.
     """
 
-    def __init__(self, player: str, perfect_moves_file: str = "perfect_moves.json"):
+    def __init__(
+        self,
+        player: str,
+        perfect_moves_file: str = "perfect_moves.json",
+        use_symmetry: bool = False,
+    ):
         """
         Initializes the PerfectAgent.
 
         Args:
             player (str): The player this agent represents ("X" or "O").
-            perfect_moves_file (str): The path to the JSON file containing the perfect moves.
+            perfect_moves_file (str): The path to the JSON or binary (.bin) file
+                containing the perfect moves.
+            use_symmetry (bool): Look boards up by their canonical form, which also
+                works with tables generated by ``create_database.py --canonical``.
         """
         super().__init__(player)
         self.perfect_moves_file = perfect_moves_file
-        self.perfect_moves = self.load_perfect_moves()
+        self.use_symmetry = use_symmetry
+        self.move_table = None
+        self.perfect_moves = None
+        if perfect_moves_file.endswith(".bin"):
+            if not os.path.exists(perfect_moves_file):
+                raise FileNotFoundError(
+                    f"Perfect moves file not found: {perfect_moves_file}"
+                )
+            self.move_table = open_move_table(perfect_moves_file)
+        else:
+            self.perfect_moves = self.load_perfect_moves()
+
+    def load_perfect_moves(self) -> MappingProxyType:
+        """
+        Loads the perfect moves from the JSON file.
 
-    def load_perfect_moves(self) -> dict:
-        """Loads the perfect moves from the JSON file."""
+        The file is parsed once per process and the read-only table is shared
+        by all instances; it is reloaded only when the file's mtime or size
+        changes.
+        """
         if not os.path.exists(self.perfect_moves_file):
             raise FileNotFoundError(
                 f"Perfect moves file not found: {self.perfect_moves_file}"
             )
-        with open(self.perfect_moves_file, "r", encoding="latin-1") as f:
-            return json.loads(f.read())
+        path = os.path.abspath(self.perfect_moves_file)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = _perfect_moves_cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(path, "r", encoding="latin-1") as f:
+            perfect_moves = MappingProxyType(json.loads(f.read()))
+        _perfect_moves_cache[path] = (version, perfect_moves)
+        return perfect_moves
 
     def get_move(self, board: list) -> tuple[int, int]:
         """
@@ -46,11 +91,18 @@ class PerfectAgent(BaseAgent):
         Raises:
             KeyError: If no perfect move is found for the given board.
         """
+        if self.move_table is not None:
+            return self._get_move_from_table(board)
         board_str = self.board_to_string(board)
+        transform = None
+        if self.use_symmetry:
+            board_str, transform = canonicalize(board_str)
         if board_str in self.perfect_moves:
             best_move_index = self.perfect_moves[board_str]
             if best_move_index == -1:
                 raise KeyError(f"The game is over for the board: {board_str}")
+            if transform is not None:
+                best_move_index = from_canonical_move(best_move_index, transform)
             return self.index_to_move(best_move_index)
         else:
             raise KeyError(
@@ -58,6 +110,37 @@ class PerfectAgent(BaseAgent):
                 f"This pattern is not registered in the dictionary."
             )
 
+    def get_move_probabilities(self, board: list) -> dict:
+        """
+        The perfect move is played with probability 1.
+
+        Raises:
+            KeyError: As get_move.
+        """
+        return {self.get_move(board): 1.0}
+
+    def _get_move_from_table(self, board: list) -> tuple[int, int]:
+        transform = None
+        if self.use_symmetry:
+            board_str, transform = canonicalize(self.board_to_string(board))
+            code = string_to_code(board_str)
+        else:
+            code = board_to_code(board)
+        best_move_index = self.move_table[code]
+        if best_move_index == TERMINAL:
+            raise KeyError(
+                f"The game is over for the board: {self.board_to_string(board)}"
+            )
+        if best_move_index == MISSING:
+            raise KeyError(
+                f"No perfect move found in perfect_moves for board: "
+                f"{self.board_to_string(board)}. "
+                f"This pattern is not registered in the dictionary."
+            )
+        if transform is not None:
+            best_move_index = from_canonical_move(best_move_index, transform)
+        return self.index_to_move(best_move_index)
+
     def board_to_string(self, board: list) -> str:
         return "".join(cell if cell != " " else " " for row in board for cell in row)
 
@@ -1,14 +1,40 @@
 import json
 import os
-from agents.base_agent import BaseAgent
+import random
+import numpy as np
+from agents.base_agent import BaseAgent, empty_cells
 import fast_trainer  # Import the compiled Cython module
-import numpy as np  # Add numpy import
+from policy_table import open_policy_table
+from q_table_io import arrays_to_q_table, load_q_table_npz, save_q_table_npz
+from state_graph import board_to_code
+from symmetry import (
+    board_to_string,
+    canonicalize,
+    from_canonical_move,
+    string_to_board,
+    to_canonical_move,
+)
+
+# The (row, col) moves of each 9-bit policy mask.
+_MOVES_BY_MASK = tuple(
+    tuple(divmod(i, 3) for i in range(9) if mask >> i & 1) for mask in range(512)
+)
 
 
 class QLearningAgent(BaseAgent):
     """
     A wrapper for the optimized Cython Q-learning agent.
     This class handles the interface between the Python environment and the fast Cython module.
+
+    Q-tables are stored as JSON, or in the binary format of q_table_io.py when
+    q_table_file ends in ".npz". Agents created with is_training=False
+    memory-map binary tables and look boards up in the mapped rows (their
+    states are sorted), without copying them into the dense table; the rows
+    are only copied in if such an agent is updated.
+
+    Agents created with a policy_file (see policy_table.py) run in inference
+    mode: they do not load a Q-table and pick each move with one lookup in the
+    memory-mapped policy, choosing at random among its tied best moves.
     """
 
     def __init__(
@@ -21,9 +47,25 @@ class QLearningAgent(BaseAgent):
         optimistic_initial_value=0.0,
         q_table_file="q_table.json",
         is_training=True,
+        use_symmetry=False,
+        symmetric_updates=False,
+        policy_file=None,
     ):
         super().__init__(player)
         self.q_table_file = q_table_file
+        self.policy_file = policy_file
+        self.is_training = is_training and policy_file is None
+        # Stored in the metadata of binary Q-tables.
+        self.episodes_trained = 0
+        self.seed = None
+        # When enabled, Q-values are stored and looked up under canonical boards
+        # only (see symmetry.py), so the 8 orientations of a position share one entry.
+        self.use_symmetry = use_symmetry
+        if use_symmetry and symmetric_updates:
+            raise ValueError(
+                "symmetric_updates is redundant with use_symmetry: "
+                "the 8 orientations already share one entry."
+            )
 
         # Instantiate the fast agent from our Cython module
         self._fast_agent = fast_trainer.FastQLearningAgent(
@@ -33,9 +75,19 @@ class QLearningAgent(BaseAgent):
             exploration_rate,
             min_exploration_rate,
             optimistic_initial_value,
-            is_training,
+            self.is_training,
+            symmetric_updates,
         )
-        self.load_q_table()
+        self._policy = None
+        # (states, values) of a memory-mapped read-only .npz table; values of
+        # a quantized table stay quantized (QuantizedRows).
+        self._mapped = None
+        if policy_file is not None:
+            # A memoryview of native uint16 indexes to plain ints without numpy.
+            table = open_policy_table(policy_file)
+            self._policy = memoryview(table.astype("=u2", copy=False))
+        else:
+            self.load_q_table()
 
     @property
     def min_exploration_rate(self):
@@ -45,6 +97,15 @@ class QLearningAgent(BaseAgent):
     def min_exploration_rate(self, value):
         self._fast_agent.min_exploration_rate = value
 
+    @property
+    def symmetric_updates(self):
+        # Every update is also applied to the 7 other orientations of the board.
+        return self._fast_agent.symmetric_updates
+
+    @symmetric_updates.setter
+    def symmetric_updates(self, value):
+        self._fast_agent.symmetric_updates = value
+
     @property
     def exploration_rate(self):
         return self._fast_agent.exploration_rate
@@ -55,26 +116,112 @@ class QLearningAgent(BaseAgent):
 
     @property
     def q_table(self):
-        # Returns a copy of the q_table for external access
-        return {
-            state: self._fast_agent.q_table.table[state].tolist()
-            for state in self._fast_agent.q_table.table
-        }
+        # Returns a {board string: list of Q-values} copy of the visited states
+        if self._mapped is not None:
+            return arrays_to_q_table(*self._mapped)
+        return self._fast_agent.q_table.get_table()
 
     @q_table.setter
     def q_table(self, value: dict):
-        # Expects a dict with lists and converts to ndarray for Cython
-        converted_table = {
-            state: np.array(q_values, dtype=np.float64)
-            for state, q_values in value.items()
-        }
-        self._fast_agent.q_table.set_table(converted_table)
+        # Copies the lists into the dense (3**9, 9) array of the Cython table
+        self._mapped = None
+        self._fast_agent.q_table.set_table(value)
 
     def get_move(self, board: list) -> tuple[int, int] | None:
         """
-        Uses the Cython-optimized get_move_py function.
+        Uses the Cython-optimized get_move_py function, or the policy file in
+        inference mode.
+        """
+        if self._policy is not None:
+            return self._get_policy_move(board)
+        if self._mapped is not None:
+            return self._get_mapped_move(board)
+        if not self.use_symmetry:
+            return fast_trainer.get_move_py(self._fast_agent, board)
+        canonical, transform = canonicalize(board_to_string(board))
+        move = fast_trainer.get_move_py(self._fast_agent, string_to_board(canonical))
+        if move is None:
+            return None
+        return divmod(from_canonical_move(move[0] * 3 + move[1], transform), 3)
+
+    def _get_policy_move(self, board: list) -> tuple[int, int] | None:
+        # Symmetric tables are expanded to every orientation on export.
+        moves = _MOVES_BY_MASK[self._policy[board_to_code(board)]]
+        if not moves:
+            # A board outside the policy (e.g. after the game has ended).
+            moves = [(r, c) for r in range(3) for c in range(3) if board[r][c] == " "]
+        if not moves:
+            return None
+        return random.choice(moves)
+
+    def _get_mapped_move(self, board: list) -> tuple[int, int] | None:
+        # Same choice as get_move_py, without initializing unvisited rows.
+        moves = empty_cells(board)
+        if not moves:
+            return None
+        if random.uniform(0, 1) < self.exploration_rate:
+            return random.choice(moves)
+        return random.choice(self._greedy_moves(board) or moves)
+
+    def get_move_probabilities(self, board: list) -> dict:
         """
-        return fast_trainer.get_move_py(self._fast_agent, board)
+        Mixes a uniformly random move (with the exploration rate) with a
+        uniformly random greedy move, as get_move does. Boards missing from
+        the Q-table have every empty cell tied, and the table is not changed.
+
+        Args:
+            board (list): The current game board.
+
+        Returns:
+            dict: {(row, col): probability}.
+        """
+        moves = empty_cells(board)
+        if not moves:
+            return {}
+        if self._policy is not None:
+            best_moves = _MOVES_BY_MASK[self._policy[board_to_code(board)]] or moves
+            explore = 0.0
+        else:
+            best_moves = self._greedy_moves(board) or moves
+            explore = self.exploration_rate
+        probabilities = {move: explore / len(moves) for move in moves if explore}
+        for move in best_moves:
+            probabilities[move] = probabilities.get(move, 0.0) + (1.0 - explore) / len(
+                best_moves
+            )
+        return probabilities
+
+    def _greedy_moves(self, board: list) -> list:
+        # The tied best moves of the table's row, [] for an unvisited board.
+        board_str, transform = board_to_string(board), None
+        if self.use_symmetry:
+            board_str, transform = canonicalize(board_str)
+        row = self._get_values(board_str)
+        if row is None:
+            return []
+        legal = [i for i in range(9) if board_str[i] == " "]
+        best = max(row[i] for i in legal)
+        cells = [i for i in legal if row[i] == best]
+        if transform is not None:
+            cells = [from_canonical_move(i, transform) for i in cells]
+        return [divmod(i, 3) for i in cells]
+
+    def _get_values(self, board_str: str):
+        # The Q-value row of a board string, None if it was never visited.
+        if self._mapped is None:
+            return self._fast_agent.q_table.get_values(board_str)
+        states, values = self._mapped
+        code = board_to_code(string_to_board(board_str))
+        i = int(np.searchsorted(states, code))
+        if i < len(states) and states[i] == code:
+            return values[i]
+        return None
+
+    def _materialize(self):
+        # Copies a memory-mapped table into the dense table before it changes.
+        if self._mapped is not None:
+            self._fast_agent.q_table.set_rows(*self._mapped)
+            self._mapped = None
 
     def decay_exploration_rate(self, episode, total_episodes):
         """Delegates to the fast Cython method."""
@@ -84,17 +231,48 @@ class QLearningAgent(BaseAgent):
 
     def update_q_table(self, state, action, reward, next_state, is_terminal=False):
         """Delegates to the fast Cython method."""
+        if self._policy is not None:
+            raise RuntimeError("Policy files are read-only; load the Q-table to train.")
+        self._materialize()
+        if self.use_symmetry:
+            state, transform = canonicalize(state)
+            action = to_canonical_move(action, transform)
+            next_state = canonicalize(next_state)[0]
         self._fast_agent.update_q_table(state, action, reward, next_state, is_terminal)
 
     def save_q_table(self):
         """Saves the Q-table to a file."""
+        if self._policy is not None:
+            raise RuntimeError("Inference-mode agents have no Q-table to save.")
+        self._materialize()
+        if self.q_table_file.endswith(".npz"):
+            states, values = self._fast_agent.q_table.get_rows()
+            save_q_table_npz(self.q_table_file, states, values, self.metadata())
+            return
         with open(self.q_table_file, "w") as f:
             # self.q_table property already handles conversion to list
             json.dump(self.q_table, f)
 
+    def metadata(self) -> dict:
+        """Returns the hyperparameters and training state saved with binary tables."""
+        return {
+            "learning_rate": self._fast_agent.learning_rate,
+            "discount_factor": self._fast_agent.discount_factor,
+            "initial_exploration_rate": self._fast_agent.initial_exploration_rate,
+            "min_exploration_rate": self.min_exploration_rate,
+            "optimistic_initial_value": self._fast_agent.optimistic_initial_value,
+            "use_symmetry": self.use_symmetry,
+            "symmetric_updates": self.symmetric_updates,
+            "episodes_trained": self.episodes_trained,
+            "seed": self.seed,
+        }
+
     def load_q_table(self):
         """Loads the Q-table from a file."""
         if os.path.exists(self.q_table_file) and not os.getenv("PYTEST_CURRENT_TEST"):
+            if self.q_table_file.endswith(".npz"):
+                self._load_q_table_npz()
+                return
             try:
                 with open(self.q_table_file, "r") as f:
                     # json.load will return lists, which the q_table.setter handles
@@ -107,3 +285,24 @@ class QLearningAgent(BaseAgent):
                 self.q_table = {}
         else:
             self.q_table = {}
+
+    def _load_q_table_npz(self):
+        self._mapped = None
+        try:
+            states, values, metadata = load_q_table_npz(
+                self.q_table_file,
+                mmap=not self.is_training,
+                dequantize=self.is_training,
+            )
+        except (ValueError, OSError):
+            print(
+                f"Warning: Could not read Q-table file '{self.q_table_file}'. Starting with an empty table."
+            )
+            self.q_table = {}
+            return
+        if self.is_training:
+            self._fast_agent.q_table.set_rows(states, values)
+        else:
+            self._mapped = (states, values)
+        self.episodes_trained = metadata.get("episodes_trained", 0)
+        self.seed = metadata.get("seed")
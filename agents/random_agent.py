@@ -4,7 +4,7 @@ random_agent.py: Implements the Random agent.
 
 import random
 
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, empty_cells, uniform_probabilities
 
 
 class RandomAgent(BaseAgent):
@@ -39,3 +39,16 @@ class RandomAgent(BaseAgent):
         if available_moves:
             return random.choice(available_moves)
         return None
+
+    def get_move_probabilities(self, board: list) -> dict:
+        """
+        Every empty cell is equally likely.
+
+        Args:
+            board (list): The current game board.
+
+        Returns:
+            dict: {(row, col): probability}.
+        """
+        moves = empty_cells(board)
+        return uniform_probabilities(moves) if moves else {}
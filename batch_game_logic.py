@@ -0,0 +1,123 @@
+# batch_game_logic.py
+import numpy as np
+
+from game_logic import LINES
+
+# Cell values in the (B, 9) board array. Cell index i = row * 3 + col.
+EMPTY = 0
+PLAYER_X = 1
+PLAYER_O = -1
+
+# Values returned by BatchTicTacToe.winners().
+ONGOING = 0
+X_WINS = PLAYER_X
+O_WINS = PLAYER_O
+DRAW = 2
+
+
+def _line_matrix() -> np.ndarray:
+    matrix = np.zeros((9, len(LINES)), dtype=np.int8)
+    for j, line in enumerate(LINES):
+        for r, c in line:
+            matrix[r * 3 + c, j] = 1
+    return matrix
+
+
+# LINE_MATRIX[i, j] == 1 when cell i lies on line j, so ``boards @ LINE_MATRIX``
+# gives the eight line sums of every game at once (+3 / -3 is a win).
+LINE_MATRIX = _line_matrix()
+
+
+class BatchTicTacToe:
+    """
+    B independent Tic Tac Toe games stepped together with NumPy.
+
+    The position of every game lives in one ``(B, 9)`` int8 array holding
+    EMPTY, PLAYER_X or PLAYER_O. "X" moves first in every game and players
+    alternate automatically after each step.
+    """
+
+    def __init__(self, batch_size: int):
+        """
+        Initializes B empty games.
+
+        Args:
+            batch_size (int): The number of games (B).
+        """
+        self.batch_size = batch_size
+        self.boards = np.zeros((batch_size, 9), dtype=np.int8)
+        self.current_player = np.full(batch_size, PLAYER_X, dtype=np.int8)
+        self.winner = np.zeros(batch_size, dtype=np.int8)
+        self.done = np.zeros(batch_size, dtype=bool)
+        self._rows = np.arange(batch_size)
+
+    def legal_mask(self) -> np.ndarray:
+        """
+        Returns the legal moves of every game.
+
+        Returns:
+            np.ndarray: A ``(B, 9)`` bool array. Finished games have no legal moves.
+        """
+        return (self.boards == EMPTY) & ~self.done[:, None]
+
+    def step(self, actions, mask=None) -> np.ndarray:
+        """
+        Plays one move in every unfinished game and switches the player.
+
+        Args:
+            actions: A length-B integer array of cell indices (0-8). Entries
+                for games that are already over are ignored.
+            mask: A length-B bool array restricting the move to the selected
+                games. All unfinished games move when omitted.
+
+        Returns:
+            np.ndarray: The result of winners() after the move.
+
+        Raises:
+            ValueError: If an action targets an occupied cell of an active game.
+        """
+        actions = np.asarray(actions)
+        if mask is None:
+            active = self._rows[~self.done]
+        else:
+            active = self._rows[~self.done & np.asarray(mask, dtype=bool)]
+        cells = actions[active]
+        if np.any(self.boards[active, cells] != EMPTY):
+            raise ValueError("Illegal move in batch step")
+        self.boards[active, cells] = self.current_player[active]
+        self.current_player[active] = -self.current_player[active]
+
+        winner = self.winners()
+        self.winner[active] = winner[active]
+        self.done[active] = winner[active] != ONGOING
+        return self.winner.copy()
+
+    def winners(self) -> np.ndarray:
+        """
+        Evaluates every board with one matrix product against the line masks.
+
+        Returns:
+            np.ndarray: A length-B int8 array of X_WINS, O_WINS, DRAW or ONGOING.
+        """
+        line_sums = self.boards @ LINE_MATRIX
+        result = np.where(
+            (self.boards != EMPTY).all(axis=1), DRAW, ONGOING
+        ).astype(np.int8)
+        result[(line_sums == -3).any(axis=1)] = O_WINS
+        result[(line_sums == 3).any(axis=1)] = X_WINS
+        return result
+
+    def reset(self, done_mask=None):
+        """
+        Clears the selected games back to an empty board with "X" to move.
+
+        Args:
+            done_mask: A length-B bool array of games to reset. All games are
+                reset when omitted.
+        """
+        if done_mask is None:
+            done_mask = np.ones(self.batch_size, dtype=bool)
+        self.boards[done_mask] = EMPTY
+        self.current_player[done_mask] = PLAYER_X
+        self.winner[done_mask] = ONGOING
+        self.done[done_mask] = False
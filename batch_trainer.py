@@ -0,0 +1,246 @@
+"""
+batch_trainer.py: Vectorized Q-learning over many games played in lockstep.
+
+B games of batch_game_logic.BatchTicTacToe advance together: the learner
+moves in every active game, its Q-updates are applied as one scatter, then
+the opponent answers from a move table (move_table.py) indexed by board code.
+Finished games immediately start the next episode until the requested number
+of episodes has been played.
+
+The learner updates the same dense (3**9, 9) table as
+fast_trainer.FastQLearningAgent, with the same rewards (rewards.py), update
+rule, random tie-breaking and exploration decay as train_q_learning.py. Within one batch
+step, several games can update the same (state, action) pair. Those updates
+are merged: the pair moves once towards the mean of their targets,
+``Q <- (1 - lr) * Q + lr * mean(targets)``. The result therefore does not
+depend on the order of games in the batch.
+
+With the agent's symmetric_updates flag, each update is also applied to the
+distinct symmetric images of the (state, action) pair (see symmetry.py), as
+in FastQLearningAgent.
+"""
+
+import math
+
+import numpy as np
+
+from batch_game_logic import DRAW, EMPTY, ONGOING, PLAYER_O, PLAYER_X, BatchTicTacToe
+from rewards import DRAW_REWARD, ILLEGAL_Q, LOSS_REWARD, STEP_REWARD, WIN_REWARD
+from state_graph import cells_to_codes
+from symmetry import INVERSE_TRANSFORMS, TRANSFORMS
+
+# Row t: source cell of every new cell / new cell of every source cell.
+_SOURCE_CELLS = np.array(TRANSFORMS, dtype=np.intp)
+_TARGET_CELLS = np.array(INVERSE_TRANSFORMS, dtype=np.intp)
+
+
+def _init_rows(values, visited, codes, empty, initial_value):
+    # First touch of a state: legal moves get initial_value, occupied cells ILLEGAL_Q
+    new = visited[codes] == 0
+    if new.any():
+        values[codes[new]] = np.where(empty[new], initial_value, ILLEGAL_Q)
+        visited[codes[new]] = 1
+
+
+def _random_argmax(candidates, rng) -> np.ndarray:
+    # Uniformly random True column of every row (0 for rows without one).
+    return (candidates * rng.random(candidates.shape)).argmax(axis=1)
+
+
+def scatter_update(values, codes, actions, targets, learning_rate, counts=None) -> int:
+    """
+    Applies Q-updates for a batch of (state, action) pairs at once.
+
+    Duplicate pairs are merged into one update towards the mean of their
+    targets.
+
+    Args:
+        values (np.ndarray): The ``(3**9, 9)`` Q-value array, updated in place.
+        codes: Base-3 codes of the updated states.
+        actions: The action taken in each state.
+        targets: The TD target of each update.
+        learning_rate (float): The learning rate.
+        counts (np.ndarray | None): ``(3**9, 9)`` update counters, incremented
+            once per update (duplicates included).
+
+    Returns:
+        int: The number of updates (including duplicates).
+    """
+    flat = np.asarray(codes, dtype=np.intp) * 9 + np.asarray(actions, dtype=np.intp)
+    keys, inverse = np.unique(flat, return_inverse=True)
+    hits = np.bincount(inverse)
+    mean_targets = np.bincount(inverse, weights=targets) / hits
+    q = values.reshape(-1)
+    q[keys] = (1.0 - learning_rate) * q[keys] + learning_rate * mean_targets
+    if counts is not None:
+        counts.reshape(-1)[keys] += hits.astype(counts.dtype)
+    return len(flat)
+
+
+def _symmetric_targets(agent, boards, actions, next_boards, ongoing, rewards):
+    # Codes, actions and TD targets of the distinct symmetric images of every
+    # update; images that repeat an earlier image of the same update are skipped.
+    values, visited = agent.q_table.values, agent.q_table.visited
+    codes, image_actions, targets, seen = [], [], [], []
+    for source, target in zip(_SOURCE_CELLS, _TARGET_CELLS):
+        image_boards = boards[:, source]
+        image_next = next_boards[:, source]
+        image_codes = cells_to_codes(image_boards)
+        keys = image_codes * 9 + target[actions]
+        distinct = np.ones(len(keys), dtype=bool)
+        for earlier in seen:
+            distinct &= keys != earlier
+        seen.append(keys)
+
+        next_codes = cells_to_codes(image_next)
+        _init_rows(
+            values,
+            visited,
+            image_codes,
+            image_boards == EMPTY,
+            agent.optimistic_initial_value,
+        )
+        _init_rows(
+            values,
+            visited,
+            next_codes[ongoing],
+            image_next[ongoing] == EMPTY,
+            agent.optimistic_initial_value,
+        )
+        max_next_q = np.where(ongoing, values[next_codes].max(axis=1), 0.0)
+        codes.append(image_codes[distinct])
+        image_actions.append(target[actions][distinct])
+        targets.append((rewards + agent.discount_factor * max_next_q)[distinct])
+    return np.concatenate(codes), np.concatenate(image_actions), np.concatenate(targets)
+
+
+def _start_episodes(env, learner, games, first_episode, opponent_moves):
+    # The learner is X in even episodes and O in odd ones; the opponent opens
+    # for the games where the learner is O.
+    mask = np.zeros(env.batch_size, dtype=bool)
+    mask[games] = True
+    env.reset(mask)
+    episodes = first_episode + np.arange(len(games))
+    learner[games] = np.where(episodes % 2 == 0, PLAYER_X, PLAYER_O)
+    _opponent_step(env, mask & (learner == PLAYER_O), opponent_moves)
+
+
+def _opponent_step(env, mask, opponent_moves):
+    mask = mask & ~env.done
+    actions = opponent_moves[cells_to_codes(env.boards)].astype(np.intp)
+    # Positions missing from the table end the episode without a result.
+    env.done[mask & (actions > 8)] = True
+    env.step(np.minimum(actions, 8), mask=mask)
+
+
+def train_batch(
+    agent,
+    opponent_moves,
+    num_episodes: int,
+    batch_size: int = 1024,
+    seed=None,
+    progress_every: int = 0,
+    on_progress=None,
+) -> int:
+    """
+    Trains a FastQLearningAgent for num_episodes episodes in batches of games.
+
+    Args:
+        agent: The fast_trainer.FastQLearningAgent whose q_table is trained.
+        opponent_moves (np.ndarray): uint8 ``(3**9,)`` move table of the opponent
+            (e.g. perfect_moves.bin).
+        num_episodes (int): The number of episodes to play.
+        batch_size (int): The number of games played in lockstep (B).
+        seed: Seed for np.random.default_rng.
+        progress_every (int): Completed episodes between on_progress calls.
+        on_progress: Called as on_progress(episodes_done, updates) each time
+            another progress_every episodes have completed. Training stops
+            early (abandoning the games in progress) when it returns True.
+
+    Returns:
+        int: The number of Q-value updates.
+    """
+    rng = np.random.default_rng(seed)
+    values, visited = agent.q_table.values, agent.q_table.visited
+    batch_size = max(1, min(batch_size, num_episodes))
+    env = BatchTicTacToe(batch_size)
+    env.done[:] = True
+    learner = np.zeros(batch_size, dtype=np.int8)
+    last_decay_episode = math.ceil(num_episodes * 0.75) - 1
+
+    _start_episodes(env, learner, np.arange(batch_size), 0, opponent_moves)
+    started, completed, updates = batch_size, 0, 0
+    next_progress = progress_every if on_progress is not None else 0
+    while completed < num_episodes:
+        active = ~env.done
+
+        # Learner's move: epsilon-greedy with random tie-breaking
+        codes = cells_to_codes(env.boards)
+        legal = env.legal_mask()
+        _init_rows(
+            values,
+            visited,
+            codes[active],
+            legal[active],
+            agent.optimistic_initial_value,
+        )
+        q = np.where(legal, values[codes], -np.inf)
+        greedy = _random_argmax(legal & (q == q.max(axis=1, keepdims=True)), rng)
+        explore = rng.random(batch_size) < agent.exploration_rate
+        actions = np.where(explore, _random_argmax(legal, rng), greedy)
+        boards = env.boards.copy() if agent.symmetric_updates else None
+        winner = env.step(actions)
+
+        next_codes = cells_to_codes(env.boards)
+        ongoing = active & (winner == ONGOING)
+        reward = np.where(
+            winner == learner,
+            WIN_REWARD,
+            np.where(
+                winner == DRAW,
+                DRAW_REWARD,
+                np.where(winner != ONGOING, LOSS_REWARD, 0.0),
+            ),
+        )
+        _init_rows(
+            values,
+            visited,
+            next_codes[ongoing],
+            env.boards[ongoing] == EMPTY,
+            agent.optimistic_initial_value,
+        )
+        max_next_q = np.where(ongoing, values[next_codes].max(axis=1), 0.0)
+        targets = STEP_REWARD + reward + agent.discount_factor * max_next_q
+        if agent.symmetric_updates:
+            update = _symmetric_targets(
+                agent,
+                boards[active],
+                actions[active],
+                env.boards[active],
+                ongoing[active],
+                STEP_REWARD + reward[active],
+            )
+        else:
+            update = codes[active], actions[active], targets[active]
+        updates += scatter_update(
+            values, *update, agent.learning_rate, agent.q_table.counts
+        )
+
+        # Opponent's move from the precomputed table
+        _opponent_step(env, ongoing, opponent_moves)
+
+        finished = np.flatnonzero(active & env.done)
+        if len(finished):
+            completed += len(finished)
+            agent.decay_exploration_rate(
+                min(completed - 1, last_decay_episode), num_episodes
+            )
+            games = finished[: num_episodes - started]
+            if len(games):
+                _start_episodes(env, learner, games, started, opponent_moves)
+                started += len(games)
+            if 0 < next_progress <= completed < num_episodes:
+                next_progress = (completed // progress_every + 1) * progress_every
+                if on_progress(completed, updates):
+                    break
+    return updates
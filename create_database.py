@@ -1,149 +1,183 @@
 import sqlite3
-import logging
 import json
+import argparse
+import os
+import time
 
-# ロギング設定
-logging.basicConfig(level=logging.INFO)
+from batch_game_logic import DRAW, ONGOING, O_WINS, X_WINS
+from move_table import write_move_table
+from solver import solve
+from state_graph import StateGraph, string_to_code
+from symmetry import is_canonical
 
+RESULT_BY_WINNER = {X_WINS: "X", O_WINS: "O", DRAW: "draw", ONGOING: "continue"}
 
-def check_winner(board: list) -> str | None:
-    for row in board:
-        if row[0] == row[1] == row[2] != " ":
-            return row[0]
-    for col in range(3):
-        if board[0][col] == board[1][col] == board[2][col] != " ":
-            return board[0][col]
-    if board[0][0] == board[1][1] == board[2][2] != " ":
-        return board[0][0]
-    if board[0][2] == board[1][1] == board[2][0] != " ":
-        return board[0][2]
-    return None
 
+def solve_positions(canonical: bool = False) -> list:
+    """
+    到達可能な全盤面をレトログレード解析（solver.solve）で一度に解く。
 
-def is_board_full(board: list) -> bool:
-    return all(cell != " " for row in board for cell in row)
-
+    最善手は深さで補正したミニマックスのスコアで選ぶ（同点なら小さいインデックス）。
 
-def board_to_string(board: list) -> str:
-    return "".join(cell if cell != " " else " " for row in board for cell in row)
+    Args:
+        canonical (bool): True の場合、正規形の盤面だけを返す。
 
+    Returns:
+        list[tuple[str, int, str]]: (board, best_move, result) のリスト。
+            終局盤面の best_move は -1、result は "X" / "O" / "draw" / "continue"。
+    """
+    graph = StateGraph.build()
+    solution = solve(graph)
+    rows = []
+    for sid in range(len(graph)):
+        board_str = graph.board_string(sid)
+        if canonical and not is_canonical(board_str):
+            continue
+        rows.append(
+            (
+                board_str,
+                int(solution.best_move[sid]),
+                RESULT_BY_WINNER[int(graph.winner[sid])],
+            )
+        )
+    return rows
 
-def get_opponent(player: str) -> str:
-    return "O" if player == "X" else "X"
 
+def write_database(path: str, rows, page_size: int = 4096) -> tuple[int, float]:
+    """
+    盤面データを一括で SQLite データベースに書き込む。
 
-def minimax(board: list, depth: int, is_maximizing: bool, player: str) -> int:
-    winner = check_winner(board)
-    if winner == player:
-        return 100 - depth
-    if winner == get_opponent(player):
-        return -100 + depth
-    if is_board_full(board):
-        return 0
+    一時ファイルに WITHOUT ROWID テーブル（整数の盤面コードが主キー）を作り、
+    行は executemany で 1 つの明示的なトランザクション内にストリームする。
+    board 列のインデックスは読み込み後に作成し、最後に path へ置き換える。
 
-    if is_maximizing:
-        best_score = float("-inf")
-        for i in range(9):
-            row, col = i // 3, i % 3
-            if board[row][col] == " ":
-                board[row][col] = player
-                score = minimax(board, depth + 1, False, player)
-                board[row][col] = " "
-                best_score = max(score, best_score)
-        return best_score
-    else:
-        best_score = float("inf")
-        for i in range(9):
-            row, col = i // 3, i % 3
-            if board[row][col] == " ":
-                board[row][col] = get_opponent(player)
-                score = minimax(board, depth + 1, True, player)
-                board[row][col] = " "
-                best_score = min(score, best_score)
-        return best_score
-
-
-def insert_to_db(cursor, board_str, best_move, result):
-    cursor.execute(
-        """
-        INSERT OR REPLACE INTO tictactoe (board, best_move, result)
-        VALUES (?, ?, ?)
-    """,
-        (board_str, best_move, result),
-    )
+    Args:
+        path (str): 出力するデータベースファイル。
+        rows: (board, best_move, result) のイテラブル。
+        page_size (int): SQLite のページサイズ。
 
+    Returns:
+        tuple[int, float]: 書き込んだ行数と 1 秒あたりの行数。
+    """
+    tmp_path = path + ".tmp"
+    for leftover in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
 
-def create_database(board: list, player: str, cursor, seen: set, perfect_moves: dict):
-    board_str = board_to_string(board)
-    if board_str in seen:
-        return
-    seen.add(board_str)
-
-    winner = check_winner(board)
-    if winner:
-        insert_to_db(cursor, board_str, -1, winner)
-        logging.info(f"勝敗あり: {board_str} → {winner}")
-        perfect_moves[board_str] = -1
-        return
-    if is_board_full(board):
-        insert_to_db(cursor, board_str, -1, "draw")
-        logging.info(f"引き分け: {board_str}")
-        perfect_moves[board_str] = -1
-        return
-
-    best_score = float("-inf")
-    best_move = -1
-    for i in range(9):
-        row, col = i // 3, i % 3
-        if board[row][col] == " ":
-            board[row][col] = player
-            score = minimax(board, 0, False, player)
-            board[row][col] = " "
-            if score > best_score:
-                best_score = score
-                best_move = i
-
-    insert_to_db(cursor, board_str, best_move, "continue")
-    logging.info(f"登録: {board_str} → best_move: {best_move}")
-    perfect_moves[board_str] = best_move
-
-    for i in range(9):
-        row, col = i // 3, i % 3
-        if board[row][col] == " ":
-            board[row][col] = player
-            create_database(board, get_opponent(player), cursor, seen, perfect_moves)
-            board[row][col] = " "
-
-
-def main():
-    conn = sqlite3.connect("tictactoe.db")
+    start = time.perf_counter()
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
     cursor = conn.cursor()
-
-    # テーブル作成
+    # page_size はテーブル作成前に設定する必要がある
+    cursor.execute(f"PRAGMA page_size = {int(page_size)}")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    # 一時ファイルへの書き込みなので、途中で落ちても元のファイルは壊れない
+    cursor.execute("PRAGMA synchronous = OFF")
     cursor.execute(
         """
-        CREATE TABLE IF NOT EXISTS tictactoe (
-            board TEXT PRIMARY KEY,
+        CREATE TABLE tictactoe (
+            code INTEGER PRIMARY KEY,
+            board TEXT NOT NULL,
             best_move INTEGER,
             result TEXT
-        )
+        ) WITHOUT ROWID
     """
     )
 
-    empty_board = [[" " for _ in range(3)] for _ in range(3)]
-    seen = set()
-    perfect_moves = {}
-    create_database(empty_board, "X", cursor, seen, perfect_moves)
+    count = 0
 
-    conn.commit()
+    def numbered_rows():
+        nonlocal count
+        for board_str, best_move, result in rows:
+            count += 1
+            yield string_to_code(board_str), board_str, best_move, result
+
+    cursor.execute("BEGIN")
+    cursor.executemany(
+        "INSERT INTO tictactoe (code, board, best_move, result) VALUES (?, ?, ?, ?)",
+        numbered_rows(),
+    )
+    cursor.execute("COMMIT")
+    # 二次インデックスは読み込み後にまとめて作成する
+    cursor.execute("CREATE UNIQUE INDEX idx_tictactoe_board ON tictactoe (board)")
+    # WAL をチェックポイントして、配布するファイルを単体で読めるようにする
+    cursor.execute("PRAGMA journal_mode = DELETE")
     conn.close()
-    print("✅ データベースファイル tictactoe.db を生成しました。")
+    os.replace(tmp_path, path)
+
+    elapsed = time.perf_counter() - start
+    return count, count / elapsed if elapsed > 0 else float(count)
+
+
+def export_perfect_moves_bin(
+    json_file: str = "perfect_moves.json", bin_file: str = "perfect_moves.bin"
+) -> int:
+    """
+    既存の perfect_moves.json をバイナリ形式（move_table 形式）に変換する。
+
+    盤面の base-3 コードを添字とする 19,683 バイトの配列で、終局盤面と
+    未登録の盤面は番兵値（TERMINAL / MISSING）になる。PerfectAgent は
+    このファイルを mmap して読み込む。
+
+    Args:
+        json_file (str): 変換元の JSON ファイル。
+        bin_file (str): 出力するバイナリファイル。
+
+    Returns:
+        int: 書き込んだ盤面の数。
+    """
+    with open(json_file, "r", encoding="latin-1") as f:
+        perfect_moves = json.load(f)
+    write_move_table(bin_file, perfect_moves.items())
+    return len(perfect_moves)
+
+
+def main(canonical: bool = False):
+    """
+    tictactoe.db、perfect_moves.json と perfect_moves.bin を生成する。
+
+    Args:
+        canonical (bool): True の場合、対称な盤面は正規形（symmetry.canonicalize）
+            のみを登録する。エージェント側は use_symmetry=True で利用する。
+    """
+    rows = solve_positions(canonical)
+    count, rows_per_sec = write_database("tictactoe.db", rows)
+    print(
+        f"✅ データベースファイル tictactoe.db を生成しました。"
+        f"（{count} 行, {rows_per_sec:,.0f} 行/秒）"
+    )
+
+    perfect_moves = {board_str: best_move for board_str, best_move, _ in rows}
 
     # perfect_moves を JSON ファイルに保存
     with open("perfect_moves.json", "w") as f:
         json.dump(perfect_moves, f)
     print("✅ perfect_moves.json を生成しました。")
 
+    write_move_table("perfect_moves.bin", perfect_moves.items())
+    print("✅ perfect_moves.bin を生成しました。")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate tictactoe.db, perfect_moves.json and perfect_moves.bin."
+    )
+    parser.add_argument(
+        "--canonical",
+        action="store_true",
+        help="Store only the canonical form of symmetric boards.",
+    )
+    parser.add_argument(
+        "--export-bin",
+        action="store_true",
+        help="Only convert the existing perfect_moves.json to perfect_moves.bin.",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.export_bin:
+        count = export_perfect_moves_bin()
+        print(f"✅ perfect_moves.bin を生成しました。（{count} 盤面）")
+    else:
+        main(canonical=args.canonical)
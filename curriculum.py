@@ -0,0 +1,177 @@
+"""
+curriculum.py: Opponent schedules for Q-learning training.
+
+A curriculum is a list of stages, each mixing opponents of an
+opponent_pool.OpponentPool by weight until a given episode. It is written as
+JSON, for example:
+
+    {
+        "stages": [
+            {"until": 20000, "opponents": {"random": 1}},
+            {"until": 0.6, "opponents": {"random": 1, "minimax": 1}},
+            {"opponents": {"perfect": 3, "self": 1}}
+        ],
+        "snapshot_every": 10000
+    }
+
+"until" is the first episode after the stage: an episode number, or a
+fraction of the run when given as a float of at most 1. The last stage may
+omit it and lasts until the end. Each episode draws its opponent from the
+stage's weights. The "self" opponent is a snapshot of the learner that is
+refreshed every snapshot_every episodes.
+"""
+
+import json
+
+import numpy as np
+
+from opponent_pool import SELF_PLAY, OpponentPool
+
+
+class Curriculum:
+    """
+    Opponent schedule by episode ranges and weights.
+
+    Attributes:
+        stages (list[tuple]): (until, {opponent: weight}) pairs; until is
+            None for the open-ended last stage.
+        snapshot_every (int): Episodes between self-play snapshots.
+    """
+
+    def __init__(self, stages, snapshot_every: int = 10000):
+        if not stages:
+            raise ValueError("A curriculum needs at least one stage")
+        self.stages = []
+        for stage in stages:
+            if isinstance(stage, dict):
+                stage = (stage.get("until"), stage["opponents"])
+            until, weights = stage
+            if not weights or min(weights.values()) < 0 or not sum(weights.values()):
+                raise ValueError(f"Invalid opponent weights: {weights}")
+            self.stages.append((until, dict(weights)))
+        if snapshot_every <= 0:
+            raise ValueError("snapshot_every must be positive")
+        self.snapshot_every = snapshot_every
+
+    @classmethod
+    def from_file(cls, path: str) -> "Curriculum":
+        """Reads a curriculum from a JSON file."""
+        with open(path, "r") as f:
+            config = json.load(f)
+        return cls(config["stages"], config.get("snapshot_every", 10000))
+
+    @property
+    def opponents(self) -> list:
+        """The names of all opponents used, in order of first appearance."""
+        names = []
+        for _, weights in self.stages:
+            names.extend(name for name in weights if name not in names)
+        return names
+
+    def _boundaries(self, total_episodes: int) -> list:
+        boundaries = []
+        for until, _ in self.stages:
+            if until is None:
+                boundaries.append(total_episodes)
+            elif isinstance(until, float) and until <= 1.0:
+                boundaries.append(int(round(until * total_episodes)))
+            else:
+                boundaries.append(int(until))
+        boundaries[-1] = max(boundaries[-1], total_episodes)
+        return boundaries
+
+    def schedule(
+        self,
+        pool: OpponentPool,
+        first_episode: int,
+        num_episodes: int,
+        total_episodes: int,
+        rng,
+    ) -> np.ndarray:
+        """
+        Draws the opponent of each episode in a range.
+
+        Args:
+            pool (OpponentPool): The pool holding every opponent of the curriculum.
+            first_episode (int): Global number of the first episode.
+            num_episodes (int): The number of episodes.
+            total_episodes (int): The number of episodes of the whole run.
+            rng (np.random.Generator): The random generator.
+
+        Returns:
+            np.ndarray: uint8 row of pool.stack() for each episode.
+        """
+        episodes = first_episode + np.arange(num_episodes)
+        stage = np.searchsorted(
+            self._boundaries(total_episodes), episodes, side="right"
+        )
+        stage = np.minimum(stage, len(self.stages) - 1)
+        schedule = np.zeros(num_episodes, dtype=np.uint8)
+        for index, (_, weights) in enumerate(self.stages):
+            in_stage = np.flatnonzero(stage == index)
+            if len(in_stage) == 0:
+                continue
+            rows = np.array([pool.index(name) for name in weights], dtype=np.uint8)
+            p = np.array(list(weights.values()), dtype=float)
+            schedule[in_stage] = rng.choice(rows, size=len(in_stage), p=p / p.sum())
+        return schedule
+
+
+def train_curriculum(
+    agent,
+    pool: OpponentPool,
+    curriculum: Curriculum,
+    num_episodes: int,
+    seed: int = 0,
+    progress_every: int = 0,
+    on_progress=None,
+) -> int:
+    """
+    Trains a FastQLearningAgent with the native loop against a curriculum.
+
+    The run is played in chunks of curriculum.snapshot_every episodes when the
+    curriculum uses self-play, refreshing the "self" snapshot before each
+    chunk; otherwise it is one call to train_native. With on_progress, the
+    chunks are also split every progress_every episodes; the random state is
+    carried from chunk to chunk, so this split does not change the result.
+
+    Args:
+        agent: The fast_trainer.FastQLearningAgent whose q_table is trained.
+        pool (OpponentPool): Holds every opponent of the curriculum.
+        curriculum (Curriculum): The opponent schedule.
+        num_episodes (int): The number of episodes of the whole run.
+        seed (int): Seed of the schedule and of the native loop.
+        progress_every (int): Episodes between on_progress calls.
+        on_progress: Called as on_progress(episodes_done, updates) after each
+            chunk. Training stops early when it returns True.
+
+    Returns:
+        int: The number of Q-value updates.
+    """
+    rng = np.random.default_rng(seed)
+    self_play = SELF_PLAY in curriculum.opponents
+    chunk = curriculum.snapshot_every if self_play else max(num_episodes, 1)
+    check = progress_every if on_progress is not None else 0
+    bounds = set(range(0, num_episodes, chunk))
+    if check > 0:
+        bounds.update(range(0, num_episodes, check))
+    bounds = sorted(bounds) + [num_episodes]
+    updates, rng_state = 0, int(rng.integers(2**63))
+    for first_episode, done in zip(bounds, bounds[1:]):
+        size = done - first_episode
+        if self_play and first_episode % chunk == 0:
+            pool.snapshot(agent.q_table)
+        schedule = curriculum.schedule(pool, first_episode, size, num_episodes, rng)
+        updates += agent.train_native(
+            pool.stack(),
+            size,
+            rng_state,
+            first_episode,
+            num_episodes,
+            schedule,
+        )
+        rng_state = agent.rng_state
+        if check > 0 and done % check == 0 and done < num_episodes:
+            if on_progress(done, updates):
+                break
+    return updates
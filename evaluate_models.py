@@ -1,110 +1,99 @@
 import argparse
-from tqdm import tqdm
-from game_logic import TicTacToe
-from agents.q_learning_agent import QLearningAgent
 
+from tournament import run_tournament, write_results
 
-def evaluate_models(q_table_file1, q_table_file2, num_games):
-    """
-    Evaluates the strength of two Q-learning agents against each other.
-    """
-    print("=== モデル評価レポート ===")
-    print(f"総ゲーム数: {num_games}回/対戦")
-
-    agent1_wins = 0
-    agent2_wins = 0
-    draws = 0
-
-    # --- Agent1が先手 ('X') の場合 ---
-    print("\n--- Agent1 (X) vs Agent2 (O) ---")
-    agent1 = QLearningAgent(player="X", q_table_file=q_table_file1, is_training=False)
-    agent2 = QLearningAgent(player="O", q_table_file=q_table_file2, is_training=False)
-
-    for _ in tqdm(range(num_games), desc="Agent1(X) vs Agent2(O)"):
-        game = TicTacToe(agent_x=agent1, agent_o=agent2)
-        while not game.game_over:
-            current_agent = game.get_current_agent()
-            move = current_agent.get_move(game.board)
-            if move is None:
-                break
-            game.make_move(move[0], move[1])
-            winner = game.check_winner()
-            if winner:
-                break
-            game.switch_player()
-
-        winner = game.check_winner()
-        if winner == agent1.player:
-            agent1_wins += 1
-        elif winner == agent2.player:
-            agent2_wins += 1
-        else:
-            draws += 1
 
-    print(
-        f"Agent1 ({q_table_file1}) の勝利: {agent1_wins} ({agent1_wins/num_games:.1%})"
-    )
-    print(
-        f"Agent2 ({q_table_file2}) の勝利: {agent2_wins} ({agent2_wins/num_games:.1%})"
-    )
-    print(f"引き分け: {draws} ({draws/num_games:.1%})")
+def _format(value, total):
+    # Exact results are probabilities, sampled ones counts of games.
+    if isinstance(value, float):
+        return f"{value / total:.2%}"
+    return f"{value} ({value/total:.1%})"
 
-    # --- Agent2が先手 ('X') の場合 ---
-    agent1_wins_as_o = 0
-    agent2_wins_as_x = 0
-    draws_as_o = 0
 
-    print("\n--- Agent2 (X) vs Agent1 (O) ---")
-    agent2_as_x = QLearningAgent(
-        player="X", q_table_file=q_table_file2, is_training=False
-    )
-    agent1_as_o = QLearningAgent(
-        player="O", q_table_file=q_table_file1, is_training=False
-    )
+def _print_matchup(label, matchup, wins_key, losses_key, name1, name2, num_games):
+    print(f"\n--- {label} ---")
+    print(f"Agent1 ({name1}) の勝利: {_format(matchup[wins_key], num_games)}")
+    print(f"Agent2 ({name2}) の勝利: {_format(matchup[losses_key], num_games)}")
+    print(f"引き分け: {_format(matchup['draws'], num_games)}")
 
-    for _ in tqdm(range(num_games), desc="Agent2(X) vs Agent1(O)"):
-        game = TicTacToe(agent_x=agent2_as_x, agent_o=agent1_as_o)
-        while not game.game_over:
-            current_agent = game.get_current_agent()
-            move = current_agent.get_move(game.board)
-            if move is None:
-                break
-            game.make_move(move[0], move[1])
-            winner = game.check_winner()
-            if winner:
-                break
-            game.switch_player()
-
-        winner = game.check_winner()
-        if winner == agent1_as_o.player:
-            agent1_wins_as_o += 1
-        elif winner == agent2_as_x.player:
-            agent2_wins_as_x += 1
-        else:
-            draws_as_o += 1
 
-    print(
-        f"Agent1 ({q_table_file1}) の勝利: {agent1_wins_as_o} ({agent1_wins_as_o/num_games:.1%})"
+def evaluate_models(
+    q_table_file1,
+    q_table_file2,
+    num_games,
+    workers=None,
+    seed=0,
+    output=None,
+    exact=False,
+):
+    """
+    Evaluates the strength of two Q-learning agents against each other.
+
+    Each model is loaded once and the games of both matchups are played in
+    parallel by tournament.run_tournament.
+
+    Args:
+        q_table_file1 (str): The first model (Q-table, policy file or a
+            built-in opponent name).
+        q_table_file2 (str): The second model.
+        num_games (int): Games per matchup.
+        workers (int | None): Worker processes (all CPUs when None).
+        seed (int): Seed of the games.
+        output (str | None): JSON file for the results.
+        exact (bool): Report exact outcome probabilities instead of playing
+            games (see exact_evaluation.py).
+
+    Returns:
+        dict: The tournament results.
+    """
+    print("=== モデル評価レポート ===")
+    if exact:
+        print("厳密計算: 全局面の確率を計算します（サンプリングなし）")
+    else:
+        print(f"総ゲーム数: {num_games}回/対戦")
+
+    results = run_tournament(
+        {"Agent1": q_table_file1, "Agent2": q_table_file2},
+        num_games,
+        workers,
+        seed,
+        exact,
     )
-    print(
-        f"Agent2 ({q_table_file2}) の勝利: {agent2_wins_as_x} ({agent2_wins_as_x/num_games:.1%})"
+    num_games = 1 if exact else num_games
+    first, second = results["matchups"]
+    _print_matchup(
+        "Agent1 (X) vs Agent2 (O)",
+        first,
+        "x_wins",
+        "o_wins",
+        q_table_file1,
+        q_table_file2,
+        num_games,
+    )
+    _print_matchup(
+        "Agent2 (X) vs Agent1 (O)",
+        second,
+        "o_wins",
+        "x_wins",
+        q_table_file1,
+        q_table_file2,
+        num_games,
     )
-    print(f"引き分け: {draws_as_o} ({draws_as_o/num_games:.1%})")
 
     # --- 総合結果 ---
-    total_agent1_wins = agent1_wins + agent1_wins_as_o
-    total_agent2_wins = agent2_wins + agent2_wins_as_x
-    total_draws = draws + draws_as_o
-    total_games = num_games * 2
-
+    total = results["totals"]["Agent1"]
+    total_games = total["games"]
     print("\n--- 総合結果 ---")
+    print(f"Agent1 ({q_table_file1}) の総勝利数: {_format(total['wins'], total_games)}")
     print(
-        f"Agent1 ({q_table_file1}) の総勝利数: {total_agent1_wins} ({total_agent1_wins/total_games:.1%})"
-    )
-    print(
-        f"Agent2 ({q_table_file2}) の総勝利数: {total_agent2_wins} ({total_agent2_wins/total_games:.1%})"
+        f"Agent2 ({q_table_file2}) の総勝利数: {_format(total['losses'], total_games)}"
     )
-    print(f"総引き分け数: {total_draws} ({total_draws/total_games:.1%})")
+    print(f"総引き分け数: {_format(total['draws'], total_games)}")
+
+    if output:
+        write_results(output, results)
+        print(f"\n結果を {output} に保存しました。")
+    return results
 
 
 def main():
@@ -112,13 +101,17 @@ def main():
         description="Evaluate two Q-learning models against each other."
     )
     parser.add_argument(
-        "--model1", type=str, required=True, help="Path to the first Q-table JSON file."
+        "--model1",
+        type=str,
+        required=True,
+        help="Path to the first Q-table (.json / .npz), policy file (.bin), "
+        "or random / minimax / perfect.",
     )
     parser.add_argument(
         "--model2",
         type=str,
         required=True,
-        help="Path to the second Q-table JSON file.",
+        help="Path to the second Q-table, policy file, or built-in agent.",
     )
     parser.add_argument(
         "--num_games",
@@ -126,9 +119,32 @@ def main():
         default=100,
         help="Number of games to play for each matchup.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: all CPUs).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the games.")
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the results to a JSON file."
+    )
+    parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Compute exact outcome probabilities instead of playing games.",
+    )
     args = parser.parse_args()
 
-    evaluate_models(args.model1, args.model2, args.num_games)
+    evaluate_models(
+        args.model1,
+        args.model2,
+        args.num_games,
+        args.workers,
+        args.seed,
+        args.output,
+        args.exact,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+"""
+exact_evaluation.py: Exact win/draw/loss probabilities between two agents.
+
+Instead of sampling games, the probability of reaching each position of
+state_graph.StateGraph is pushed forward once, in move order, from the empty
+board: a position passes its probability to the position after each move,
+weighted by the mover's move probabilities. The outcome probabilities are the
+probabilities of reaching the finished positions. Only positions the two
+agents can actually reach are asked for moves, so at most 4,520 questions
+decide a match exactly, without sampling noise.
+
+Agents describe their moves with BaseAgent.get_move_probabilities. A player
+without a move on an unfinished board ends the game as a draw, like
+evaluate_models.py. opponent_pool policy tables (uniform over the set bits of
+each board, every empty cell when the entry is 0, like fast_trainer.play_policies)
+are evaluated with the same pass, vectorized per move number.
+"""
+
+import numpy as np
+
+from batch_game_logic import DRAW, O_WINS, PLAYER_X, X_WINS
+from state_graph import CELL_BITS, code_to_string, load_state_graph
+from symmetry import string_to_board
+
+
+def _outcomes(graph, reach, stopped=0.0) -> dict:
+    return {
+        "x_wins": float(reach[graph.winner == X_WINS].sum()),
+        "o_wins": float(reach[graph.winner == O_WINS].sum()),
+        "draws": float(reach[graph.winner == DRAW].sum() + stopped),
+    }
+
+
+def outcome_probabilities(agent_x, agent_o, graph=None) -> dict:
+    """
+    Computes the exact outcome probabilities of a game between two agents.
+
+    Args:
+        agent_x: The agent playing X (moving first).
+        agent_o: The agent playing O.
+        graph (StateGraph | None): The state graph (load_state_graph() when None).
+
+    Returns:
+        dict: The probabilities "x_wins", "o_wins" and "draws".
+
+    Raises:
+        ValueError: If an agent does not expose its move probabilities, or
+            gives probability to an occupied cell.
+    """
+    graph = graph if graph is not None else load_state_graph()
+    reach = np.zeros(len(graph))
+    reach[0] = 1.0
+    stopped = 0.0
+    # State IDs are in move order, so every position is final before it is read.
+    for state in np.flatnonzero(~graph.terminal):
+        probability = reach[state]
+        if probability == 0.0:
+            continue
+        agent = agent_x if graph.to_move[state] == PLAYER_X else agent_o
+        board = string_to_board(code_to_string(int(graph.codes[state])))
+        moves = agent.get_move_probabilities(board)
+        if moves is None:
+            raise ValueError(
+                f"{type(agent).__name__} does not expose move probabilities"
+            )
+        if not moves:
+            stopped += probability
+        for (row, col), p in moves.items():
+            successor = graph.successors[state, row * 3 + col]
+            if successor < 0:
+                raise ValueError(
+                    f"{type(agent).__name__} gave probability to the illegal move "
+                    f"{(row, col)} on board {graph.board_string(state)!r} (state {state})"
+                )
+            reach[successor] += probability * p
+    return _outcomes(graph, reach, stopped)
+
+
+def policy_outcome_probabilities(policy_x, policy_o, graph=None) -> dict:
+    """
+    Computes the exact outcome probabilities of a game between two policy tables.
+
+    Args:
+        policy_x (np.ndarray): uint16 ``(3**9,)`` opponent_pool policy table of X.
+        policy_o (np.ndarray): The policy table of O.
+        graph (StateGraph | None): The state graph.
+
+    Returns:
+        dict: The probabilities "x_wins", "o_wins" and "draws".
+    """
+    graph = graph if graph is not None else load_state_graph()
+    masks = np.where(
+        graph.to_move == PLAYER_X,
+        np.asarray(policy_x)[graph.codes],
+        np.asarray(policy_o)[graph.codes],
+    ).astype(np.int64)
+    masks = np.where(masks & graph.legal, masks & graph.legal, graph.legal)
+    chosen = (masks[:, None] & CELL_BITS) != 0
+    weights = chosen / np.maximum(chosen.sum(axis=1, keepdims=True), 1)
+
+    reach = np.zeros(len(graph))
+    reach[0] = 1.0
+    for moves in range(9):
+        states = np.flatnonzero((graph.moves == moves) & ~graph.terminal)
+        flow = reach[states, None] * weights[states]
+        legal = chosen[states]
+        np.add.at(reach, graph.successors[states][legal], flow[legal])
+    return _outcomes(graph, reach)
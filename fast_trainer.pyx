@@ -3,37 +3,214 @@
 
 import numpy as np
 cimport numpy as np
+from libc.stdint cimport uint64_t
 import random
+import rewards
+from symmetry import INVERSE_TRANSFORMS, TRANSFORMS
 
-# Helper to get available move indices from a board string
-cdef list _get_available_moves_indices(str board_str):
-    cdef list available_indices = []
+# C copies of the shared rewards (rewards.py) for the nogil training loop.
+cdef double WIN_REWARD = rewards.WIN_REWARD
+cdef double DRAW_REWARD = rewards.DRAW_REWARD
+cdef double LOSS_REWARD = rewards.LOSS_REWARD
+cdef double STEP_REWARD = rewards.STEP_REWARD
+cdef double ILLEGAL_Q = rewards.ILLEGAL_Q
+
+# Board cells in C: 0 = empty, 1 = X, 2 = O (the base-3 digits
+# of state_graph.string_to_code, so a board's code is sum(digit * 3**cell)).
+cdef int POW3[9]
+cdef int WIN_LINES[24]
+for _i in range(9):
+    POW3[_i] = 3 ** _i
+for _i, _cell in enumerate((0, 1, 2, 3, 4, 5, 6, 7, 8, 0, 3, 6, 1, 4, 7, 2, 5, 8, 0, 4, 8, 2, 4, 6)):
+    WIN_LINES[_i] = _cell
+
+# The 8 board symmetries of symmetry.py: SYM_SOURCE[t * 9 + i] is the source
+# cell of new cell i, SYM_TARGET[t * 9 + i] the new cell that cell i moves to.
+cdef int SYM_SOURCE[72]
+cdef int SYM_TARGET[72]
+for _t in range(8):
+    for _i in range(9):
+        SYM_SOURCE[_t * 9 + _i] = TRANSFORMS[_t][_i]
+        SYM_TARGET[_t * 9 + _i] = INVERSE_TRANSFORMS[_t][_i]
+
+# Number of base-3 board codes (3**9); the Q-table has one row per code.
+cdef int NUM_CODES = 19683
+
+cdef inline int _state_code(str state) except -1:
+    # Base-3 code of a 9-character board string (state_graph.string_to_code)
+    cdef int code = 0
     cdef int i
+    cdef Py_UCS4 cell
+    if len(state) != 9:
+        raise ValueError(f"Invalid board state: {state!r}")
+    for i in range(8, -1, -1):
+        cell = state[i]
+        if cell == ' ':
+            code = code * 3
+        elif cell == 'X':
+            code = code * 3 + 1
+        elif cell == 'O':
+            code = code * 3 + 2
+        else:
+            raise ValueError(f"Invalid board state: {state!r}")
+    return code
+
+cdef inline int _board_code(list board) except -1:
+    # Base-3 code of a list-of-lists board
+    cdef int code = 0
+    cdef int i
+    for i in range(8, -1, -1):
+        cell = board[i // 3][i % 3]
+        if cell == "X":
+            code = code * 3 + 1
+        elif cell == "O":
+            code = code * 3 + 2
+        else:
+            code = code * 3
+    return code
+
+cdef str _code_string(int code):
+    # 9-character board string of a base-3 code (state_graph.code_to_string)
+    cdef list cells = []
+    cdef int i
+    for i in range(9):
+        cells.append(" XO"[code % 3])
+        code = code // 3
+    return "".join(cells)
+
+cdef inline void _init_row(double[:, ::1] values, unsigned char[::1] visited, int code, double initial_value) noexcept nogil:
+    # First touch of a state: legal moves get initial_value, occupied cells ILLEGAL_Q
+    cdef int i, rest = code
+    if visited[code]:
+        return
+    visited[code] = 1
     for i in range(9):
-        if board_str[i] == ' ':
-            available_indices.append(i)
-    return available_indices
+        values[code, i] = initial_value if rest % 3 == 0 else ILLEGAL_Q
+        rest = rest // 3
 
-# C-level struct to hold Q-table data for performance
-ctypedef struct QTableEntry:
-    double values[9]
+cdef inline int _transform_code(int code, int transform) noexcept nogil:
+    # Base-3 code of the board after applying one of the 8 symmetries
+    cdef int digits[9]
+    cdef int i, image = 0
+    for i in range(9):
+        digits[i] = code % 3
+        code = code // 3
+    for i in range(8, -1, -1):
+        image = image * 3 + digits[SYM_SOURCE[transform * 9 + i]]
+    return image
+
+cdef inline void _update_entry(double[:, ::1] values, unsigned char[::1] visited, unsigned int[:, ::1] counts, int code, int action, double reward, int next_code, double learning_rate, double discount_factor, double initial_value) noexcept nogil:
+    # One Q-learning update; next_code < 0 marks a terminal transition
+    cdef int i
+    cdef double max_next_q = 0.0
+    _init_row(values, visited, code, initial_value)
+    if next_code >= 0:
+        _init_row(values, visited, next_code, initial_value)
+        max_next_q = values[next_code, 0]
+        for i in range(1, 9):
+            if values[next_code, i] > max_next_q:
+                max_next_q = values[next_code, i]
+    values[code, action] = (1.0 - learning_rate) * values[code, action] + learning_rate * (reward + discount_factor * max_next_q)
+    counts[code, action] += 1
 
-# A simple dictionary-like structure for the Q-table at C-level
-# This is a basic implementation. For massive state spaces, a proper hash map is better.
+cdef inline int _q_update(double[:, ::1] values, unsigned char[::1] visited, unsigned int[:, ::1] counts, int code, int action, double reward, int next_code, double learning_rate, double discount_factor, double initial_value, bint symmetric) noexcept nogil:
+    # Applies an update, or with symmetric=True the same update to every
+    # distinct symmetric image of (state, action). Returns the number of entries updated.
+    cdef int seen_codes[8]
+    cdef int seen_actions[8]
+    cdef int transform, image, image_action, j, num_seen = 0
+    cdef bint duplicate
+    if not symmetric:
+        _update_entry(values, visited, counts, code, action, reward, next_code, learning_rate, discount_factor, initial_value)
+        return 1
+    for transform in range(8):
+        image = _transform_code(code, transform)
+        image_action = SYM_TARGET[transform * 9 + action]
+        duplicate = False
+        for j in range(num_seen):
+            if seen_codes[j] == image and seen_actions[j] == image_action:
+                duplicate = True
+                break
+        if duplicate:
+            continue
+        seen_codes[num_seen] = image
+        seen_actions[num_seen] = image_action
+        num_seen += 1
+        _update_entry(
+            values, visited, counts, image, image_action, reward,
+            _transform_code(next_code, transform) if next_code >= 0 else -1,
+            learning_rate, discount_factor, initial_value,
+        )
+    return num_seen
+
+# The Q-table as one contiguous (3**9, 9) float64 array indexed by base-3 board
+# code, plus a visited flag per code. Lookups need no hashing or string keys.
+# counts[code, action] is the number of updates of each entry since the table
+# was last replaced (used to weight shards when merging parallel learners).
 cdef class C_QTable:
-    cdef public dict table
+    cdef public np.ndarray values
+    cdef public np.ndarray visited
+    cdef public np.ndarray counts
+    cdef double[:, ::1] _values
+    cdef unsigned char[::1] _visited
+    cdef unsigned int[:, ::1] _counts
 
     def __cinit__(self):
-        self.table = {}
+        self.values = np.zeros((NUM_CODES, 9), dtype=np.float64)
+        self.visited = np.zeros(NUM_CODES, dtype=np.uint8)
+        self.counts = np.zeros((NUM_CODES, 9), dtype=np.uint32)
+        self._values = self.values
+        self._visited = self.visited
+        self._counts = self.counts
 
     def __len__(self):
-        return len(self.table)
+        return int(np.count_nonzero(self.visited))
+
+    def __contains__(self, str state):
+        return self._visited[_state_code(state)] != 0
+
+    def get_values(self, str state):
+        """Returns the Q-value row of a state (a view), or None if it was never visited."""
+        cdef int code = _state_code(state)
+        if not self._visited[code]:
+            return None
+        return self.values[code]
 
     def get_table(self):
-        return self.table
-        
+        """Returns the visited states as a {board string: list of 9 Q-values} dict."""
+        codes = np.flatnonzero(self.visited)
+        rows = self.values[codes].tolist()
+        table = {}
+        cdef int i, code
+        for i in range(len(codes)):
+            code = codes[i]
+            table[_code_string(code)] = rows[i]
+        return table
+
+    def get_rows(self):
+        """Returns the visited states' base-3 codes and a (N, 9) copy of their Q-values."""
+        codes = np.flatnonzero(self.visited).astype(np.int32)
+        return codes, self.values[codes]
+
+    def set_rows(self, states, values):
+        """Replaces the contents with the Q-values of the given base-3 codes."""
+        states = np.asarray(states, dtype=np.intp)
+        self.visited[:] = 0
+        self.values[:] = 0.0
+        self.counts[:] = 0
+        self.values[states] = values
+        self.visited[states] = 1
+
     def set_table(self, dict new_table):
-        self.table = new_table
+        """Replaces the contents with a {board string: 9 Q-values} dict."""
+        cdef int code
+        self.visited[:] = 0
+        self.values[:] = 0.0
+        self.counts[:] = 0
+        for state, q_values in new_table.items():
+            code = _state_code(state)
+            self.values[code] = q_values
+            self._visited[code] = 1
 
 # We are moving the performance-critical parts of QLearningAgent here.
 # The main QLearningAgent class will hold an instance of this fast agent.
@@ -46,8 +223,14 @@ cdef class FastQLearningAgent:
     cdef public double min_exploration_rate
     cdef public double optimistic_initial_value
     cdef public str player
+    # When set, every update is also applied to all symmetric images of the
+    # (state, action) pair, with the action remapped through the transform.
+    cdef public bint symmetric_updates
+    # SplitMix64 state left by the last train_native call; passing it as the
+    # next call's seed continues the same random stream.
+    cdef public unsigned long long rng_state
     
-    def __cinit__(self, str player, double learning_rate, double discount_factor, double exploration_rate, double min_exploration_rate, double optimistic_initial_value=0.0, bint is_training=True):
+    def __cinit__(self, str player, double learning_rate, double discount_factor, double exploration_rate, double min_exploration_rate, double optimistic_initial_value=0.0, bint is_training=True, bint symmetric_updates=False):
         self.player = player
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
@@ -55,36 +238,22 @@ cdef class FastQLearningAgent:
         self.initial_exploration_rate = exploration_rate if is_training else 0.0
         self.min_exploration_rate = min_exploration_rate
         self.optimistic_initial_value = optimistic_initial_value
+        self.symmetric_updates = symmetric_updates
         self.q_table = C_QTable()
 
     # The get_move logic remains in Python for now as it's less of a bottleneck
     # and interacts more with Python objects (the board).
 
     cpdef void update_q_table(self, str state, int action, double reward, str next_state, bint is_terminal):
-        cdef np.ndarray values_array
-        if state not in self.q_table.table:
-            # Initialize Q-values for all moves as negative infinity, then set available moves to optimistic_initial_value
-            values_array = np.full(9, -1e9, dtype=np.float64)
-            for idx in _get_available_moves_indices(state):
-                values_array[idx] = self.optimistic_initial_value
-            self.q_table.table[state] = values_array
-        values_array = self.q_table.table[state]
-        cdef double current_q = values_array[action]
-        cdef double max_next_q = 0.0
-        cdef np.ndarray next_values_array # 関数の先頭に移動
-        
-        if not is_terminal:
-            if next_state not in self.q_table.table:
-                # Initialize Q-values for all moves as negative infinity, then set available moves to optimistic_initial_value
-                next_values_array = np.full(9, -1e9, dtype=np.float64)
-                for idx in _get_available_moves_indices(next_state):
-                    next_values_array[idx] = self.optimistic_initial_value
-                self.q_table.table[next_state] = next_values_array
-            next_values_array = self.q_table.table[next_state]
-            max_next_q = np.max(next_values_array)
-            
-        cdef double new_q = (1.0 - self.learning_rate) * current_q + self.learning_rate * (reward + self.discount_factor * max_next_q)
-        values_array[action] = new_q
+        cdef int code = _state_code(state)
+        cdef int next_code = -1 if is_terminal else _state_code(next_state)
+        # Unvisited states start at optimistic_initial_value for legal moves, -1e9 otherwise
+        _q_update(
+            self.q_table._values, self.q_table._visited, self.q_table._counts,
+            code, action, reward, next_code,
+            self.learning_rate, self.discount_factor, self.optimistic_initial_value,
+            self.symmetric_updates,
+        )
 
     cpdef void decay_exploration_rate(self, int episode, int total_episodes):
         cdef double decay_span = total_episodes * 0.75
@@ -96,6 +265,243 @@ cdef class FastQLearningAgent:
             else:
                 self.exploration_rate = new_rate
 
+    def train_native(self, opponent_moves, long num_episodes, unsigned long long seed=0, long first_episode=0, long total_episodes=0, opponent_schedule=None):
+        """
+        Plays and learns from num_episodes whole episodes in C, updating q_table.
+
+        opponent_moves is either a move_table (e.g. perfect_moves.bin) or a
+        (K, 3**9) stack of opponent_pool policy tables; the opponent of episode
+        i is row opponent_schedule[i] (row 0 when no schedule is given) and
+        plays a uniformly random move of the board's move set. The episode
+        ends when the opponent has no move. The learner is X in even episodes
+        and O in odd ones, and the exploration rate decays as in
+        decay_exploration_rate. Random numbers come from a SplitMix64 seeded
+        with seed, whose final state is stored in rng_state.
+
+        The episodes are numbered first_episode, first_episode + 1, ... out of
+        total_episodes (num_episodes when 0), so a slice of a longer run keeps
+        the run's side alternation and exploration schedule; seeding each slice
+        with the previous slice's rng_state makes the slices play exactly the
+        episodes of a single call. With symmetric_updates, every update also goes to the symmetric images.
+
+        Returns:
+            int: The number of Q-value updates (images included).
+        """
+        cdef const unsigned short[:, ::1] policies = _as_policies(opponent_moves)
+        if opponent_schedule is None:
+            opponent_schedule = np.zeros(num_episodes, dtype=np.uint8)
+        cdef const unsigned char[::1] schedule = np.ascontiguousarray(opponent_schedule, dtype=np.uint8)
+        if schedule.shape[0] < num_episodes:
+            raise ValueError("opponent_schedule needs an entry per episode")
+        if num_episodes > 0 and np.max(opponent_schedule[:num_episodes]) >= policies.shape[0]:
+            raise ValueError("opponent_schedule refers to a missing opponent")
+        cdef double exploration_rate = self.exploration_rate
+        cdef long updates
+        cdef uint64_t rng = seed
+        if total_episodes <= 0:
+            total_episodes = num_episodes
+        with nogil:
+            updates = _train_native(
+                self.q_table._values, self.q_table._visited, self.q_table._counts,
+                policies, schedule, first_episode, first_episode + num_episodes, total_episodes, &rng,
+                self.learning_rate, self.discount_factor,
+                &exploration_rate, self.initial_exploration_rate,
+                self.min_exploration_rate, self.optimistic_initial_value,
+                self.symmetric_updates,
+            )
+        self.exploration_rate = exploration_rate
+        self.rng_state = rng
+        return updates
+
+cdef inline uint64_t _next_random(uint64_t* state) noexcept nogil:
+    # SplitMix64
+    cdef uint64_t z
+    state[0] += 0x9E3779B97F4A7C15ULL
+    z = state[0]
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL
+    return z ^ (z >> 31)
+
+cdef inline double _random_unit(uint64_t* state) noexcept nogil:
+    return (_next_random(state) >> 11) * (1.0 / 9007199254740992.0)
+
+cdef inline int _native_winner(int* board) noexcept nogil:
+    # 0 = ongoing, 1 = X wins, 2 = O wins, 3 = draw
+    cdef int line, a
+    for line in range(8):
+        a = board[WIN_LINES[line * 3]]
+        if a != 0 and a == board[WIN_LINES[line * 3 + 1]] and a == board[WIN_LINES[line * 3 + 2]]:
+            return a
+    for a in range(9):
+        if board[a] == 0:
+            return 0
+    return 3
+
+def _as_policies(opponent_moves):
+    # A move table becomes a single policy row with one move per board
+    table = np.asarray(opponent_moves)
+    if table.dtype == np.uint8:
+        if table.shape[0] < NUM_CODES:
+            raise ValueError("opponent_moves needs 3**9 entries")
+        table = np.where(table[:NUM_CODES] < 9, np.left_shift(1, np.minimum(table[:NUM_CODES], 8).astype(np.uint16)), 0)
+    table = np.ascontiguousarray(table, dtype=np.uint16)
+    if table.ndim == 1:
+        table = table[None]
+    if table.ndim != 2 or table.shape[1] != NUM_CODES:
+        raise ValueError("opponent policies need 3**9 entries")
+    return table
+
+cdef inline int _pick_move(unsigned int moves, uint64_t* state) noexcept nogil:
+    # Uniformly random move of a non-empty move set; no draw for a single move
+    cdef int i, count = 0
+    if moves & (moves - 1) != 0:
+        for i in range(9):
+            count += (moves >> i) & 1
+        count = _next_random(state) % count
+    for i in range(9):
+        if (moves >> i) & 1:
+            if count == 0:
+                return i
+            count -= 1
+    return -1
+
+cdef long _train_native(double[:, ::1] q_values, unsigned char[::1] visited, unsigned int[:, ::1] counts, const unsigned short[:, ::1] policies, const unsigned char[::1] schedule, long first_episode, long end_episode, long total_episodes, uint64_t* rng, double learning_rate, double discount_factor, double* exploration_rate, double initial_exploration_rate, double min_exploration_rate, double initial_value, bint symmetric) noexcept nogil:
+    cdef int board[9]
+    cdef int candidates[9]
+    cdef int num_candidates, me, code, next_code, action, winner, i, opponent
+    cdef unsigned int moves
+    cdef long episode, updates = 0
+    cdef double reward, max_q, new_rate
+    cdef double decay_span = total_episodes * 0.75
+
+    for episode in range(first_episode, end_episode):
+        for i in range(9):
+            board[i] = 0
+        code = 0
+        me = 1 if episode % 2 == 0 else 2
+        winner = 0
+        opponent = schedule[episode - first_episode]
+        if me == 2:
+            moves = policies[opponent, code]
+            if moves != 0:
+                action = _pick_move(moves, rng)
+                board[action] = 1
+                code += POW3[action]
+            else:
+                winner = -1
+
+        while winner == 0:
+            # Learner's move (epsilon-greedy, random tie-breaking)
+            num_candidates = 0
+            if _random_unit(rng) < exploration_rate[0]:
+                for i in range(9):
+                    if board[i] == 0:
+                        candidates[num_candidates] = i
+                        num_candidates += 1
+            else:
+                _init_row(q_values, visited, code, initial_value)
+                max_q = ILLEGAL_Q
+                for i in range(9):
+                    if board[i] == 0:
+                        if q_values[code, i] > max_q:
+                            max_q = q_values[code, i]
+                            candidates[0] = i
+                            num_candidates = 1
+                        elif q_values[code, i] == max_q:
+                            candidates[num_candidates] = i
+                            num_candidates += 1
+            if num_candidates == 0:
+                break
+            action = candidates[_next_random(rng) % num_candidates]
+
+            board[action] = me
+            next_code = code + me * POW3[action]
+            winner = _native_winner(board)
+
+            reward = STEP_REWARD
+            if winner == me:
+                reward += WIN_REWARD
+            elif winner == 3:
+                reward += DRAW_REWARD
+            elif winner != 0:
+                reward += LOSS_REWARD
+            updates += _q_update(
+                q_values, visited, counts, code, action, reward,
+                next_code if winner == 0 else -1,
+                learning_rate, discount_factor, initial_value, symmetric,
+            )
+            code = next_code
+            if winner != 0:
+                break
+
+            # Opponent's move from its precomputed policy table
+            moves = policies[opponent, code]
+            if moves == 0:
+                break
+            action = _pick_move(moves, rng)
+            board[action] = 3 - me
+            code += (3 - me) * POW3[action]
+            winner = _native_winner(board)
+
+        if episode < decay_span:
+            new_rate = initial_exploration_rate - (initial_exploration_rate - min_exploration_rate) * (episode / decay_span)
+            exploration_rate[0] = new_rate if new_rate > min_exploration_rate else min_exploration_rate
+    return updates
+
+def derive_seed(seed, *keys):
+    """
+    Returns the SplitMix64 seed of one independent stream of a seeded run.
+
+    The seed depends only on seed and keys (e.g. round and worker, or matchup
+    and chunk), so parallel runs give the same result for any number of
+    processes.
+    """
+    return int(np.random.SeedSequence([seed, *keys]).generate_state(1, np.uint64)[0])
+
+def play_policies(policy_x, policy_o, long num_games, unsigned long long seed=0):
+    """
+    Plays num_games games in C between two opponent_pool policy tables.
+
+    Each side plays a uniformly random move of its policy's move set for the
+    board, or of the empty cells when the set is empty. Random numbers come
+    from a seeded SplitMix64, so a seed always gives the same counts.
+
+    Returns:
+        tuple[int, int, int]: X wins, O wins and draws.
+    """
+    cdef const unsigned short[::1] moves_x = _as_policies(policy_x)[0]
+    cdef const unsigned short[::1] moves_o = _as_policies(policy_o)[0]
+    cdef long counts[3]
+    with nogil:
+        _play_policies(moves_x, moves_o, num_games, seed, counts)
+    return counts[0], counts[1], counts[2]
+
+cdef void _play_policies(const unsigned short[::1] moves_x, const unsigned short[::1] moves_o, long num_games, uint64_t seed, long* counts) noexcept nogil:
+    cdef int board[9]
+    cdef int i, code, player, action, winner
+    cdef unsigned int moves
+    cdef long game
+    cdef uint64_t rng = seed
+    counts[0] = counts[1] = counts[2] = 0
+    for game in range(num_games):
+        for i in range(9):
+            board[i] = 0
+        code = 0
+        player = 1
+        winner = 0
+        while winner == 0:
+            moves = moves_x[code] if player == 1 else moves_o[code]
+            if moves == 0:
+                for i in range(9):
+                    if board[i] == 0:
+                        moves |= 1 << i
+            action = _pick_move(moves, &rng)
+            board[action] = player
+            code += player * POW3[action]
+            winner = _native_winner(board)
+            player = 3 - player
+        counts[winner - 1] += 1
+
 # The train_episode function, now optimized.
 # We pass Python objects (game, agents) but the inner logic can be faster.
 def train_episode_fast(FastQLearningAgent q_agent, opponent):
@@ -144,8 +550,6 @@ def train_episode_fast(FastQLearningAgent q_agent, opponent):
 
 # Helper to expose get_move to Python
 def get_move_py(FastQLearningAgent agent, list board):
-    state = "".join(cell for row in board for cell in row)
-    
     # Exploration
     if random.uniform(0, 1) < agent.exploration_rate:
         available_moves = []
@@ -157,14 +561,9 @@ def get_move_py(FastQLearningAgent agent, list board):
         return random.choice(available_moves)
 
     # Exploitation
-    cdef np.ndarray q_values_array
-    if state not in agent.q_table.table:
-        # Initialize Q-values for all moves as negative infinity, then set available moves to optimistic_initial_value
-        q_values_array = np.full(9, -1e9, dtype=np.float64)
-        for idx in _get_available_moves_indices(state):
-            q_values_array[idx] = agent.optimistic_initial_value
-        agent.q_table.table[state] = q_values_array
-    q_values_array = agent.q_table.table[state]
+    cdef int code = _board_code(board)
+    _init_row(agent.q_table._values, agent.q_table._visited, code, agent.optimistic_initial_value)
+    cdef double[:] q_values_array = agent.q_table._values[code]
 
     cdef double max_q = -1e9 # A very small number
     
@@ -1,5 +1,40 @@
 # game_logic.py
 
+# Cell index i = row * 3 + col. The lines are listed in the same order that
+# TicTacToe._check_winner_logic scans them, so every engine reports the same
+# winner_line when a move completes more than one line.
+LINES = (
+    ((0, 0), (0, 1), (0, 2)),
+    ((0, 0), (1, 0), (2, 0)),
+    ((1, 0), (1, 1), (1, 2)),
+    ((0, 1), (1, 1), (2, 1)),
+    ((2, 0), (2, 1), (2, 2)),
+    ((0, 2), (1, 2), (2, 2)),
+    ((0, 0), (1, 1), (2, 2)),
+    ((0, 2), (1, 1), (2, 0)),
+)
+WIN_MASKS = tuple(sum(1 << (r * 3 + c) for r, c in line) for line in LINES)
+FULL_MASK = (1 << 9) - 1
+
+
+def _first_winning_line(bits: int) -> int:
+    for index, mask in enumerate(WIN_MASKS):
+        if bits & mask == mask:
+            return index
+    return -1
+
+
+# Index of the first completed line for every 9-bit stone pattern, or -1.
+# With this table a win check is a single lookup.
+WIN_LINE_BY_BITS = tuple(_first_winning_line(bits) for bits in range(1 << 9))
+
+# Indices into LINES of the lines passing through each cell.
+CELL_LINES = tuple(
+    tuple(index for index, line in enumerate(LINES) if (r, c) in line)
+    for r in range(3)
+    for c in range(3)
+)
+
 
 class TicTacToe:
     """
@@ -25,6 +60,27 @@ class TicTacToe:
         self.winner_line = None
         self.game_over = False
 
+    @property
+    def board(self):
+        """list[list[str]]: The position as rows of " "/"X"/"O"."""
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        # Assigning a whole board rebuilds the incremental counters with one
+        # full scan; make_move keeps them up to date afterwards.
+        self._board = board
+        self.moves = sum(cell != " " for row in board for cell in row)
+        self._line_sums = [
+            sum(
+                1 if board[r][c] == "X" else -1 if board[r][c] == "O" else 0
+                for r, c in line
+            )
+            for line in LINES
+        ]
+        self._outcome = self._check_winner_logic(board)
+        self._history = []
+
     def get_current_agent(self):
         if self.current_player == "X":
             return self.agent_x
@@ -34,6 +90,10 @@ class TicTacToe:
         """
         Attempt to make a move at the given position.
 
+        The move counter and the per-line sums (+1 for "X", -1 for "O") are
+        updated here, so the result is decided from the lines through the
+        played cell only and a draw is simply ``moves == 9``.
+
         Args:
             row (int): Row index (0-2).
             col (int): Column index (0-2).
@@ -43,10 +103,53 @@ class TicTacToe:
         """
         if self.game_over:
             return False
-        if self.board[row][col] == " ":
-            self.board[row][col] = self.current_player
-            return True
-        return False
+        if self._board[row][col] != " ":
+            return False
+        player = self.current_player
+        self._history.append(
+            (row, col, player, self.winner, self.winner_line, self.game_over, self._outcome)
+        )
+        self._board[row][col] = player
+        self.moves += 1
+        delta = 1 if player == "X" else -1
+        line_sums = self._line_sums
+        for index in CELL_LINES[row * 3 + col]:
+            line_sums[index] += delta
+            if line_sums[index] == 3 * delta and self._outcome[0] is None:
+                self._outcome = (player, LINES[index])
+        if self._outcome[0] is None and self.moves == 9:
+            self._outcome = ("draw", None)
+        return True
+
+    def undo(self) -> bool:
+        """
+        Takes back the last move made with make_move.
+
+        The current player, winner, winner line and game over flag are
+        restored to the values they had before that move, so a search can
+        play and take back moves on one shared game object.
+
+        Returns:
+            bool: True if a move was undone, False if there was nothing to undo.
+        """
+        if not self._history:
+            return False
+        (
+            row,
+            col,
+            self.current_player,
+            self.winner,
+            self.winner_line,
+            self.game_over,
+            self._outcome,
+        ) = self._history.pop()
+        self._board[row][col] = " "
+        self.moves -= 1
+        delta = 1 if self.current_player == "X" else -1
+        line_sums = self._line_sums
+        for index in CELL_LINES[row * 3 + col]:
+            line_sums[index] -= delta
+        return True
 
     @staticmethod
     def _check_winner_logic(board):
@@ -89,7 +192,195 @@ class TicTacToe:
         if self.winner: # Already decided
             return self.winner
 
-        winner, winner_line = self._check_winner_logic(self.board)
+        winner, winner_line = self._outcome
+        if winner:
+            self.winner = winner
+            self.winner_line = winner_line
+            self.game_over = True
+        return self.winner
+
+    def _is_board_full(self) -> bool:
+        """
+        Checks if the board is full.
+
+        Returns:
+            bool: True if the board is full, False otherwise.
+        """
+        return self.moves == 9
+
+    def switch_player(self):
+        """Switches the current player."""
+        self.current_player = "O" if self.current_player == "X" else "X"
+
+
+class BitboardTicTacToe:
+    """
+    Tic Tac Toe engine that keeps the position as two 9-bit integers.
+
+    It exposes the same surface as TicTacToe (board, make_move, check_winner,
+    winner_line, switch_player, ...) so it can be used as a drop-in
+    replacement. Moves, undo, win and draw checks are single mask operations.
+    The board property returns a list-of-lists view that is rebuilt only after
+    the position changes, so repeated game.board[r][c] reads cost no
+    allocation. Treat it as read-only: assign a whole board to change the
+    position instead of mutating the returned rows.
+    """
+
+    def __init__(self, agent_x=None, agent_o=None, human_player="X"):
+        """
+        Initializes a new Tic Tac Toe game.
+        Args:
+            agent_x: The agent playing as 'X' (first player).
+            agent_o: The agent playing as 'O' (second player).
+            human_player: The symbol for the human player ('X' or 'O').
+        """
+        self.x_bits = 0
+        self.o_bits = 0
+        self.agent_x = agent_x
+        self.agent_o = agent_o
+        self.human_player = human_player
+        self.agent_player = "O" if human_player == "X" else "X"
+        # "X" always goes first.
+        self.current_player = "X"
+        self.winner = None
+        self.winner_line = None
+        self.game_over = False
+        # (cell bit, current_player, winner, winner_line, game_over) per move
+        self._history = []
+        # The board view and the (x_bits, o_bits) it was built from.
+        self._view = None
+        self._view_bits = None
+
+    @property
+    def board(self):
+        """list[list[str]]: The position as rows of " "/"X"/"O" (read-only)."""
+        bits = (self.x_bits, self.o_bits)
+        if self._view_bits != bits:
+            x_bits, o_bits = bits
+            self._view = [
+                [
+                    "X" if x_bits >> i & 1 else "O" if o_bits >> i & 1 else " "
+                    for i in range(r * 3, r * 3 + 3)
+                ]
+                for r in range(3)
+            ]
+            self._view_bits = bits
+        return self._view
+
+    @board.setter
+    def board(self, board):
+        self.x_bits, self.o_bits = self.board_to_bits(board)
+        self._history = []
+
+    @staticmethod
+    def board_to_bits(board) -> tuple:
+        """
+        Converts a list-of-lists board to (x_bits, o_bits).
+
+        Args:
+            board (list[list[str]]): The game board.
+
+        Returns:
+            tuple[int, int]: The stone masks of X and O.
+        """
+        x_bits = o_bits = 0
+        for r in range(3):
+            for c in range(3):
+                cell = board[r][c]
+                if cell == "X":
+                    x_bits |= 1 << (r * 3 + c)
+                elif cell == "O":
+                    o_bits |= 1 << (r * 3 + c)
+        return x_bits, o_bits
+
+    def get_current_agent(self):
+        if self.current_player == "X":
+            return self.agent_x
+        return self.agent_o
+
+    def make_move(self, row: int, col: int) -> bool:
+        """
+        Attempt to make a move at the given position.
+
+        Args:
+            row (int): Row index (0-2).
+            col (int): Column index (0-2).
+
+        Returns:
+            bool: True if the move was made, False otherwise.
+        """
+        if self.game_over:
+            return False
+        bit = 1 << (row * 3 + col)
+        if (self.x_bits | self.o_bits) & bit:
+            return False
+        self._history.append(
+            (bit, self.current_player, self.winner, self.winner_line, self.game_over)
+        )
+        if self.current_player == "X":
+            self.x_bits |= bit
+        else:
+            self.o_bits |= bit
+        return True
+
+    def undo(self) -> bool:
+        """
+        Takes back the last move made with make_move.
+
+        The current player, winner, winner line and game over flag are
+        restored to the values they had before that move.
+
+        Returns:
+            bool: True if a move was undone, False if there was nothing to undo.
+        """
+        if not self._history:
+            return False
+        bit, player, self.winner, self.winner_line, self.game_over = (
+            self._history.pop()
+        )
+        self.current_player = player
+        self.x_bits &= ~bit
+        self.o_bits &= ~bit
+        return True
+
+    @staticmethod
+    def _outcome(x_bits: int, o_bits: int):
+        x_line = WIN_LINE_BY_BITS[x_bits]
+        o_line = WIN_LINE_BY_BITS[o_bits]
+        if x_line >= 0 and (o_line < 0 or x_line < o_line):
+            return "X", LINES[x_line]
+        if o_line >= 0:
+            return "O", LINES[o_line]
+        if x_bits | o_bits == FULL_MASK:
+            return "draw", None
+        return None, None
+
+    @staticmethod
+    def _check_winner_logic(board):
+        """
+        Check if a player has won or if the game is a draw, without side effects.
+
+        Args:
+            board (list[list[str]]): The game board.
+
+        Returns:
+            tuple(str or None, tuple or None): A tuple containing the winner ('X', 'O', 'draw')
+                                                and the winning line coordinates, or (None, None).
+        """
+        return BitboardTicTacToe._outcome(*BitboardTicTacToe.board_to_bits(board))
+
+    def check_winner(self):
+        """
+        Check if a player has won or if the game is a draw and updates instance state.
+
+        Returns:
+            str: "X" or "O" if a player wins, "draw" if board is full,
+                or None if the game continues.
+        """
+        if self.winner:  # Already decided
+            return self.winner
+
+        winner, winner_line = self._outcome(self.x_bits, self.o_bits)
         if winner:
             self.winner = winner
             self.winner_line = winner_line
@@ -103,8 +394,8 @@ class TicTacToe:
         Returns:
             bool: True if the board is full, False otherwise.
         """
-        return all(cell != " " for row in self.board for cell in row)
+        return self.x_bits | self.o_bits == FULL_MASK
 
     def switch_player(self):
         """Switches the current player."""
-        self.current_player = "O" if self.current_player == "X" else "X"
\ No newline at end of file
+        self.current_player = "O" if self.current_player == "X" else "X"
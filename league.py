@@ -0,0 +1,410 @@
+"""
+league.py: Round-robin league of every discovered agent with cached results.
+
+Every agent found by agent_discovery.get_agent_details plays every other one
+as X and as O. Agents that expose get_move_probabilities are evaluated
+exactly (exact_evaluation.outcome_probabilities); the others play
+num_games sampled games. Matchups run on a process pool.
+
+Results are cached in SQLite under the key of each side: the agent's class
+plus a SHA-256 of its model file, so after retraining one model only its
+matchups are played again. Sampled results are also keyed by the seed. Model files are chosen like the server does
+(server.game_manager.prefer_binary): perfect_moves.bin and q_table.npz unless
+they are older than perfect_moves.json and q_table.json, and tictactoe.db.
+
+Ratings are a Bradley-Terry fit of all matchups (a draw counts half a win for
+each side), on the Elo scale with a mean of 1500. Each pair also gets a prior
+of one drawn game so that agents without wins keep a finite rating.
+
+Usage:
+
+    python league.py --num-games 1000 --output league.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agent_discovery import get_agent_details
+from agents.base_agent import BaseAgent
+from exact_evaluation import outcome_probabilities
+from game_logic import TicTacToe
+from server.game_manager import (
+    DB_PATH,
+    PERFECT_MOVES_BIN,
+    PERFECT_MOVES_FILE,
+    Q_TABLE_NPZ,
+    Q_TABLE_PATH,
+    prefer_binary,
+)
+
+LEAGUE_DB = "league.db"
+
+# The model file of each agent class: a path, or a (binary, source) pair
+# resolved with prefer_binary as the server does. The server may serve a
+# q_policy.bin compiled from the Q-table; it plays like the table itself.
+MODEL_FILES = {
+    "PerfectAgent": (PERFECT_MOVES_BIN, PERFECT_MOVES_FILE),
+    "DatabaseAgent": DB_PATH,
+    "QLearningAgent": (Q_TABLE_NPZ, Q_TABLE_PATH),
+}
+
+# ChatGPT calls a paid API for every move.
+EXCLUDED_AGENTS = ("ChatGPT",)
+
+EXACT = "exact"
+SAMPLED = "sampled"
+
+
+def file_hash(path: str | None) -> str:
+    """Returns the SHA-256 of a file's contents, "-" without a file."""
+    if path is None:
+        return "-"
+    if not os.path.exists(path):
+        return "missing"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def create_agent(agent_class, player: str, model_file: str | None = None):
+    """Creates an agent for play, loading its model file when it has one."""
+    if model_file is None:
+        return agent_class(player)
+    if agent_class.__name__ == "QLearningAgent":
+        return agent_class(player, q_table_file=model_file, is_training=False)
+    if agent_class.__name__ == "DatabaseAgent":
+        return agent_class(player, model_file, lookup="memory")
+    return agent_class(player, model_file)
+
+
+def is_exact(agent_class) -> bool:
+    """Whether an agent class exposes its move probabilities."""
+    return agent_class.get_move_probabilities is not BaseAgent.get_move_probabilities
+
+
+def _play_games(agent_x, agent_o, num_games: int) -> tuple[int, int, int]:
+    x_wins = o_wins = draws = 0
+    for _ in range(num_games):
+        game = TicTacToe(agent_x=agent_x, agent_o=agent_o)
+        winner = None
+        while not game.game_over:
+            move = game.get_current_agent().get_move(game.board)
+            if move is None:
+                break
+            game.make_move(move[0], move[1])
+            winner = game.check_winner()
+            if winner:
+                break
+            game.switch_player()
+        if winner == "X":
+            x_wins += 1
+        elif winner == "O":
+            o_wins += 1
+        else:
+            draws += 1
+    return x_wins, o_wins, draws
+
+
+def play_matchup(x_class, x_file, o_class, o_file, num_games: int, seed: int):
+    """
+    Plays one matchup, exactly when both agents allow it.
+
+    Returns:
+        tuple: The method (EXACT or SAMPLED), the games played (0 for exact)
+            and the x_wins, o_wins and draws (probabilities for exact).
+    """
+    agent_x = create_agent(x_class, "X", x_file)
+    agent_o = create_agent(o_class, "O", o_file)
+    if is_exact(x_class) and is_exact(o_class):
+        outcome = outcome_probabilities(agent_x, agent_o)
+        return EXACT, 0, outcome["x_wins"], outcome["o_wins"], outcome["draws"]
+    random.seed(seed)
+    return (SAMPLED, num_games) + _play_games(agent_x, agent_o, num_games)
+
+
+class LeagueCache:
+    """
+    SQLite cache of matchup results keyed by the agent keys of both sides.
+
+    The seed of exact matchups is None (NULL), as their result does not
+    depend on it; rows are therefore matched with IS rather than =.
+    """
+
+    def __init__(self, path: str = LEAGUE_DB):
+        self.conn = sqlite3.connect(path)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(matchups)")]
+        if columns and "seed" not in columns:
+            # A cache written before sampled results were keyed by the seed.
+            self.conn.execute("DROP TABLE matchups")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS matchups (
+                x_key TEXT,
+                o_key TEXT,
+                method TEXT,
+                games INTEGER,
+                seed INTEGER,
+                x_wins REAL,
+                o_wins REAL,
+                draws REAL,
+                PRIMARY KEY (x_key, o_key, method, games, seed)
+            )
+            """)
+
+    def get(self, x_key: str, o_key: str, method: str, games: int, seed=None):
+        """Returns the cached (x_wins, o_wins, draws), or None."""
+        return self.conn.execute(
+            "SELECT x_wins, o_wins, draws FROM matchups WHERE x_key = ? "
+            "AND o_key = ? AND method = ? AND games = ? AND seed IS ?",
+            (x_key, o_key, method, games, seed),
+        ).fetchone()
+
+    def put(self, x_key, o_key, method, games, seed, x_wins, o_wins, draws):
+        """Stores the result of a matchup, replacing an earlier one."""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM matchups WHERE x_key = ? AND o_key = ? "
+                "AND method = ? AND games = ? AND seed IS ?",
+                (x_key, o_key, method, games, seed),
+            )
+            self.conn.execute(
+                "INSERT INTO matchups VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (x_key, o_key, method, games, seed, x_wins, o_wins, draws),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def bradley_terry(matchups, names, prior: float = 1.0, iterations: int = 10000):
+    """
+    Fits Bradley-Terry strengths to matchup results, on the Elo scale.
+
+    Args:
+        matchups: Dicts with "x", "o", "x_wins", "o_wins", "draws" and
+            "weight" (the number of games the result stands for).
+        names (list[str]): The agents.
+        prior (float): Drawn games added between every pair.
+        iterations (int): Maximum iterations of the MM algorithm.
+
+    Returns:
+        dict: {name: rating}, with a mean rating of 1500.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    # games[i, j]: games between i and j (symmetric); scores[i, j]: i's score.
+    games = np.full((n, n), float(prior)) * (1 - np.eye(n))
+    scores = games / 2
+    for m in matchups:
+        x, o = index[m["x"]], index[m["o"]]
+        total = m["x_wins"] + m["o_wins"] + m["draws"]
+        if total == 0:
+            continue
+        weight = m["weight"] / total
+        games[x, o] += m["weight"]
+        games[o, x] += m["weight"]
+        scores[x, o] += (m["x_wins"] + m["draws"] / 2) * weight
+        scores[o, x] += (m["o_wins"] + m["draws"] / 2) * weight
+    wins = scores.sum(axis=1)
+    strength = np.ones(n)
+    for _ in range(iterations):
+        denominator = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        updated = wins / denominator
+        updated /= np.exp(np.log(updated).mean())
+        if np.allclose(updated, strength, rtol=1e-12, atol=0):
+            strength = updated
+            break
+        strength = updated
+    return {name: 1500 + 400 * math.log10(strength[index[name]]) for name in names}
+
+
+class League:
+    """
+    Round-robin league of agent classes.
+
+    Attributes:
+        agents (dict): {name: agent class} of the participants.
+        model_files (dict): {class name: model file} of agents with a model;
+            a (binary, source) pair is resolved with prefer_binary.
+        num_games (int): Games of a sampled matchup.
+    """
+
+    def __init__(
+        self,
+        agents: dict | None = None,
+        model_files: dict | None = None,
+        cache_path: str = LEAGUE_DB,
+        num_games: int = 1000,
+    ):
+        if agents is None:
+            _, agents = get_agent_details()
+            agents = {
+                name: agent_class
+                for name, agent_class in agents.items()
+                if name not in EXCLUDED_AGENTS
+            }
+        self.agents = dict(agents)
+        self.model_files = dict(MODEL_FILES if model_files is None else model_files)
+        self.cache_path = cache_path
+        self.num_games = num_games
+
+    def model_file(self, name: str) -> str | None:
+        """Returns the model file of an agent, or None."""
+        model_file = self.model_files.get(self.agents[name].__name__)
+        if isinstance(model_file, tuple):
+            return prefer_binary(*model_file)
+        return model_file
+
+    def agent_key(self, name: str) -> str:
+        """Returns the cache key of an agent: its class and model file hash."""
+        agent_class = self.agents[name]
+        return (
+            f"{agent_class.__module__}.{agent_class.__qualname__}:"
+            f"{file_hash(self.model_file(name))}"
+        )
+
+    def run(self, workers: int | None = None, seed: int = 0) -> dict:
+        """
+        Plays every matchup missing from the cache and rates all agents.
+
+        Args:
+            workers (int | None): Worker processes (os.cpu_count() when None);
+                1 plays in this process.
+            seed (int): Seed of the sampled matchups.
+
+        Returns:
+            dict: JSON-serializable results: the agents with their keys, the
+                matchups, the ratings, and the number of played and cached
+                matchups.
+        """
+        names = list(self.agents)
+        keys = {name: self.agent_key(name) for name in names}
+        cache = LeagueCache(self.cache_path)
+        try:
+            matchups, jobs = [], []
+            for x in names:
+                for o in names:
+                    if x == o:
+                        continue
+                    exact = is_exact(self.agents[x]) and is_exact(self.agents[o])
+                    method, games = (EXACT, 0) if exact else (SAMPLED, self.num_games)
+                    matchup = {"x": x, "o": o, "method": method, "games": games}
+                    cached = cache.get(
+                        keys[x], keys[o], method, games, None if exact else seed
+                    )
+                    if cached is None:
+                        jobs.append((matchup, self._job(x, o, keys, seed)))
+                    else:
+                        matchup.update(zip(("x_wins", "o_wins", "draws"), cached))
+                    matchups.append(matchup)
+
+            for matchup, result in zip(
+                (job[0] for job in jobs), self._play([job[1] for job in jobs], workers)
+            ):
+                _, _, x_wins, o_wins, draws = result
+                matchup.update(x_wins=x_wins, o_wins=o_wins, draws=draws)
+                cache.put(
+                    keys[matchup["x"]],
+                    keys[matchup["o"]],
+                    matchup["method"],
+                    matchup["games"],
+                    None if matchup["method"] == EXACT else seed,
+                    x_wins,
+                    o_wins,
+                    draws,
+                )
+        finally:
+            cache.close()
+
+        weighted = [dict(m, weight=self.num_games) for m in matchups]
+        return {
+            "agents": keys,
+            "matchups": matchups,
+            "ratings": bradley_terry(weighted, names),
+            "played": len(jobs),
+            "cached": len(matchups) - len(jobs),
+        }
+
+    def _job(self, x: str, o: str, keys: dict, seed: int) -> tuple:
+        digest = hashlib.sha256(f"{seed}:{keys[x]}:{keys[o]}".encode()).digest()
+        return (
+            self.agents[x],
+            self.model_file(x),
+            self.agents[o],
+            self.model_file(o),
+            self.num_games,
+            int.from_bytes(digest[:8], "little"),
+        )
+
+    @staticmethod
+    def _play(jobs: list, workers: int | None) -> list:
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            return [play_matchup(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            return list(executor.map(play_matchup, *zip(*jobs)))
+
+
+def print_standings(results: dict):
+    """Prints the agents by rating with their overall results."""
+    totals = {name: [0.0, 0.0, 0.0] for name in results["ratings"]}
+    for m in results["matchups"]:
+        total = m["x_wins"] + m["o_wins"] + m["draws"]
+        if total == 0:
+            continue
+        for name, wins, losses in (
+            (m["x"], m["x_wins"], m["o_wins"]),
+            (m["o"], m["o_wins"], m["x_wins"]),
+        ):
+            totals[name][0] += wins / total
+            totals[name][1] += m["draws"] / total
+            totals[name][2] += losses / total
+    print("=== リーグ順位 ===")
+    ranking = sorted(results["ratings"].items(), key=lambda item: -item[1])
+    for rank, (name, rating) in enumerate(ranking, 1):
+        count = max(2 * (len(ranking) - 1), 1)
+        wins, draws, losses = (value / count for value in totals[name])
+        print(
+            f"{rank:2d}. {name:<10} {rating:7.1f}  "
+            f"勝ち {wins:.1%} / 引き分け {draws:.1%} / 負け {losses:.1%}"
+        )
+    print(
+        f"\n対戦: {results['played']} 組を実行、{results['cached']} 組はキャッシュを使用"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin league of all discovered agents."
+    )
+    parser.add_argument(
+        "--num-games",
+        type=int,
+        default=1000,
+        help="Games of matchups that cannot be computed exactly.",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", default=LEAGUE_DB, help="SQLite result cache.")
+    parser.add_argument("--output", default=None, help="Write the results as JSON.")
+    args = parser.parse_args()
+
+    league = League(cache_path=args.cache, num_games=args.num_games)
+    results = league.run(args.workers, args.seed)
+    print_standings(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
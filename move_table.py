@@ -0,0 +1,106 @@
+"""
+move_table.py: Compact per-board move tables indexed by base-3 board code.
+
+A move table is a flat array of 3**9 = 19,683 bytes. The byte at a board's
+base-3 code (see state_graph.string_to_code) is the best move (0-8), or one
+of the sentinels TERMINAL (the game is over) and MISSING (unreachable or
+not in the source table). Tables are loaded once per process and shared
+read-only; binary files are memory-mapped, so forked workers share pages.
+"""
+
+import mmap
+import os
+import sqlite3
+
+from state_graph import NUM_CODES, string_to_code
+
+TERMINAL = 0xFF
+MISSING = 0xFE
+
+_shared_tables = {}
+
+
+def build_move_table(entries) -> bytes:
+    """
+    Builds a move table.
+
+    Args:
+        entries: Iterable of (board_str, best_move) pairs, where best_move is
+            -1 for finished games (as in perfect_moves.json).
+
+    Returns:
+        bytes: The 19,683-byte table.
+    """
+    table = bytearray([MISSING]) * NUM_CODES
+    for board_str, best_move in entries:
+        table[string_to_code(board_str)] = TERMINAL if best_move < 0 else best_move
+    return bytes(table)
+
+
+def write_move_table(path: str, entries):
+    """Builds a move table from (board_str, best_move) pairs and writes it to path."""
+    table = build_move_table(entries)
+    # Per-process temporary name: several workers may write the table at once.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(table)
+    os.replace(tmp_path, path)
+
+
+def read_database_entries(database_file: str) -> list:
+    """Reads (board, best_move) pairs from the tictactoe table of a SQLite database."""
+    conn = sqlite3.connect(database_file)
+    try:
+        return conn.execute("SELECT board, best_move FROM tictactoe").fetchall()
+    finally:
+        conn.close()
+
+
+def _file_key(kind: str, path: str) -> tuple:
+    stat = os.stat(path)
+    return kind, os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def _store(key: tuple, table):
+    # Drop tables loaded from an older version of the same file.
+    for stale in [k for k in _shared_tables if k[:2] == key[:2]]:
+        del _shared_tables[stale]
+    _shared_tables[key] = table
+
+
+def load_database_table(database_file: str) -> bytes:
+    """
+    Returns the move table of a SQLite database, loaded once per process.
+
+    The table is read with a single SELECT and shared by every caller until
+    the database file changes.
+
+    Raises:
+        FileNotFoundError: If the database file does not exist.
+    """
+    key = _file_key("db", database_file)
+    table = _shared_tables.get(key)
+    if table is None:
+        table = build_move_table(read_database_entries(database_file))
+        _store(key, table)
+    return table
+
+
+def open_move_table(path: str) -> mmap.mmap:
+    """
+    Memory-maps a binary move table read-only, once per process.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a 19,683-byte move table.
+    """
+    key = _file_key("bin", path)
+    table = _shared_tables.get(key)
+    if table is None:
+        with open(path, "rb") as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(table) != NUM_CODES:
+            table.close()
+            raise ValueError(f"Not a move table ({NUM_CODES} bytes expected): {path}")
+        _store(key, table)
+    return table
@@ -0,0 +1,165 @@
+"""
+opponent_pool.py: Training opponents as precomputed policy tables.
+
+A policy table is a uint16 array of 3**9 entries indexed by base-3 board code
+(see state_graph.string_to_code). Bit i of an entry is set when the opponent
+may play cell i on that board; it picks uniformly among the set bits, and an
+entry of 0 (finished or unreachable board) ends the episode. Deterministic
+agents have exactly one bit per board.
+
+The tables reproduce the repo's agents without running them during training:
+
+    random   RandomAgent: every legal move.
+    minimax  MinimaxAgent: the move solver.solve() ranks first.
+    perfect  PerfectAgent: the move stored in perfect_moves.bin / .json.
+    self     A frozen greedy snapshot of the learner (self-play), with every
+             tied best move; boards it has never seen fall back to random.
+
+OpponentPool builds each table once; stack() hands them to
+FastQLearningAgent.train_native as one (K, 3**9) array, so changing the
+opponent between episodes only changes a row index.
+"""
+
+import os
+
+import numpy as np
+
+from agents.perfect_agent import PerfectAgent
+from move_table import build_move_table, open_move_table
+from solver import solve
+from state_graph import CELL_BITS, NUM_CODES, load_state_graph
+
+PERFECT_MOVES_BIN = "perfect_moves.bin"
+SELF_PLAY = "self"
+
+
+def load_perfect_moves(path: str = PERFECT_MOVES_BIN) -> np.ndarray:
+    """
+    Returns PerfectAgent's moves as a move table indexed by board code.
+
+    The binary table is memory-mapped when it exists; otherwise it is built
+    from perfect_moves.json.
+    """
+    if os.path.exists(path):
+        table = open_move_table(path)
+    else:
+        table = build_move_table(PerfectAgent(player="O").perfect_moves.items())
+    return np.frombuffer(table, dtype=np.uint8)
+
+
+def policy_from_moves(moves) -> np.ndarray:
+    """Converts a move table (one move or a sentinel per board) to a policy table."""
+    moves = np.asarray(moves, dtype=np.uint8)[:NUM_CODES]
+    single = np.left_shift(1, np.minimum(moves, 8).astype(np.uint16))
+    return np.where(moves < 9, single, 0).astype(np.uint16)
+
+
+def random_policy() -> np.ndarray:
+    """Returns the policy table of RandomAgent: all legal moves of every board."""
+    graph = load_state_graph()
+    policy = np.zeros(NUM_CODES, dtype=np.uint16)
+    policy[graph.codes] = graph.legal
+    return policy
+
+
+def minimax_policy() -> np.ndarray:
+    """Returns the policy table of MinimaxAgent (solver best moves)."""
+    graph = load_state_graph()
+    best_move = solve(graph).best_move
+    policy = np.zeros(NUM_CODES, dtype=np.uint16)
+    playable = best_move >= 0
+    policy[graph.codes[playable]] = CELL_BITS[best_move[playable]]
+    return policy
+
+
+def perfect_policy(path: str = PERFECT_MOVES_BIN) -> np.ndarray:
+    """Returns the policy table of PerfectAgent."""
+    return policy_from_moves(load_perfect_moves(path))
+
+
+def snapshot_policy(values, visited) -> np.ndarray:
+    """
+    Freezes a dense Q-table into a greedy policy table.
+
+    Args:
+        values (np.ndarray): ``(3**9, 9)`` Q-values (C_QTable.values).
+        visited (np.ndarray): ``(3**9,)`` flags of the states the table has seen.
+
+    Returns:
+        np.ndarray: Every highest-valued legal move of the visited boards, and
+            every legal move of the others.
+    """
+    legal = random_policy()
+    values = np.asarray(values)
+    greedy = ((values == values.max(axis=1, keepdims=True)) * CELL_BITS).sum(axis=1)
+    greedy = greedy.astype(np.uint16) & legal
+    return np.where((np.asarray(visited) != 0) & (greedy != 0), greedy, legal)
+
+
+_BUILDERS = {
+    "random": random_policy,
+    "minimax": minimax_policy,
+    "perfect": perfect_policy,
+    # The learner has no snapshot until the first call to snapshot().
+    SELF_PLAY: random_policy,
+}
+
+
+class OpponentPool:
+    """
+    Named opponent policy tables, built once and stacked for the training loops.
+
+    Attributes:
+        names (list[str]): The opponents in stacking order.
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self._policies = {}
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name):
+        return name in self._policies
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name: str, policy=None):
+        """
+        Adds (or replaces) an opponent.
+
+        Args:
+            name (str): The opponent's name.
+            policy: Its policy table; built-in opponents ("random", "minimax",
+                "perfect", "self") are built when omitted.
+
+        Raises:
+            ValueError: If the name is unknown and no policy is given.
+        """
+        if policy is None:
+            if name not in _BUILDERS:
+                raise ValueError(f"Unknown opponent: {name}")
+            policy = _BUILDERS[name]()
+        policy = np.ascontiguousarray(policy, dtype=np.uint16)
+        if policy.shape != (NUM_CODES,):
+            raise ValueError(f"Policy table of {name} needs 3**9 entries")
+        if name not in self._policies:
+            self.names.append(name)
+        self._policies[name] = policy
+
+    def policy(self, name: str) -> np.ndarray:
+        """Returns the policy table of an opponent."""
+        return self._policies[name]
+
+    def index(self, name: str) -> int:
+        """Returns the row of an opponent in stack()."""
+        return self.names.index(name)
+
+    def snapshot(self, q_table, name: str = SELF_PLAY):
+        """Replaces the self-play opponent by a frozen copy of q_table's greedy policy."""
+        self.add(name, snapshot_policy(q_table.values, q_table.visited))
+
+    def stack(self) -> np.ndarray:
+        """Returns the policies as one ``(K, 3**9)`` array in the order of names."""
+        return np.stack([self._policies[name] for name in self.names])
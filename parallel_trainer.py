@@ -0,0 +1,171 @@
+"""
+parallel_trainer.py: Multi-process Q-learning with periodic shard merging.
+
+Training is split into sync rounds. In each round, every worker process
+starts from the same merged Q-table and plays its own slice of the run's
+episodes with the native loop (FastQLearningAgent.train_native) and its own
+seed. The resulting shards are then merged. Each (state, action) entry
+becomes the average of the workers' values, weighted by how often each
+worker updated it in that round. Entries no worker updated keep their common
+value. Episode numbering is global, so side alternation and the exploration
+schedule are the same as in a single-process run.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import fast_trainer
+from state_graph import NUM_CODES
+
+
+def train_shard(
+    params: tuple,
+    states,
+    values,
+    opponent_moves,
+    first_episode: int,
+    num_episodes: int,
+    total_episodes: int,
+    seed: int,
+    symmetric_updates: bool = False,
+):
+    """
+    Plays one worker's slice of episodes, starting from the given table.
+
+    Args:
+        params (tuple): (learning_rate, discount_factor, exploration_rate,
+            min_exploration_rate, optimistic_initial_value).
+        states: Base-3 codes of the starting table.
+        values: ``(N, 9)`` Q-values of the starting table.
+        opponent_moves (np.ndarray): The opponent's move table.
+        first_episode (int): Global number of the slice's first episode.
+        num_episodes (int): The number of episodes in the slice.
+        total_episodes (int): The number of episodes of the whole run.
+        seed (int): Seed of the native loop.
+        symmetric_updates (bool): Also update the symmetric images of every
+            (state, action) pair.
+
+    Returns:
+        tuple: States, values and update counts of the shard, and the number
+            of Q-value updates.
+    """
+    agent = fast_trainer.FastQLearningAgent("X", *params, True, symmetric_updates)
+    agent.q_table.set_rows(states, values)
+    if first_episode > 0:
+        agent.decay_exploration_rate(
+            min(first_episode - 1, _last_decay_episode(total_episodes)),
+            total_episodes,
+        )
+    updates = agent.train_native(
+        opponent_moves, num_episodes, seed, first_episode, total_episodes
+    )
+    codes, rows = agent.q_table.get_rows()
+    return codes, rows, agent.q_table.counts[codes], updates
+
+
+def merge_shards(shards) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merges worker shards by update-count-weighted averaging.
+
+    Args:
+        shards: (states, values, counts) tuples as returned by train_shard.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: States and values of the merged table.
+    """
+    weighted = np.zeros((NUM_CODES, 9))
+    weights = np.zeros((NUM_CODES, 9))
+    unchanged = np.zeros((NUM_CODES, 9))
+    visited = np.zeros(NUM_CODES, dtype=bool)
+    for states, values, counts in shards:
+        visited[states] = True
+        weighted[states] += values * counts
+        weights[states] += counts
+        unchanged[states] = values
+    merged = np.where(weights > 0, weighted / np.maximum(weights, 1), unchanged)
+    states = np.flatnonzero(visited).astype(np.int32)
+    return states, merged[states]
+
+
+def _last_decay_episode(total_episodes: int) -> int:
+    # decay_exploration_rate stops changing the rate after this episode.
+    return int(np.ceil(total_episodes * 0.75)) - 1
+
+
+def train_parallel(
+    agent,
+    opponent_moves,
+    num_episodes: int,
+    workers: int,
+    sync_every: int = 10000,
+    seed: int = 0,
+    on_sync=None,
+) -> int:
+    """
+    Trains a FastQLearningAgent with several worker processes.
+
+    Args:
+        agent: The fast_trainer.FastQLearningAgent whose q_table is trained.
+        opponent_moves (np.ndarray): The opponent's move table.
+        num_episodes (int): The number of episodes of the whole run.
+        workers (int): The number of worker processes.
+        sync_every (int): Episodes each worker plays between merges.
+        seed (int): Base seed; every (round, worker) gets its own seed.
+        on_sync: Called as on_sync(episodes_done, updates) after each merge,
+            once the merged table has been loaded into agent (e.g. to save a
+            checkpoint). Training stops early when it returns True.
+
+    Returns:
+        int: The number of Q-value updates.
+    """
+    params = (
+        agent.learning_rate,
+        agent.discount_factor,
+        agent.initial_exploration_rate,
+        agent.min_exploration_rate,
+        agent.optimistic_initial_value,
+    )
+    opponent_moves = np.ascontiguousarray(opponent_moves)
+    states, values = agent.q_table.get_rows()
+    done = updates = round_index = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while done < num_episodes:
+            round_episodes = min(sync_every * workers, num_episodes - done)
+            sizes = [
+                round_episodes // workers + (1 if w < round_episodes % workers else 0)
+                for w in range(workers)
+            ]
+            futures = []
+            first_episode = done
+            for worker, size in enumerate(sizes):
+                if size == 0:
+                    continue
+                futures.append(
+                    pool.submit(
+                        train_shard,
+                        params,
+                        states,
+                        values,
+                        opponent_moves,
+                        first_episode,
+                        size,
+                        num_episodes,
+                        fast_trainer.derive_seed(seed, round_index, worker),
+                        agent.symmetric_updates,
+                    )
+                )
+                first_episode += size
+            results = [future.result() for future in futures]
+            states, values = merge_shards([result[:3] for result in results])
+            updates += sum(result[3] for result in results)
+            done += round_episodes
+            round_index += 1
+            agent.q_table.set_rows(states, values)
+            if on_sync is not None and on_sync(done, updates):
+                break
+    if done > 0:
+        agent.decay_exploration_rate(
+            min(done - 1, _last_decay_episode(num_episodes)), num_episodes
+        )
+    return updates
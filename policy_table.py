@@ -0,0 +1,155 @@
+"""
+policy_table.py: Frozen greedy policies of trained Q-tables for serving.
+
+A policy file holds the opponent_pool policy table of a Q-table's greedy
+policy: 3**9 little-endian uint16 entries (39,366 bytes) indexed by base-3
+board code (see state_graph.string_to_code), one per board like
+perfect_moves.bin. Bit i of an entry is set for every legal move whose
+Q-value ties for the highest, so a served agent still breaks ties at random;
+boards the table has never seen allow every legal move.
+
+Tables trained with use_symmetry only store canonical boards. Their policies
+are expanded to every orientation on export, so serving never canonicalizes.
+
+The module can be run as a script to compile a Q-table:
+
+    python policy_table.py q_table.npz q_policy.bin
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from opponent_pool import snapshot_policy
+from q_table_io import load_q_table_file
+from state_graph import NUM_CODES, code_to_string, load_state_graph, string_to_code
+from symmetry import canonicalize, from_canonical_move
+
+Q_POLICY_BIN = "q_policy.bin"
+
+_DTYPE = np.dtype("<u2")
+
+
+def _expand_symmetric(policy) -> np.ndarray:
+    # Maps the policy of each canonical board onto its other orientations.
+    expanded = np.array(policy, dtype=np.uint16)
+    for code in load_state_graph().codes:
+        canonical, transform = canonicalize(code_to_string(int(code)))
+        moves = int(policy[string_to_code(canonical)])
+        expanded[code] = sum(
+            1 << from_canonical_move(i, transform) for i in range(9) if moves >> i & 1
+        )
+    return expanded
+
+
+def compile_policy(states, values, use_symmetry: bool = False) -> np.ndarray:
+    """
+    Compiles the rows of a Q-table into its greedy policy table.
+
+    Args:
+        states: Length-N base-3 board codes.
+        values: ``(N, 9)`` Q-values, row i belonging to states[i].
+        use_symmetry (bool): Whether the table only stores canonical boards.
+
+    Returns:
+        np.ndarray: uint16 ``(3**9,)`` tied best moves of each board.
+    """
+    states = np.asarray(states, dtype=np.int64)
+    dense = np.zeros((NUM_CODES, 9))
+    dense[states] = np.asarray(values).reshape(len(states), 9)
+    visited = np.zeros(NUM_CODES, dtype=np.uint8)
+    visited[states] = 1
+    policy = snapshot_policy(dense, visited)
+    return _expand_symmetric(policy) if use_symmetry else policy
+
+
+def write_policy_table(path: str, policy):
+    """Writes a policy table to a binary policy file."""
+    policy = np.asarray(policy, dtype=_DTYPE)
+    if policy.shape != (NUM_CODES,):
+        raise ValueError(f"A policy table needs {NUM_CODES} entries")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(policy.tobytes())
+    os.replace(tmp_path, path)
+
+
+def open_policy_table(path: str) -> np.ndarray:
+    """
+    Memory-maps a binary policy file read-only.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a 39,366-byte policy table.
+    """
+    if os.path.getsize(path) != NUM_CODES * _DTYPE.itemsize:
+        raise ValueError(
+            f"Not a policy table ({NUM_CODES * _DTYPE.itemsize} bytes expected): {path}"
+        )
+    return np.memmap(path, dtype=_DTYPE, mode="r", shape=(NUM_CODES,))
+
+
+def load_policy(path: str, use_symmetry=None) -> np.ndarray:
+    """
+    Returns the greedy policy table of a Q-table or policy file.
+
+    Args:
+        path (str): A q_table.json / .npz Q-table, or a policy file (.bin).
+        use_symmetry (bool | None): Whether the Q-table only stores canonical
+            boards. None reads it from the metadata of .npz tables (JSON
+            tables have none and default to False).
+
+    Returns:
+        np.ndarray: uint16 ``(3**9,)`` policy table.
+    """
+    if path.endswith(".bin"):
+        return open_policy_table(path)
+    states, values, metadata = load_q_table_file(path)
+    if use_symmetry is None:
+        use_symmetry = bool(metadata.get("use_symmetry", False))
+    return compile_policy(states, values, use_symmetry)
+
+
+def export_policy(
+    q_table_file: str, policy_file: str = Q_POLICY_BIN, use_symmetry=None
+) -> int:
+    """
+    Compiles a q_table.json or .npz file into a binary policy file.
+
+    Args:
+        q_table_file (str): The Q-table written by QLearningAgent.save_q_table.
+        policy_file (str): The policy file to write.
+        use_symmetry (bool | None): Whether the table only stores canonical
+            boards. None reads it from the metadata of .npz tables (JSON
+            tables have none and default to False).
+
+    Returns:
+        int: The number of Q-table states compiled.
+    """
+    states, values, metadata = load_q_table_file(q_table_file)
+    if use_symmetry is None:
+        use_symmetry = bool(metadata.get("use_symmetry", False))
+    write_policy_table(policy_file, compile_policy(states, values, use_symmetry))
+    return len(states)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a Q-table into a greedy policy file for serving."
+    )
+    parser.add_argument("q_table_file", nargs="?", default="q_table.json")
+    parser.add_argument("policy_file", nargs="?", default=Q_POLICY_BIN)
+    parser.add_argument(
+        "--use-symmetry",
+        action="store_true",
+        default=None,
+        help="The table stores canonical boards only (read from .npz metadata by default).",
+    )
+    args = parser.parse_args()
+    count = export_policy(args.q_table_file, args.policy_file, args.use_symmetry)
+    print(f"✅ {args.policy_file} を生成しました。（{count} 状態）")
+
+
+if __name__ == "__main__":
+    main()
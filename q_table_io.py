@@ -0,0 +1,301 @@
+"""
+q_table_io.py: Binary (.npz) persistence for Q-tables.
+
+A Q-table file is an uncompressed .npz archive with three members:
+
+    states    int32 ``(N,)`` base-3 code of each stored board
+              (see state_graph.string_to_code), in ascending order.
+    values    float64 ``(N, 9)`` Q-values of each board, one contiguous matrix.
+    metadata  A JSON string: format version, hyperparameters, episodes
+              trained and seed.
+
+Tables can also be stored quantized (dtype "float16" or "int8"). values then
+holds the quantized Q-values of the legal moves, illegal moves are stored as
+0, and a fourth member holds the legal moves instead of ILLEGAL_Q sentinels:
+
+    legal     uint16 ``(N,)`` bit i set when cell i is a legal move.
+
+int8 values are scaled linearly between the lowest and highest legal Q-value
+of the table; the "quantization" entry of the metadata holds the dtype, scale
+and offset. load_q_table_npz() restores float64 values with the sentinels, or
+returns QuantizedRows, which keeps the quantized values and masks and restores
+one row at a time for read-only lookups.
+
+Because the archive is stored uncompressed, its members can be memory-mapped
+in place, so read-only agents load a table without parsing anything. The
+module can also be run as a script to convert an existing q_table.json.
+"""
+
+import argparse
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from rewards import ILLEGAL_Q
+from state_graph import CELL_BITS, code_to_string, string_to_code
+
+Q_TABLE_FORMAT_VERSION = 1
+QUANTIZED_DTYPES = ("float16", "int8")
+
+# Size of the fixed part of a zip local file header.
+_LOCAL_HEADER_SIZE = 30
+
+
+def quantize_values(values, dtype: str):
+    """
+    Quantizes Q-values, moving the ILLEGAL_Q sentinels into a legal-move mask.
+
+    Args:
+        values: ``(N, 9)`` Q-values with ILLEGAL_Q for occupied cells.
+        dtype (str): "float16" or "int8".
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, dict]: The quantized values, the uint16
+            legal masks and the parameters for dequantize_values().
+
+    Raises:
+        ValueError: If dtype is not one of QUANTIZED_DTYPES.
+    """
+    if dtype not in QUANTIZED_DTYPES:
+        raise ValueError(f"Unsupported Q-value dtype: {dtype}")
+    values = np.asarray(values, dtype=np.float64).reshape(-1, 9)
+    is_legal = values > ILLEGAL_Q / 2
+    legal = (is_legal * CELL_BITS).sum(axis=1).astype(np.uint16)
+    if dtype == "float16":
+        quantized = np.where(is_legal, values, 0.0).astype(np.float16)
+        return quantized, legal, {"dtype": dtype}
+    low = float(values[is_legal].min()) if is_legal.any() else 0.0
+    high = float(values[is_legal].max()) if is_legal.any() else 0.0
+    scale = (high - low) / 254 or 1.0
+    levels = np.rint((values - low) / np.where(is_legal, scale, 1.0)) - 127
+    quantized = np.where(is_legal, levels, 0).astype(np.int8)
+    return quantized, legal, {"dtype": dtype, "scale": scale, "offset": low}
+
+
+def dequantize_values(quantized, legal, quantization: dict) -> np.ndarray:
+    """Restores float64 Q-values with ILLEGAL_Q sentinels from quantize_values()."""
+    values = np.asarray(quantized, dtype=np.float64).reshape(-1, 9)
+    if quantization["dtype"] == "int8":
+        values = (values + 127) * quantization["scale"] + quantization["offset"]
+    is_legal = (np.asarray(legal, dtype=np.int64)[:, None] & CELL_BITS) != 0
+    return np.where(is_legal, values, ILLEGAL_Q)
+
+
+class QuantizedRows:
+    """
+    Read-only ``(N, 9)`` Q-values kept quantized, as stored in the file.
+
+    Indexing with a row number returns that row as float64 with ILLEGAL_Q
+    sentinels. Converting the whole object with np.asarray() dequantizes
+    every row.
+    """
+
+    def __init__(self, quantized, legal, quantization: dict):
+        self.quantized = quantized
+        self.legal = legal
+        self.quantization = quantization
+
+    @property
+    def shape(self) -> tuple:
+        return self.quantized.shape
+
+    def __len__(self) -> int:
+        return len(self.quantized)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return dequantize_values(
+            self.quantized[i : i + 1], self.legal[i : i + 1], self.quantization
+        )[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = dequantize_values(self.quantized, self.legal, self.quantization)
+        return values if dtype is None else values.astype(dtype)
+
+
+def save_q_table_npz(
+    path: str, states, values, metadata: dict | None = None, dtype: str = "float64"
+):
+    """
+    Writes a Q-table to an uncompressed .npz file.
+
+    Args:
+        path (str): The output file.
+        states: Length-N base-3 board codes.
+        values: ``(N, 9)`` Q-values, row i belonging to states[i].
+        metadata (dict | None): JSON-serializable information stored with the
+            table (hyperparameters, episodes trained, seed, ...).
+        dtype (str): "float64", or one of QUANTIZED_DTYPES to store the
+            values quantized with a legal-move mask.
+    """
+    states = np.asarray(states, dtype=np.int32)
+    values = np.asarray(values, dtype=np.float64).reshape(len(states), 9)
+    order = np.argsort(states, kind="stable")
+    header = dict(metadata or {}, version=Q_TABLE_FORMAT_VERSION)
+    header.pop("quantization", None)
+    members = {"states": states[order]}
+    if dtype == "float64":
+        members["values"] = np.ascontiguousarray(values[order])
+    else:
+        quantized, legal, header["quantization"] = quantize_values(values[order], dtype)
+        members["values"], members["legal"] = quantized, legal
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, metadata=np.array(json.dumps(header)), **members)
+    os.replace(tmp_path, path)
+
+
+def _memmap_member(path: str, info: zipfile.ZipInfo) -> np.ndarray:
+    # The .npy payload of a stored member starts after its local file header.
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local_header = f.read(_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+        f.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if not shape or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        shape=shape,
+        order="F" if fortran_order else "C",
+        offset=offset,
+    )
+
+
+def load_q_table_npz(path: str, mmap: bool = False, dequantize: bool = True):
+    """
+    Reads a Q-table written by save_q_table_npz().
+
+    Args:
+        path (str): The .npz file.
+        mmap (bool): Memory-map the members read-only instead of reading
+            them into memory. Compressed archives are always read normally.
+        dequantize (bool): Restore quantized values as a float64 matrix.
+            When False, quantized values are returned as QuantizedRows.
+
+    Returns:
+        tuple[np.ndarray | QuantizedRows, np.ndarray, dict]: States, values
+            and metadata.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a Q-table of a supported version.
+    """
+    with np.load(path) as data:
+        members = set(data.files)
+        if members - {"legal"} != {"states", "values", "metadata"}:
+            raise ValueError(f"Not a Q-table file: {path}")
+        metadata = json.loads(str(data["metadata"]))
+        if metadata.get("version") != Q_TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported Q-table format: {path}")
+        names = ["states", "values"]
+        quantization = None
+        if "legal" in members:
+            quantization = metadata.get("quantization") or {}
+            if quantization.get("dtype") not in QUANTIZED_DTYPES:
+                raise ValueError(f"Unsupported Q-table quantization: {path}")
+            names.append("legal")
+        arrays = None
+        if not mmap:
+            arrays = [data[name] for name in names]
+    if arrays is None:
+        with zipfile.ZipFile(path) as archive:
+            infos = [archive.getinfo(name + ".npy") for name in names]
+        if any(info.compress_type != zipfile.ZIP_STORED for info in infos):
+            return load_q_table_npz(path, mmap=False, dequantize=dequantize)
+        arrays = [_memmap_member(path, info) for info in infos]
+    states, values = arrays[:2]
+    if values.shape != (len(states), 9):
+        raise ValueError(f"Q-value matrix has shape {values.shape}: {path}")
+    if quantization is not None:
+        if dequantize:
+            values = dequantize_values(values, arrays[2], quantization)
+        else:
+            values = QuantizedRows(values, arrays[2], quantization)
+    return states, values, metadata
+
+
+def q_table_to_arrays(q_table: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Converts a {board string: 9 Q-values} dict into states and values arrays."""
+    states = np.array([string_to_code(state) for state in q_table], dtype=np.int32)
+    values = np.array(list(q_table.values()), dtype=np.float64).reshape(-1, 9)
+    return states, values
+
+
+def arrays_to_q_table(states, values) -> dict:
+    """Converts states and values arrays back into a {board string: list} dict."""
+    return {
+        code_to_string(int(code)): row
+        for code, row in zip(states, np.asarray(values).tolist())
+    }
+
+
+def load_q_table_file(path: str):
+    """
+    Reads a Q-table from a q_table.json file or a .npz file.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, dict]: States, values and metadata
+            (empty for JSON tables).
+    """
+    if path.endswith(".npz"):
+        return load_q_table_npz(path)
+    with open(path, "r") as f:
+        states, values = q_table_to_arrays(json.load(f))
+    return states, values, {}
+
+
+def convert_json_to_npz(
+    json_file: str, npz_file: str, metadata: dict | None = None, dtype="float64"
+) -> int:
+    """
+    Converts a q_table.json file to the binary format.
+
+    Args:
+        json_file (str): The JSON Q-table written by QLearningAgent.save_q_table.
+        npz_file (str): The .npz file to write.
+        metadata (dict | None): Metadata to store, e.g. the hyperparameters
+            the table was trained with.
+        dtype (str): The storage dtype (see save_q_table_npz).
+
+    Returns:
+        int: The number of states converted.
+    """
+    with open(json_file, "r") as f:
+        q_table = json.load(f)
+    states, values = q_table_to_arrays(q_table)
+    save_q_table_npz(
+        npz_file, states, values, dict(metadata or {}, source=json_file), dtype
+    )
+    return len(states)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a JSON Q-table to the binary .npz format."
+    )
+    parser.add_argument("json_file", nargs="?", default="q_table.json")
+    parser.add_argument("npz_file", nargs="?", default=None)
+    parser.add_argument(
+        "--dtype",
+        choices=("float64",) + QUANTIZED_DTYPES,
+        default="float64",
+        help="Storage dtype of the Q-values (quantized tables keep a legal-move mask).",
+    )
+    args = parser.parse_args()
+    npz_file = args.npz_file or os.path.splitext(args.json_file)[0] + ".npz"
+    count = convert_json_to_npz(args.json_file, npz_file, dtype=args.dtype)
+    print(f"✅ {npz_file} を生成しました。（{count} 状態）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+quantization_report.py: Accuracy of quantized Q-table storage.
+
+Stores a Q-table as float16 or int8 (see q_table_io.quantize_values), restores
+it, and compares the greedy policy of the restored table with the
+full-precision one on every reachable position of state_graph.py. Greedy
+policies are compared as policy_table.compile_policy() tie sets:
+
+    same_policy  Positions whose set of tied best moves is unchanged.
+    optimal      Positions where every tied best move of the quantized table
+                 is also a best move of the full-precision table.
+
+The module can be run as a script, optionally writing the quantized table:
+
+    python quantization_report.py q_table.npz --dtype int8 --output q_table_int8.npz
+"""
+
+import argparse
+
+import numpy as np
+
+from policy_table import compile_policy
+from q_table_io import (
+    QUANTIZED_DTYPES,
+    dequantize_values,
+    load_q_table_file,
+    quantize_values,
+    save_q_table_npz,
+)
+from rewards import ILLEGAL_Q
+from state_graph import load_state_graph
+
+
+def quantization_report(states, values, dtype: str, use_symmetry=False) -> dict:
+    """
+    Measures how a quantized Q-table differs from the full-precision one.
+
+    Args:
+        states: Length-N base-3 board codes.
+        values: ``(N, 9)`` float64 Q-values with ILLEGAL_Q sentinels.
+        dtype (str): One of q_table_io.QUANTIZED_DTYPES.
+        use_symmetry (bool): Whether the table only stores canonical boards.
+
+    Returns:
+        dict: The dtype, the number of positions compared, the same_policy
+            and optimal fractions, the largest absolute error of a legal
+            Q-value, and the bytes of the quantized and float64 values.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1, 9)
+    quantized, legal, quantization = quantize_values(values, dtype)
+    restored = dequantize_values(quantized, legal, quantization)
+    reference = compile_policy(states, values, use_symmetry)
+    approximate = compile_policy(states, restored, use_symmetry)
+
+    graph = load_state_graph()
+    codes = graph.codes[~graph.terminal]
+    error = np.abs(values - restored)[values > ILLEGAL_Q / 2]
+    return {
+        "dtype": dtype,
+        "positions": len(codes),
+        "same_policy": float(np.mean(reference[codes] == approximate[codes])),
+        "optimal": float(np.mean((approximate[codes] & ~reference[codes]) == 0)),
+        "max_error": float(error.max()) if len(error) else 0.0,
+        "bytes": quantized.nbytes + legal.nbytes,
+        "float64_bytes": values.nbytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the greedy policies of quantized and full-precision Q-tables."
+    )
+    parser.add_argument("q_table_file", nargs="?", default="q_table.json")
+    parser.add_argument(
+        "--dtype", choices=QUANTIZED_DTYPES, nargs="+", default=list(QUANTIZED_DTYPES)
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Write the table quantized with the (single) --dtype to this .npz file.",
+    )
+    args = parser.parse_args()
+    if args.output and len(args.dtype) != 1:
+        parser.error("--output needs exactly one --dtype")
+
+    states, values, metadata = load_q_table_file(args.q_table_file)
+    use_symmetry = bool(metadata.get("use_symmetry", False))
+    for dtype in args.dtype:
+        report = quantization_report(states, values, dtype, use_symmetry)
+        print(
+            f"{dtype:>7}: 方策一致 {report['same_policy']:.2%}, "
+            f"最善手のみ {report['optimal']:.2%} "
+            f"({report['positions']} 局面), "
+            f"最大誤差 {report['max_error']:.4g}, "
+            f"{report['bytes']:,} / {report['float64_bytes']:,} バイト"
+        )
+    if args.output:
+        save_q_table_npz(args.output, states, values, metadata, args.dtype[0])
+        print(f"✅ {args.output} を生成しました。（{len(states)} 状態）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+rewards.py: Rewards and Q-table sentinel shared by every Q-learning engine.
+
+train_q_learning.py (Python loop), fast_trainer (native loop),
+batch_trainer and value_iteration all learn from these rewards, so their
+Q-tables are interchangeable. STEP_REWARD is added to every move of the
+learner, plus WIN, DRAW or LOSS when that move or the opponent's reply
+ends the game.
+"""
+
+WIN_REWARD = 100.0
+DRAW_REWARD = 75.0
+LOSS_REWARD = -200.0
+STEP_REWARD = -0.1
+
+# The value of occupied cells in the dense (3**9, 9) Q-tables.
+ILLEGAL_Q = -1e9
@@ -1,3 +1,4 @@
+import os
 from typing import Optional
 from fastapi import HTTPException
 from game_logic import TicTacToe
@@ -7,7 +8,25 @@ PLAYER_X = "X"
 PLAYER_O = "O"
 DB_PATH = "tictactoe.db"
 Q_TABLE_PATH = "q_table.json"
+Q_TABLE_NPZ = "q_table.npz"
+Q_POLICY_BIN = "q_policy.bin"
 PERFECT_MOVES_FILE = "perfect_moves.json"
+PERFECT_MOVES_BIN = "perfect_moves.bin"
+
+
+def prefer_binary(binary_path: str, source_path: str) -> str:
+    """
+    Returns binary_path unless it is missing or older than source_path.
+
+    Binary files (perfect_moves.bin, q_table.npz, q_policy.bin) are generated
+    from a source file, so a binary file older than its source is stale.
+    """
+    if os.path.exists(binary_path) and (
+        not os.path.exists(source_path)
+        or os.path.getmtime(binary_path) >= os.path.getmtime(source_path)
+    ):
+        return binary_path
+    return source_path
 
 
 class GameManager:
@@ -43,11 +62,23 @@ class GameManager:
             return None
 
         if agent_type == "Perfect":
-            return agent_class(player_symbol, PERFECT_MOVES_FILE)
+            # The binary table is memory-mapped, so every worker shares its pages.
+            return agent_class(
+                player_symbol, prefer_binary(PERFECT_MOVES_BIN, PERFECT_MOVES_FILE)
+            )
+
+        elif agent_type == "Database":
+            # Load the table once per process and share it across games instead
+            # of opening a connection and running a SELECT per move.
+            return agent_class(player_symbol, DB_PATH, lookup="memory")
 
         elif agent_type == "QLearning":
             try:
-                return agent_class(player_symbol, q_table_file=Q_TABLE_PATH)
+                q_table_file = self._q_table_file()
+                # A policy compiled from the current table needs one lookup per move.
+                if prefer_binary(Q_POLICY_BIN, q_table_file) == Q_POLICY_BIN:
+                    return agent_class(player_symbol, policy_file=Q_POLICY_BIN)
+                return agent_class(player_symbol, q_table_file=q_table_file)
             except FileNotFoundError:
                 raise HTTPException(  # pragma: no cover
                     status_code=500,
@@ -56,6 +87,11 @@ class GameManager:
         else:
             return agent_class(player_symbol)
 
+    @staticmethod
+    def _q_table_file() -> str:
+        # Prefer the binary table (no JSON parse) unless the JSON one is newer.
+        return prefer_binary(Q_TABLE_NPZ, Q_TABLE_PATH)
+
     def _check_winner(self, board):
         """Stateless winner check, returns (winner, winner_line)."""
         # Use the static method from TicTacToe class
@@ -0,0 +1,83 @@
+"""
+solver.py: Retrograde (backward induction) solver over the state graph.
+
+Every reachable position is solved in one backward pass over the move-count
+layers of state_graph.StateGraph: a state's children always have one more
+stone, so by the time a layer is processed all of its successors are final.
+"""
+
+import numpy as np
+
+from batch_game_logic import O_WINS, X_WINS
+from state_graph import StateGraph
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# Moves are ranked by depth-adjusted minimax scores: a win scores
+# 100 - distance (faster is better), a loss -100 + distance (slower is
+# better) and a draw 0. The first move with the highest rank wins.
+_ILLEGAL_RANK = -1000
+
+
+class Solution:
+    """
+    Game-theoretic result of every state, from the side to move's point of view.
+
+    Attributes:
+        value (np.ndarray): int8 ``(N,)`` WIN, DRAW or LOSS under perfect play.
+            Terminal states are LOSS when the previous player won, DRAW otherwise.
+        distance (np.ndarray): int8 ``(N,)`` plies until the game ends under
+            perfect play (winner hurries, loser delays).
+        best_move (np.ndarray): int8 ``(N,)`` the move a depth-adjusted minimax
+            search picks (lowest index among equally ranked moves), -1 if terminal.
+        optimal_moves (np.ndarray): uint16 ``(N,)`` bitmask of all moves that
+            keep the game-theoretic value, 0 if terminal.
+    """
+
+    def __init__(self, value, distance, best_move, optimal_moves):
+        self.value = value
+        self.distance = distance
+        self.best_move = best_move
+        self.optimal_moves = optimal_moves
+
+
+def solve(graph: StateGraph) -> Solution:
+    """
+    Solves every state of the graph.
+
+    Args:
+        graph (StateGraph): The graph to solve.
+
+    Returns:
+        Solution: Per-state value, distance, best move and optimal move set.
+    """
+    n = len(graph)
+    decided = (graph.winner == X_WINS) | (graph.winner == O_WINS)
+    value = np.where(decided, LOSS, DRAW).astype(np.int8)
+    distance = np.zeros(n, dtype=np.int8)
+    best_move = np.full(n, -1, dtype=np.int8)
+    optimal_moves = np.zeros(n, dtype=np.uint16)
+    bits = (1 << np.arange(9)).astype(np.uint16)
+
+    for moves in range(8, -1, -1):
+        layer = np.flatnonzero((graph.moves == moves) & ~graph.terminal)
+        if len(layer) == 0:
+            continue
+        successors = graph.successors[layer]
+        legal = successors >= 0
+        children = np.where(legal, successors, 0)
+        score = -value[children].astype(np.int16)
+        child_distance = distance[children].astype(np.int16)
+        rank = np.where(legal, score * (100 - child_distance), _ILLEGAL_RANK)
+
+        best = rank.argmax(axis=1)
+        rows = np.arange(len(layer))
+        value[layer] = score[rows, best]
+        distance[layer] = child_distance[rows, best] + 1
+        best_move[layer] = best
+        optimal = legal & (score == score[rows, best][:, None])
+        optimal_moves[layer] = (optimal * bits).sum(axis=1)
+
+    return Solution(value, distance, best_move, optimal_moves)
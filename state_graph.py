@@ -0,0 +1,268 @@
+"""
+state_graph.py: Dense, integer-indexed graph of every reachable position.
+
+Boards are encoded as base-3 integers: cell i (= row * 3 + col) contributes
+``digit * 3**i`` with digit 0 for " ", 1 for "X" and 2 for "O". The 5,478
+positions reachable from the empty board with "X" to move first get compact
+state IDs in breadth-first (move count) order, and every per-state property
+is stored as a NumPy array so solvers, agents and the batch environment can
+index it in O(1).
+"""
+
+import os
+import zipfile
+
+import numpy as np
+
+from batch_game_logic import DRAW, ONGOING, O_WINS, PLAYER_O, PLAYER_X, X_WINS
+from game_logic import FULL_MASK, LINES, WIN_LINE_BY_BITS
+
+STATE_GRAPH_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "state_graph.npz"
+)
+# Bump when the layout of the cached arrays changes.
+STATE_GRAPH_VERSION = 1
+
+NUM_CODES = 3**9
+POWERS = 3 ** np.arange(9, dtype=np.int32)
+# Bit of each cell in uint16 move masks (StateGraph.legal, policy tables).
+CELL_BITS = 1 << np.arange(9)
+DIGIT_BY_CELL = {" ": 0, "X": 1, "O": 2}
+CELL_BY_DIGIT = " XO"
+
+_ARRAYS = (
+    "codes",
+    "state_id",
+    "legal",
+    "successors",
+    "terminal",
+    "winner",
+    "winner_line",
+    "to_move",
+    "moves",
+)
+
+
+def string_to_code(board_str: str) -> int:
+    """Returns the base-3 code of a 9-character board string."""
+    code = 0
+    for i in range(8, -1, -1):
+        code = code * 3 + DIGIT_BY_CELL[board_str[i]]
+    return code
+
+
+def board_to_code(board: list) -> int:
+    """Returns the base-3 code of a list-of-lists board."""
+    # Unrolled: this runs once per move of the served agents.
+    (a, b, c), (d, e, f), (g, h, i) = board
+    digit = DIGIT_BY_CELL
+    return (
+        digit[a]
+        + 3 * digit[b]
+        + 9 * digit[c]
+        + 27 * digit[d]
+        + 81 * digit[e]
+        + 243 * digit[f]
+        + 729 * digit[g]
+        + 2187 * digit[h]
+        + 6561 * digit[i]
+    )
+
+
+def code_to_string(code: int) -> str:
+    """Returns the 9-character board string of a base-3 code."""
+    cells = []
+    for _ in range(9):
+        code, digit = divmod(code, 3)
+        cells.append(CELL_BY_DIGIT[digit])
+    return "".join(cells)
+
+
+def cells_to_codes(cells: np.ndarray) -> np.ndarray:
+    """
+    Encodes a batch of boards in the BatchTicTacToe layout.
+
+    Args:
+        cells (np.ndarray): A ``(B, 9)`` array of EMPTY, PLAYER_X or PLAYER_O.
+
+    Returns:
+        np.ndarray: A length-B int32 array of base-3 codes.
+    """
+    # PLAYER_O (-1) % 3 == 2, the digit used for "O".
+    return (cells.astype(np.int32) % 3) @ POWERS
+
+
+class StateGraph:
+    """
+    Every reachable position and its successors as parallel NumPy arrays.
+
+    Attributes:
+        codes (np.ndarray): int32 ``(N,)`` base-3 code of each state.
+        state_id (np.ndarray): int16 ``(3**9,)`` state ID of each code, -1 if unreachable.
+        legal (np.ndarray): uint16 ``(N,)`` bitmask of legal moves (0 for terminal states).
+        successors (np.ndarray): int16 ``(N, 9)`` state ID after each move, -1 if illegal.
+        terminal (np.ndarray): bool ``(N,)`` True if the game is over.
+        winner (np.ndarray): int8 ``(N,)`` X_WINS, O_WINS, DRAW or ONGOING.
+        winner_line (np.ndarray): int8 ``(N,)`` index into game_logic.LINES, -1 if none.
+        to_move (np.ndarray): int8 ``(N,)`` PLAYER_X or PLAYER_O.
+        moves (np.ndarray): int8 ``(N,)`` number of stones on the board.
+    """
+
+    def __init__(self, **arrays):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls) -> "StateGraph":
+        """Enumerates all reachable positions breadth-first from the empty board."""
+        # States are found as (x_bits, o_bits) pairs, one BFS layer per move.
+        order = [(0, 0)]
+        index = {(0, 0): 0}
+        edges = []
+        head = 0
+        while head < len(order):
+            x_bits, o_bits = order[head]
+            head += 1
+            row = [-1] * 9
+            if not _is_over(x_bits, o_bits):
+                x_to_move = bin(x_bits).count("1") == bin(o_bits).count("1")
+                for cell in range(9):
+                    bit = 1 << cell
+                    if (x_bits | o_bits) & bit:
+                        continue
+                    child = (
+                        (x_bits | bit, o_bits) if x_to_move else (x_bits, o_bits | bit)
+                    )
+                    if child not in index:
+                        index[child] = len(order)
+                        order.append(child)
+                    row[cell] = index[child]
+            edges.append(row)
+
+        n = len(order)
+        codes = np.zeros(n, dtype=np.int32)
+        winner = np.full(n, ONGOING, dtype=np.int8)
+        winner_line = np.full(n, -1, dtype=np.int8)
+        moves = np.zeros(n, dtype=np.int8)
+        for sid, (x_bits, o_bits) in enumerate(order):
+            codes[sid] = sum(
+                POWERS[i] * (1 if x_bits >> i & 1 else 2 if o_bits >> i & 1 else 0)
+                for i in range(9)
+            )
+            moves[sid] = bin(x_bits | o_bits).count("1")
+            x_line, o_line = WIN_LINE_BY_BITS[x_bits], WIN_LINE_BY_BITS[o_bits]
+            if x_line >= 0:
+                winner[sid], winner_line[sid] = X_WINS, x_line
+            elif o_line >= 0:
+                winner[sid], winner_line[sid] = O_WINS, o_line
+            elif x_bits | o_bits == FULL_MASK:
+                winner[sid] = DRAW
+
+        successors = np.array(edges, dtype=np.int16)
+        state_id = np.full(NUM_CODES, -1, dtype=np.int16)
+        state_id[codes] = np.arange(n, dtype=np.int16)
+        legal = ((successors >= 0) * CELL_BITS).sum(axis=1).astype(np.uint16)
+        return cls(
+            codes=codes,
+            state_id=state_id,
+            legal=legal,
+            successors=successors,
+            terminal=winner != ONGOING,
+            winner=winner,
+            winner_line=winner_line,
+            to_move=np.where(moves % 2 == 0, PLAYER_X, PLAYER_O).astype(np.int8),
+            moves=moves,
+        )
+
+    def save(self, path: str):
+        """Writes the arrays to an uncompressed .npz file, replacing it atomically."""
+        # Per-process temporary name: concurrent workers may build the cache at once.
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.array(STATE_GRAPH_VERSION),
+            **{name: getattr(self, name) for name in _ARRAYS},
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "StateGraph":
+        """
+        Reads a graph written by save().
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+            zipfile.BadZipFile: If the file is truncated or not an .npz file.
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != STATE_GRAPH_VERSION:
+                raise ValueError(f"Outdated state graph cache: {path}")
+            return cls(**{name: data[name] for name in _ARRAYS})
+
+    def id_of_board(self, board: list) -> int:
+        """Returns the state ID of a list-of-lists board, or -1 if unreachable."""
+        return int(self.state_id[board_to_code(board)])
+
+    def id_of_string(self, board_str: str) -> int:
+        """Returns the state ID of a 9-character board string, or -1 if unreachable."""
+        return int(self.state_id[string_to_code(board_str)])
+
+    def board_string(self, sid: int) -> str:
+        """Returns the 9-character board string of a state ID."""
+        return code_to_string(int(self.codes[sid]))
+
+    def winner_line_of(self, sid: int):
+        """Returns the winning line coordinates of a state, as in TicTacToe.winner_line."""
+        line = int(self.winner_line[sid])
+        return LINES[line] if line >= 0 else None
+
+
+def _is_over(x_bits: int, o_bits: int) -> bool:
+    return (
+        WIN_LINE_BY_BITS[x_bits] >= 0
+        or WIN_LINE_BY_BITS[o_bits] >= 0
+        or x_bits | o_bits == FULL_MASK
+    )
+
+
+_cache = {}
+
+
+def load_state_graph(path: str = STATE_GRAPH_FILE) -> StateGraph:
+    """
+    Returns the state graph, building it once and caching it on disk.
+
+    The graph is kept in memory per path, so repeated calls are free. A
+    missing, outdated or corrupt cache file is rebuilt and rewritten; if it
+    cannot be written, the graph is only kept in memory.
+
+    Args:
+        path (str): The .npz cache file (next to this module by default).
+            None disables the disk cache.
+
+    Returns:
+        StateGraph: The shared, read-only state graph.
+    """
+    if path in _cache:
+        return _cache[path]
+    graph = None
+    if path is not None and os.path.exists(path):
+        try:
+            graph = StateGraph.load(path)
+        except (ValueError, KeyError, OSError, EOFError, zipfile.BadZipFile):
+            graph = None
+    if graph is None:
+        graph = StateGraph.build()
+        if path is not None:
+            try:
+                graph.save(path)
+            except OSError:
+                # E.g. a read-only install: keep using the graph in memory.
+                pass
+    for name in _ARRAYS:
+        getattr(graph, name).flags.writeable = False
+    _cache[path] = graph
+    return graph
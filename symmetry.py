@@ -0,0 +1,114 @@
+"""
+symmetry.py: The 8 symmetries (dihedral group D4) of the 3x3 board.
+
+Boards are handled as 9-character strings (cell index i = row * 3 + col), the
+same key format used by perfect_moves.json, the tictactoe table and
+q_table.json. A board's canonical form is the lexicographically smallest of
+its 8 images; tables keyed by canonical boards are up to 8x smaller.
+"""
+
+from functools import lru_cache
+
+
+def _permutation(mapping) -> tuple:
+    # TRANSFORMS[t][i] is the source cell of new cell i.
+    return tuple(
+        mapping(r, c)[0] * 3 + mapping(r, c)[1] for r in range(3) for c in range(3)
+    )
+
+
+TRANSFORMS = (
+    _permutation(lambda r, c: (r, c)),  # identity
+    _permutation(lambda r, c: (2 - c, r)),  # rotate 90 degrees clockwise
+    _permutation(lambda r, c: (2 - r, 2 - c)),  # rotate 180 degrees
+    _permutation(lambda r, c: (c, 2 - r)),  # rotate 270 degrees clockwise
+    _permutation(lambda r, c: (r, 2 - c)),  # mirror left-right
+    _permutation(lambda r, c: (2 - r, c)),  # mirror top-bottom
+    _permutation(lambda r, c: (c, r)),  # transpose
+    _permutation(lambda r, c: (2 - c, 2 - r)),  # anti-transpose
+)
+
+# INVERSE_TRANSFORMS[t][i] is the new cell that source cell i moves to.
+INVERSE_TRANSFORMS = tuple(
+    tuple(perm.index(i) for i in range(9)) for perm in TRANSFORMS
+)
+
+IDENTITY = 0
+
+
+def transform_string(board_str: str, transform: int) -> str:
+    """
+    Applies a symmetry to a 9-character board string.
+
+    Args:
+        board_str (str): The board as a 9-character string.
+        transform (int): Index into TRANSFORMS.
+
+    Returns:
+        str: The transformed board string.
+    """
+    return "".join(board_str[i] for i in TRANSFORMS[transform])
+
+
+@lru_cache(maxsize=None)
+def canonicalize(board_str: str) -> tuple[str, int]:
+    """
+    Maps a board to its canonical form.
+
+    Args:
+        board_str (str): The board as a 9-character string.
+
+    Returns:
+        tuple[str, int]: The canonical board string and the transform that
+            maps board_str onto it. The identity is returned for boards that
+            are already canonical.
+    """
+    best, best_transform = board_str, IDENTITY
+    for transform in range(1, len(TRANSFORMS)):
+        image = transform_string(board_str, transform)
+        if image < best:
+            best, best_transform = image, transform
+    return best, best_transform
+
+
+def is_canonical(board_str: str) -> bool:
+    """Returns True if board_str is its own canonical form."""
+    return canonicalize(board_str)[0] == board_str
+
+
+def to_canonical_move(index: int, transform: int) -> int:
+    """
+    Maps a move index on the original board to the canonical board.
+
+    Args:
+        index (int): Cell index (0-8) on the original board.
+        transform (int): The transform returned by canonicalize().
+
+    Returns:
+        int: The cell index on the canonical board.
+    """
+    return INVERSE_TRANSFORMS[transform][index]
+
+
+def from_canonical_move(index: int, transform: int) -> int:
+    """
+    Maps a move index on the canonical board back to the original board.
+
+    Args:
+        index (int): Cell index (0-8) on the canonical board.
+        transform (int): The transform returned by canonicalize().
+
+    Returns:
+        int: The cell index on the original board.
+    """
+    return TRANSFORMS[transform][index]
+
+
+def board_to_string(board: list) -> str:
+    """Converts a list-of-lists board to the 9-character string key."""
+    return "".join(cell for row in board for cell in row)
+
+
+def string_to_board(board_str: str) -> list:
+    """Converts a 9-character string key back to a list-of-lists board."""
+    return [list(board_str[r * 3 : r * 3 + 3]) for r in range(3)]
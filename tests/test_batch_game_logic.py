@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from batch_game_logic import (
+    BatchTicTacToe,
+    DRAW,
+    ONGOING,
+    O_WINS,
+    PLAYER_O,
+    PLAYER_X,
+    X_WINS,
+)
+from game_logic import TicTacToe
+
+RESULT_BY_WINNER = {None: ONGOING, "X": X_WINS, "O": O_WINS, "draw": DRAW}
+
+
+def test_initial_state():
+    """初期状態で全ゲームが空盤面・X の手番であることを確認"""
+    env = BatchTicTacToe(4)
+    assert env.boards.shape == (4, 9)
+    assert env.legal_mask().all()
+    assert (env.current_player == PLAYER_X).all()
+    assert (env.winners() == ONGOING).all()
+
+
+def test_step_switches_player_and_detects_results():
+    """step で手番が交代し、勝敗・引き分けが検出されることを確認"""
+    env = BatchTicTacToe(2)
+    # ゲーム0: X が上段で勝つ / ゲーム1: 引き分け
+    moves = [(0, 0), (3, 1), (1, 2), (4, 4), (2, 3), (0, 5), (0, 7), (0, 6), (0, 8)]
+    for step, (a0, a1) in enumerate(moves):
+        winners = env.step(np.array([a0, a1]))
+        if step == 4:
+            assert winners[0] == X_WINS
+            assert env.done[0]
+    assert winners[0] == X_WINS
+    assert winners[1] == DRAW
+    assert env.done.all()
+    assert not env.legal_mask().any()
+
+
+def test_step_illegal_move_raises():
+    """埋まっているマスへの着手で ValueError が発生することを確認"""
+    env = BatchTicTacToe(1)
+    env.step(np.array([4]))
+    assert env.current_player[0] == PLAYER_O
+    with pytest.raises(ValueError):
+        env.step(np.array([4]))
+
+
+def test_reset_only_selected_games():
+    """reset で指定したゲームだけが初期化されることを確認"""
+    env = BatchTicTacToe(3)
+    env.step(np.array([0, 1, 2]))
+    env.reset(np.array([True, False, True]))
+    assert (env.boards[0] == 0).all()
+    assert env.boards[1, 1] == PLAYER_X
+    assert (env.boards[2] == 0).all()
+    assert env.current_player[1] == PLAYER_O
+
+
+def test_random_games_match_tictactoe():
+    """ランダムな対局で TicTacToe と同じ勝敗になることを確認"""
+    rng = np.random.default_rng(0)
+    batch = 64
+    env = BatchTicTacToe(batch)
+    games = [TicTacToe() for _ in range(batch)]
+    while not env.done.all():
+        legal = env.legal_mask()
+        scores = np.where(legal, rng.random((batch, 9)), -1.0)
+        actions = scores.argmax(axis=1)
+        winners = env.step(actions)
+        for i, game in enumerate(games):
+            if game.game_over:
+                continue
+            game.make_move(*divmod(int(actions[i]), 3))
+            game.check_winner()
+            game.switch_player()
+            assert RESULT_BY_WINNER[game.winner] == winners[i]
+
+
+def test_step_with_mask_moves_selected_games_only():
+    """mask を指定すると選択したゲームだけが進むことを確認"""
+    env = BatchTicTacToe(3)
+    env.step(np.array([4, 4, 4]), mask=np.array([True, False, True]))
+    assert env.boards[:, 4].tolist() == [PLAYER_X, 0, PLAYER_X]
+    assert env.current_player.tolist() == [PLAYER_O, PLAYER_X, PLAYER_O]
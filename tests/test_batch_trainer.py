@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+import fast_trainer
+from agents.perfect_agent import PerfectAgent
+from agents.q_learning_agent import QLearningAgent
+from batch_trainer import scatter_update, train_batch
+from game_logic import TicTacToe
+from state_graph import NUM_CODES, string_to_code
+from train_q_learning import load_opponent_moves
+
+
+def make_agent(exploration_rate=1.0, symmetric_updates=False):
+    return fast_trainer.FastQLearningAgent(
+        "X", 0.1, 0.9, exploration_rate, 0.05, 0.0, True, symmetric_updates
+    )
+
+
+class TestBatchTrainer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.opponent_moves = load_opponent_moves()
+
+    def test_scatter_update_merges_duplicates(self):
+        """同じ (状態, 行動) への更新は目標値の平均で 1 回だけ適用されるか"""
+        values = np.zeros((NUM_CODES, 9))
+        updates = scatter_update(
+            values, [5, 5, 7], [2, 2, 0], np.array([10.0, 20.0, 4.0]), 0.5
+        )
+        self.assertEqual(updates, 3)
+        self.assertAlmostEqual(values[5, 2], 7.5)
+        self.assertAlmostEqual(values[7, 0], 2.0)
+        self.assertEqual(np.count_nonzero(values), 2)
+
+    def test_train_batch_is_seeded(self):
+        """同じシードとバッチサイズで同じQ値が得られるか"""
+        results = []
+        for _ in range(2):
+            agent = make_agent()
+            updates = train_batch(
+                agent, self.opponent_moves, 300, batch_size=64, seed=5
+            )
+            self.assertGreater(updates, 0)
+            results.append(agent.q_table.values.copy())
+        np.testing.assert_array_equal(results[0], results[1])
+
+    def test_train_batch_learns_both_sides(self):
+        """X と O の両方の手番の盤面が学習され、探索率が減衰するか"""
+        agent = make_agent()
+        train_batch(agent, self.opponent_moves, 200, batch_size=32, seed=0)
+        self.assertIn("         ", agent.q_table)
+        # 学習者が O のエピソードでは完全AIが先手で (0, 0) に打つ
+        self.assertIn("X        ", agent.q_table)
+        self.assertLess(agent.exploration_rate, 0.06)
+        row = agent.q_table.values[string_to_code("X        ")]
+        self.assertEqual(row[0], -1e9)
+
+    def test_train_batch_symmetric_updates(self):
+        """対称更新ではネイティブ学習と同じく対称な盤面がすべて学習されるか"""
+        agent = make_agent(symmetric_updates=True)
+        train_batch(agent, self.opponent_moves, 100, batch_size=16, seed=0)
+        native = make_agent(symmetric_updates=True)
+        native.train_native(self.opponent_moves, 100, 0)
+        # 完全AIの初手 (0, 0) の対称像がすべて学習されている
+        for state in ("X        ", "  X      ", "      X  ", "        X"):
+            self.assertIn(state, agent.q_table)
+            self.assertIn(state, native.q_table)
+        values = agent.q_table.values
+        self.assertEqual(
+            values[string_to_code("X        "), 4],
+            values[string_to_code("        X"), 4],
+        )
+
+    def test_train_batch_reaches_perfect_play(self):
+        """十分に学習すると完全AI相手に負けない貪欲方策になるか"""
+        agent = make_agent()
+        train_batch(agent, self.opponent_moves, 50000, batch_size=1024, seed=1)
+        q_agent = QLearningAgent(
+            "X", q_table_file="nonexistent.json", is_training=False
+        )
+        q_agent._fast_agent.q_table.set_rows(*agent.q_table.get_rows())
+        for game_index in range(20):
+            q_agent.player = "X" if game_index % 2 == 0 else "O"
+            opponent = PerfectAgent("O" if q_agent.player == "X" else "X")
+            if q_agent.player == "X":
+                game = TicTacToe(agent_x=q_agent, agent_o=opponent)
+            else:
+                game = TicTacToe(agent_x=opponent, agent_o=q_agent)
+            winner = None
+            while winner is None:
+                row, col = game.get_current_agent().get_move(game.board)
+                game.make_move(row, col)
+                winner = game.check_winner()
+                game.switch_player()
+            self.assertIn(winner, (q_agent.player, "draw"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,163 +1,85 @@
 import unittest
 from unittest.mock import MagicMock, patch, call, mock_open
 import tempfile
+import json
 import os
 from create_database import (
-    check_winner,
-    is_board_full,
-    board_to_string,
-    get_opponent,
-    minimax,
-    insert_to_db,
-    create_database,
+    solve_positions,
+    write_database,
+    export_perfect_moves_bin,
     main,
 )
+from game_logic import LINES
+
+_LINES = [tuple(r * 3 + c for r, c in line) for line in LINES]
+
+
+def _winner(board: list) -> str | None:
+    for a, b, c in _LINES:
+        if board[a] != " " and board[a] == board[b] == board[c]:
+            return board[a]
+    return None
+
+
+def _minimax(board: list, depth: int, is_maximizing: bool, player: str) -> int:
+    # 深さで補正したスコアによる再帰的なミニマックス探索（比較用の参照実装）
+    opponent = "O" if player == "X" else "X"
+    winner = _winner(board)
+    if winner == player:
+        return 100 - depth
+    if winner == opponent:
+        return -100 + depth
+    if " " not in board:
+        return 0
+    scores = []
+    for i in range(9):
+        if board[i] == " ":
+            board[i] = player if is_maximizing else opponent
+            scores.append(_minimax(board, depth + 1, not is_maximizing, player))
+            board[i] = " "
+    return max(scores) if is_maximizing else min(scores)
+
+
+def _recursive_best_moves(board: list, player: str, best_moves: dict):
+    # board から到達できる全盤面の最善手（終局は -1、同点なら小さいインデックス）
+    board_str = "".join(board)
+    if board_str in best_moves:
+        return
+    if _winner(board) or " " not in board:
+        best_moves[board_str] = -1
+        return
+    best_score, best_move = float("-inf"), -1
+    for i in range(9):
+        if board[i] == " ":
+            board[i] = player
+            score = _minimax(board, 0, False, player)
+            board[i] = " "
+            if score > best_score:
+                best_score, best_move = score, i
+    best_moves[board_str] = best_move
+    for i in range(9):
+        if board[i] == " ":
+            board[i] = player
+            _recursive_best_moves(board, "O" if player == "X" else "X", best_moves)
+            board[i] = " "
 
 
 class TestCreateDatabase(unittest.TestCase):
-    def test_check_winner_horizontal(self):
-        """水平方向の勝利を検出できるか"""
-        board = [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]]
-        self.assertEqual(check_winner(board), "X")
-
-    def test_check_winner_vertical(self):
-        """垂直方向の勝利を検出できるか"""
-        board = [["O", " ", " "], ["O", " ", " "], ["O", " ", " "]]
-        self.assertEqual(check_winner(board), "O")
-
-    def test_check_winner_diagonal(self):
-        """対角線の勝利を検出できるか"""
-        board = [["X", " ", " "], [" ", "X", " "], [" ", " ", "X"]]
-        self.assertEqual(check_winner(board), "X")
-
-    def test_check_winner_reverse_diagonal(self):
-        """逆対角線の勝利を検出できるか"""
-        board = [[" ", " ", "O"], [" ", "O", " "], ["O", " ", " "]]
-        self.assertEqual(check_winner(board), "O")
-
-    def test_check_winner_no_winner(self):
-        """勝者がいない場合にNoneを返すか"""
-        board = [[" ", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        self.assertIsNone(check_winner(board))
-
-    def test_is_board_full_true(self):
-        """ボードが満杯の場合にTrueを返すか"""
-        board = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
-        self.assertTrue(is_board_full(board))
-
-    def test_is_board_full_false(self):
-        """ボードが満杯でない場合にFalseを返すか"""
-        board = [[" ", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        self.assertFalse(is_board_full(board))
-
-    def test_board_to_string(self):
-        """ボードを文字列に変換できるか"""
-        board = [["X", "O", " "], [" ", "X", " "], [" ", " ", "O"]]
-        self.assertEqual(board_to_string(board), "XO  X   O")
-
-    def test_get_opponent(self):
-        """相手プレイヤーを正しく取得できるか"""
-        self.assertEqual(get_opponent("X"), "O")
-        self.assertEqual(get_opponent("O"), "X")
-
-    def test_minimax_win(self):
-        """Xが勝利する盤面でminimaxが正のスコアを返すか"""
-        board = [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]]
-        score = minimax(board, 0, True, "X")
-        self.assertGreater(score, 0)
-
-    def test_minimax_loss(self):
-        """Oが勝利する盤面でminimaxが負のスコアを返すか"""
-        board = [["O", "O", "O"], [" ", " ", " "], [" ", " ", " "]]
-        score = minimax(board, 0, True, "X")
-        self.assertLess(score, 0)
-
-    def test_minimax_draw(self):
-        """引き分けの盤面でminimaxが0を返すか"""
-        board = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
-        score = minimax(board, 0, True, "X")
-        self.assertEqual(score, 0)
-
-    def test_minimax_maximizing(self):
-        """minimax最大化プレイヤーの動作を確認"""
-        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        score = minimax(board, 0, True, "X")
-        self.assertIsInstance(score, (int, float))
-
-    def test_minimax_minimizing(self):
-        """minimax最小化プレイヤーの動作を確認"""
-        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        score = minimax(board, 0, False, "X")
-        self.assertIsInstance(score, (int, float))
-
-    @patch("create_database.sqlite3")
-    def test_insert_to_db(self, mock_sqlite3):
-        """データベースにデータを挿入できるか"""
-        mock_cursor = MagicMock()
-        insert_to_db(mock_cursor, "XO  X   O", 4, "continue")
-        mock_cursor.execute.assert_called_once()
-
-    @patch("create_database.logging")
-    def test_create_database_with_winner(self, mock_logging):
-        """勝者がいる状態でcreate_databaseが正しく動作するか"""
-        mock_cursor = MagicMock()
-        board = [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]]
-        seen = set()
-        perfect_moves = {}
-
-        create_database(board, "X", mock_cursor, seen, perfect_moves)
-
-        self.assertIn("XXX      ", seen)
-        self.assertEqual(perfect_moves["XXX      "], -1)
-        mock_cursor.execute.assert_called()
-
-    @patch("create_database.logging")
-    def test_create_database_with_draw(self, mock_logging):
-        """引き分け状態でcreate_databaseが正しく動作するか"""
-        mock_cursor = MagicMock()
-        board = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
-        seen = set()
-        perfect_moves = {}
-
-        create_database(board, "X", mock_cursor, seen, perfect_moves)
-
-        board_str = board_to_string(board)
-        self.assertIn(board_str, seen)
-        self.assertEqual(perfect_moves[board_str], -1)
-
-    @patch("create_database.logging")
-    def test_create_database_ongoing_game(self, mock_logging):
-        """進行中のゲームでcreate_databaseが最適手を計算するか"""
-        mock_cursor = MagicMock()
-        board = [[" ", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        seen = set()
-        perfect_moves = {}
-
-        create_database(board, "X", mock_cursor, seen, perfect_moves)
-
-        # 盤面が登録されたことを確認
-        self.assertGreater(len(seen), 0)
-        self.assertGreater(len(perfect_moves), 0)
-
-    @patch("create_database.logging")
-    def test_create_database_skip_seen(self, mock_logging):
-        """既に処理済みの盤面をスキップするか"""
-        mock_cursor = MagicMock()
-        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
-        board_str = board_to_string(board)
-        seen = {board_str}  # 既に処理済み
-        perfect_moves = {}
-
-        create_database(board, "X", mock_cursor, seen, perfect_moves)
-
-        # データベースへの挿入が行われないことを確認
-        mock_cursor.execute.assert_not_called()
-
+    @patch("create_database.write_move_table")
+    @patch("create_database.os.replace")
     @patch("create_database.json.dump")
     @patch("create_database.sqlite3.connect")
     @patch("builtins.print")
     @patch("builtins.open", new_callable=mock_open)
-    def test_main(self, mock_file, mock_print, mock_connect, mock_json_dump):
+    def test_main(
+        self,
+        mock_file,
+        mock_print,
+        mock_connect,
+        mock_json_dump,
+        mock_replace,
+        mock_write_move_table,
+    ):
         """main関数が正しく実行されるか"""
         # モックの設定
         mock_conn = MagicMock()
@@ -168,21 +90,88 @@ class TestCreateDatabase(unittest.TestCase):
         # main関数を実行
         main()
 
-        # データベース接続が行われたことを確認
-        mock_connect.assert_called_once_with("tictactoe.db")
+        # 一時ファイルに書き込み、最後に置き換えたことを確認
+        mock_connect.assert_called_once_with("tictactoe.db.tmp", isolation_level=None)
+        mock_replace.assert_called_once_with("tictactoe.db.tmp", "tictactoe.db")
 
-        # テーブル作成が行われたことを確認（create_databaseで多数のexecuteが呼ばれる）
-        self.assertGreater(mock_cursor.execute.call_count, 1)
+        # 1 つのトランザクション内で executemany により一括挿入されたことを確認
+        statements = [c.args[0] for c in mock_cursor.execute.call_args_list]
+        self.assertIn("BEGIN", statements)
+        self.assertIn("COMMIT", statements)
+        mock_cursor.executemany.assert_called_once()
 
-        # コミットとクローズが行われたことを確認
-        mock_conn.commit.assert_called_once()
+        # クローズが行われたことを確認
         mock_conn.close.assert_called_once()
 
         # 成功メッセージが表示されたことを確認
-        self.assertEqual(mock_print.call_count, 2)
+        self.assertEqual(mock_print.call_count, 3)
 
-        # JSONファイルが保存されたことを確認
+        # JSONファイルとバイナリファイルが保存されたことを確認
         mock_json_dump.assert_called_once()
+        self.assertEqual(mock_write_move_table.call_args.args[0], "perfect_moves.bin")
+
+    def test_export_perfect_moves_bin(self):
+        """perfect_moves.json をバイナリ形式に変換できるか"""
+        from move_table import TERMINAL
+        from state_graph import NUM_CODES, string_to_code
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = os.path.join(tmpdir, "moves.json")
+            bin_path = os.path.join(tmpdir, "moves.bin")
+            with open(json_path, "w") as f:
+                json.dump({"         ": 0, "XXXOO    ": -1}, f)
+            self.assertEqual(export_perfect_moves_bin(json_path, bin_path), 2)
+            with open(bin_path, "rb") as f:
+                table = f.read()
+            self.assertEqual(len(table), NUM_CODES)
+            self.assertEqual(table[string_to_code("         ")], 0)
+            self.assertEqual(table[string_to_code("XXXOO    ")], TERMINAL)
+
+    def test_write_database(self):
+        """write_database が WITHOUT ROWID テーブルと board インデックスを作るか"""
+        import sqlite3
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "test.db")
+            rows = [("         ", 0, "continue"), ("XXXOO    ", -1, "X")]
+            count, rows_per_sec = write_database(path, iter(rows))
+            self.assertEqual(count, 2)
+            self.assertGreater(rows_per_sec, 0)
+            self.assertFalse(os.path.exists(path + ".tmp"))
+
+            conn = sqlite3.connect(path)
+            self.assertEqual(
+                conn.execute(
+                    "SELECT code, best_move, result FROM tictactoe WHERE board = ?",
+                    ("XXXOO    ",),
+                ).fetchone(),
+                (1 + 3 + 9 + 27 * 2 + 81 * 2, -1, "X"),
+            )
+            schema = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'tictactoe'"
+            ).fetchone()[0]
+            self.assertIn("WITHOUT ROWID", schema)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            conn.close()
+
+    def test_solve_positions_matches_recursive_search(self):
+        """レトログレード解析の最善手が再帰的なミニマックス探索と一致するか"""
+        best_moves = {}
+        _recursive_best_moves(list("XO  X   O"), "X", best_moves)
+        _recursive_best_moves(list("    O XOX"), "X", best_moves)
+        solved = {board_str: best_move for board_str, best_move, _ in solve_positions()}
+        for board_str, best_move in best_moves.items():
+            self.assertEqual(solved[board_str], best_move)
+
+    def test_solve_positions_results(self):
+        """全 5478 盤面が解かれ、終局の結果が記録されるか"""
+        rows = solve_positions()
+        self.assertEqual(len(rows), 5478)
+        results = {board_str: result for board_str, _, result in rows}
+        self.assertEqual(results["         "], "continue")
+        self.assertEqual(results["XXXOO    "], "X")
+        self.assertEqual(results["XOXXOOOXX"], "draw")
+        self.assertEqual(len(solve_positions(canonical=True)), 765)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import fast_trainer
+from curriculum import Curriculum, train_curriculum
+from opponent_pool import OpponentPool
+
+
+class TestCurriculum(unittest.TestCase):
+    def test_schedule_follows_stages(self):
+        """各エピソードの対戦相手が段階の範囲と重みに従って選ばれるか"""
+        curriculum = Curriculum(
+            [
+                {"until": 100, "opponents": {"random": 1}},
+                {"until": 0.5, "opponents": {"minimax": 1, "perfect": 0}},
+                {"opponents": {"random": 1, "perfect": 1}},
+            ]
+        )
+        pool = OpponentPool(curriculum.opponents)
+        rng = np.random.default_rng(0)
+        schedule = curriculum.schedule(pool, 0, 1000, 1000, rng)
+        random_row, minimax_row = pool.index("random"), pool.index("minimax")
+        self.assertTrue((schedule[:100] == random_row).all())
+        self.assertTrue((schedule[100:500] == minimax_row).all())
+        last = schedule[500:]
+        self.assertEqual(set(last.tolist()), {random_row, pool.index("perfect")})
+        # 途中から始まる区間も全体のエピソード番号で段階が決まる
+        part = curriculum.schedule(pool, 450, 100, 1000, rng)
+        self.assertTrue((part[:50] == minimax_row).all())
+
+    def test_invalid_weights_raise(self):
+        """重みが空または合計 0 の段階は ValueError になるか"""
+        with self.assertRaises(ValueError):
+            Curriculum([{"opponents": {}}])
+        with self.assertRaises(ValueError):
+            Curriculum([{"opponents": {"random": 0}}])
+
+    def test_from_file(self):
+        """JSON ファイルからカリキュラムを読み込めるか"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "curriculum.json")
+            with open(path, "w") as f:
+                json.dump(
+                    {"stages": [{"opponents": {"self": 1}}], "snapshot_every": 50}, f
+                )
+            curriculum = Curriculum.from_file(path)
+        self.assertEqual(curriculum.opponents, ["self"])
+        self.assertEqual(curriculum.snapshot_every, 50)
+
+    def test_train_curriculum_with_self_play(self):
+        """自己対戦を含むカリキュラムで学習が進み、探索率が減衰するか"""
+        curriculum = Curriculum(
+            [
+                {"until": 0.5, "opponents": {"random": 1}},
+                {"opponents": {"self": 1, "perfect": 1}},
+            ],
+            snapshot_every=100,
+        )
+        pool = OpponentPool(curriculum.opponents)
+        agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+        updates = train_curriculum(agent, pool, curriculum, 400, seed=1)
+        self.assertGreater(updates, 0)
+        self.assertLess(agent.exploration_rate, 0.06)
+        self.assertGreater(len(agent.q_table), 100)
+
+    def test_progress_checks_do_not_change_training(self):
+        """進捗の確認で分割しても、同じシードなら同じQ値になるか"""
+        curriculum = Curriculum([{"opponents": {"random": 1, "perfect": 1}}])
+        tables = []
+        for progress_every in (0, 70):
+            pool = OpponentPool(curriculum.opponents)
+            agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+            train_curriculum(
+                agent,
+                pool,
+                curriculum,
+                300,
+                seed=2,
+                progress_every=progress_every,
+                on_progress=lambda episodes, updates: False,
+            )
+            tables.append(agent.q_table.values)
+        np.testing.assert_array_equal(tables[0], tables[1])
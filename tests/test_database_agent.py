@@ -46,6 +46,8 @@ class TestDatabaseAgent(unittest.TestCase):
     def tearDown(self):
         self.conn.close()
         os.remove(self.test_db)
+        if os.path.exists("test_tictactoe.bin"):
+            os.remove("test_tictactoe.bin")
 
     def test_get_move_from_database(self):
         """データベースに存在する盤面から正しい手を取得できるか"""
@@ -94,5 +96,62 @@ class TestDatabaseAgent(unittest.TestCase):
         self.assertIsNone(move)
 
 
+    def test_get_move_with_symmetry(self):
+        """use_symmetry=True で正規形の盤面から手を引き、元の向きに戻すか"""
+        # "X        " の正規形は "        X"（右下の角）
+        self.cursor.execute(
+            "INSERT INTO tictactoe (board, best_move, result) VALUES (?, ?, ?)",
+            ("        X", 4, "continue"),
+        )
+        self.cursor.execute(
+            "INSERT INTO tictactoe (board, best_move, result) VALUES (?, ?, ?)",
+            ("       OX", 2, "continue"),
+        )
+        self.conn.commit()
+        agent = DatabaseAgent("X", self.test_db, use_symmetry=True)
+
+        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+        self.assertEqual(agent.get_move(board), (1, 1))
+        # "XO       " は 180 度回転で "       OX" になり、手 2 は元の盤面の 6
+        board = [["X", "O", " "], [" ", " ", " "], [" ", " ", " "]]
+        self.assertEqual(agent.get_move(board), (2, 0))
+
+
+    def test_get_move_with_shared_table(self):
+        """lookup="memory" / "mmap" で SQL と同じ手が返り、テーブルが共有されるか"""
+        for lookup in ("memory", "mmap"):
+            agent = DatabaseAgent("X", self.test_db, lookup=lookup)
+            self.assertIsNone(agent.conn)
+            empty = [[" ", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+            self.assertEqual(agent.get_move(empty), (1, 1))
+            board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+            self.assertEqual(agent.get_move(board), (2, 2))
+            board = [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]]
+            self.assertIsNone(agent.get_move(board))
+            # データベースにない盤面はランダム
+            board = [["O", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+            self.assertIn(agent.get_move(board), [(i, j) for i in range(3) for j in range(3)][1:])
+            # 同じプロセス内の別インスタンスとテーブルを共有する
+            self.assertIs(DatabaseAgent("O", self.test_db, lookup=lookup).table, agent.table)
+        self.assertTrue(os.path.exists("test_tictactoe.bin"))
+
+    def test_get_move_probabilities(self):
+        """ベストムーブは確率 1、データベースにない盤面は空きマスが等確率になるか"""
+        agent = DatabaseAgent("X", self.test_db, lookup="memory")
+        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+        self.assertEqual(agent.get_move_probabilities(board), {(2, 2): 1.0})
+        board = [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]]
+        self.assertEqual(agent.get_move_probabilities(board), {})
+        board = [["O", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+        probabilities = agent.get_move_probabilities(board)
+        self.assertEqual(len(probabilities), 8)
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+
+    def test_invalid_lookup_mode(self):
+        """不明な lookup を指定すると ValueError になるか"""
+        with self.assertRaises(ValueError):
+            DatabaseAgent("X", self.test_db, lookup="unknown")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+from agents.base_agent import BaseAgent
+from agents.perfect_agent import PerfectAgent
+from agents.random_agent import RandomAgent
+from exact_evaluation import outcome_probabilities, policy_outcome_probabilities
+from opponent_pool import perfect_policy, random_policy
+from state_graph import load_state_graph
+import tournament
+
+
+class FirstEmptyAgent(BaseAgent):
+    """左上から順に最初の空きマスに打つ決定的なエージェント"""
+
+    def get_move(self, board):
+        for row in range(3):
+            for col in range(3):
+                if board[row][col] == " ":
+                    return row, col
+        return None
+
+    def get_move_probabilities(self, board):
+        move = self.get_move(board)
+        return {} if move is None else {move: 1.0}
+
+
+class TestExactEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.graph = load_state_graph()
+
+    def test_random_vs_random(self):
+        """ランダム同士の既知の確率 (737/1260, 363/1260, 160/1260) になるか"""
+        outcome = outcome_probabilities(RandomAgent("X"), RandomAgent("O"), self.graph)
+        self.assertAlmostEqual(outcome["x_wins"], 737 / 1260)
+        self.assertAlmostEqual(outcome["o_wins"], 363 / 1260)
+        self.assertAlmostEqual(outcome["draws"], 160 / 1260)
+
+    def test_deterministic_agents(self):
+        """決定的なエージェント同士は 1 つの結果が確率 1 になるか"""
+        outcome = outcome_probabilities(FirstEmptyAgent("X"), FirstEmptyAgent("O"))
+        # X が 0, 2, 4, 6 に置き、6 で斜めの列がそろう
+        self.assertEqual(outcome, {"x_wins": 1.0, "o_wins": 0.0, "draws": 0.0})
+
+    def test_agents_match_policy_tables(self):
+        """エージェントと方策テーブルで同じ確率になるか"""
+        perfect = PerfectAgent("O")
+        by_agent = outcome_probabilities(RandomAgent("X"), perfect, self.graph)
+        by_policy = policy_outcome_probabilities(
+            random_policy(), perfect_policy(), self.graph
+        )
+        for key, value in by_agent.items():
+            self.assertAlmostEqual(value, by_policy[key])
+        self.assertEqual(by_agent["x_wins"], 0.0)
+
+    def test_empty_policy_is_random(self):
+        """手のない方策テーブルは空きマスから等確率に選ぶか"""
+        empty = random_policy() * 0
+        outcome = policy_outcome_probabilities(empty, empty, self.graph)
+        self.assertAlmostEqual(outcome["x_wins"], 737 / 1260)
+
+    def test_agent_without_move_ends_in_draw(self):
+        """手のないエージェントは引き分けとして扱われるか"""
+
+        class Resigning(BaseAgent):
+            def get_move_probabilities(self, board):
+                return {}
+
+        outcome = outcome_probabilities(RandomAgent("X"), Resigning("O"), self.graph)
+        self.assertEqual(outcome["x_wins"] + outcome["o_wins"], 0.0)
+        self.assertAlmostEqual(outcome["draws"], 1.0)
+
+    def test_agent_without_probabilities(self):
+        """確率を返さないエージェントでは ValueError になるか"""
+        with self.assertRaises(ValueError):
+            outcome_probabilities(BaseAgent("X"), RandomAgent("O"), self.graph)
+
+    def test_illegal_move_raises(self):
+        """埋まっているマスに確率を与えるエージェントでは ValueError になるか"""
+
+        class Corner(BaseAgent):
+            def get_move_probabilities(self, board):
+                return {(0, 0): 1.0}
+
+        with self.assertRaisesRegex(ValueError, r"Corner.*\(0, 0\)"):
+            outcome_probabilities(Corner("X"), Corner("O"), self.graph)
+
+    def test_exact_tournament(self):
+        """exact=True の対戦では確率が記録されるか"""
+        results = tournament.run_tournament(
+            {"a": "random", "b": "perfect"}, 0, exact=True
+        )
+        self.assertTrue(results["exact"])
+        first = results["matchups"][0]
+        self.assertAlmostEqual(
+            sum(first[key] for key in ("x_wins", "o_wins", "draws")), 1.0
+        )
+        self.assertEqual(results["totals"]["b"]["losses"], 0.0)
+        self.assertEqual(results["totals"]["a"]["games"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
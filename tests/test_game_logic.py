@@ -1,6 +1,8 @@
+import random
+
 import pytest
 from unittest.mock import MagicMock
-from game_logic import TicTacToe
+from game_logic import LINES, WIN_LINE_BY_BITS, BitboardTicTacToe, TicTacToe
 
 
 @pytest.fixture
@@ -127,3 +129,173 @@ def test_is_board_full(game):
     assert not game._is_board_full()
     game.board = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
     assert game._is_board_full()
+
+
+def test_make_move_decides_winner_incrementally(game):
+    """make_move で更新されたライン集計から勝者が決まることを確認"""
+    for row, col in [(0, 0), (1, 0), (1, 1), (2, 0)]:
+        game.make_move(row, col)
+        assert game.check_winner() is None
+        game.switch_player()
+    game.make_move(2, 2)
+    assert game.moves == 5
+    assert game.check_winner() == "X"
+    assert game.winner_line == ((0, 0), (1, 1), (2, 2))
+
+
+def test_make_move_draw_on_ninth_move(game):
+    """9手目で勝者がいなければ引き分けになることを確認"""
+    for row, col in [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0)]:
+        game.make_move(row, col)
+        assert game.check_winner() is None
+        game.switch_player()
+    game.make_move(2, 2)
+    assert game._is_board_full()
+    assert game.check_winner() == "draw"
+
+
+def test_board_assignment_resyncs_counters(game):
+    """board への代入後も make_move による勝利判定が正しいことを確認"""
+    game.board = [["O", "O", " "], ["X", "X", " "], [" ", " ", " "]]
+    assert game.moves == 4
+    game.make_move(1, 2)
+    assert game.check_winner() == "X"
+    assert game.winner_line == ((1, 0), (1, 1), (1, 2))
+
+
+def test_undo_restores_winner_and_player(game):
+    """undo で勝者・勝利ライン・手番・盤面が元に戻ることを確認"""
+    for row, col in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+        game.make_move(row, col)
+        game.switch_player()
+    game.make_move(0, 2)
+    assert game.check_winner() == "X"
+
+    assert game.undo()
+    assert game.winner is None
+    assert game.winner_line is None
+    assert not game.game_over
+    assert game.current_player == "X"
+    assert game.board[0][2] == " "
+    assert game.moves == 4
+
+    # 取り消した後に別の手を打っても集計は正しい
+    game.make_move(2, 2)
+    assert game.check_winner() is None
+    game.switch_player()
+    game.make_move(1, 2)
+    assert game.check_winner() == "O"
+    assert game.winner_line == ((1, 0), (1, 1), (1, 2))
+
+
+def test_undo_without_history(game):
+    """履歴がない場合 undo が False を返すことを確認"""
+    assert not game.undo()
+
+
+# --- BitboardTicTacToe ---
+
+
+@pytest.fixture
+def bitboard_game():
+    """BitboardTicTacToe インスタンスを提供するフィクスチャ"""
+    return BitboardTicTacToe(human_player="X")
+
+
+def test_bitboard_make_move_and_board(bitboard_game):
+    """手がビットボードに反映され、board で参照できることを確認"""
+    assert bitboard_game.make_move(1, 1)
+    assert bitboard_game.board[1][1] == "X"
+    assert bitboard_game.x_bits == 1 << 4
+    assert not bitboard_game.make_move(1, 1)
+
+
+def test_bitboard_check_winner_matches_list_engine(bitboard_game):
+    """同じ盤面で TicTacToe と同じ勝者・勝利ラインを返すことを確認"""
+    boards = [
+        [["X", "X", "X"], [" ", " ", " "], [" ", " ", " "]],
+        [["O", " ", " "], ["O", " ", " "], ["O", " ", " "]],
+        [[" ", " ", "X"], [" ", "X", " "], ["X", " ", " "]],
+        [["X", "X", "X"], ["O", "X", "O"], ["O", "O", "X"]],
+        [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]],
+        [["X", "O", " "], [" ", "X", " "], [" ", " ", " "]],
+    ]
+    for board in boards:
+        assert BitboardTicTacToe._check_winner_logic(board) == (
+            TicTacToe._check_winner_logic(board)
+        )
+
+
+def test_bitboard_random_games_match_list_engine():
+    """ランダムな対局で両エンジンの状態が一致することを確認"""
+    rng = random.Random(0)
+    for _ in range(200):
+        list_game = TicTacToe()
+        bit_game = BitboardTicTacToe()
+        while not list_game.game_over:
+            row, col = rng.choice(
+                [(r, c) for r in range(3) for c in range(3) if list_game.board[r][c] == " "]
+            )
+            assert list_game.make_move(row, col) == bit_game.make_move(row, col)
+            assert list_game.check_winner() == bit_game.check_winner()
+            assert list_game.winner_line == bit_game.winner_line
+            assert list_game.board == bit_game.board
+            if not list_game.game_over:
+                list_game.switch_player()
+                bit_game.switch_player()
+
+
+def test_bitboard_undo_restores_state(bitboard_game):
+    """undo で勝者・勝利ライン・手番が元に戻ることを確認"""
+    for row, col in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+        bitboard_game.make_move(row, col)
+        bitboard_game.switch_player()
+    bitboard_game.make_move(0, 2)
+    assert bitboard_game.check_winner() == "X"
+
+    assert bitboard_game.undo()
+    assert bitboard_game.winner is None
+    assert bitboard_game.winner_line is None
+    assert not bitboard_game.game_over
+    assert bitboard_game.current_player == "X"
+    assert bitboard_game.board[0][2] == " "
+
+
+def test_bitboard_undo_empty(bitboard_game):
+    """履歴がない場合 undo が False を返すことを確認"""
+    assert not bitboard_game.undo()
+
+
+def test_bitboard_board_view_is_cached(bitboard_game):
+    """board は局面が変わるまで同じリストを返し、変わると作り直すことを確認"""
+    view = bitboard_game.board
+    assert bitboard_game.board is view
+    bitboard_game.make_move(0, 0)
+    moved = bitboard_game.board
+    assert moved is not view
+    assert moved[0][0] == "X"
+    assert bitboard_game.board is moved
+    bitboard_game.undo()
+    assert bitboard_game.board[0][0] == " "
+
+def test_bitboard_board_setter_and_full(bitboard_game):
+    """board への代入でビットが再構築されることを確認"""
+    bitboard_game.board = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
+    assert bitboard_game._is_board_full()
+    assert bitboard_game.check_winner() == "draw"
+    assert bitboard_game.winner_line is None
+
+
+def test_win_line_table_matches_list_engine():
+    """WIN_LINE_BY_BITS が TicTacToe と同じ勝利ラインを返すことを確認"""
+    for bits in range(1 << 9):
+        board = [
+            ["X" if bits >> (r * 3 + c) & 1 else " " for c in range(3)]
+            for r in range(3)
+        ]
+        winner, line = TicTacToe._check_winner_logic(board)
+        index = WIN_LINE_BY_BITS[bits]
+        if winner == "X":
+            assert LINES[index] == line
+        else:
+            assert index == -1
@@ -90,6 +90,25 @@ def test_create_agent_perfect(gm_instance):
     """Test creating a Perfect agent with a file path."""
     agent = gm_instance._create_agent("Perfect", "X")
     assert isinstance(agent, PerfectAgent)
+    # The memory-mapped binary table is preferred when it exists.
+    assert agent.move_table is not None
+
+
+def test_create_agent_perfect_ignores_stale_binary(gm_instance, tmp_path, monkeypatch):
+    """perfect_moves.json より古い perfect_moves.bin は使わない"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "perfect_moves.json").write_text("{}")
+    (tmp_path / "perfect_moves.bin").write_bytes(b"")
+    perfect_class_mock = MagicMock()
+    monkeypatch.setitem(gm_instance.AGENT_CLASSES, "Perfect", perfect_class_mock)
+
+    gm_instance._create_agent("Perfect", "X")
+    perfect_class_mock.assert_called_once_with("X", "perfect_moves.bin")
+
+    os.utime(tmp_path / "perfect_moves.bin", (0, 0))
+    perfect_class_mock.reset_mock()
+    gm_instance._create_agent("Perfect", "X")
+    perfect_class_mock.assert_called_once_with("X", "perfect_moves.json")
 
 
 def test_create_agent_with_alias(gm_instance):
@@ -215,3 +234,32 @@ def test_make_player_move_on_ai_turn_valid_move(gm_instance):
     # The move should be accepted. The board at (1,1) is now 'X'.
     assert moved_game.board[1][1] == "X"
     assert gm_instance.game is not None
+
+
+def test_create_agent_database_uses_shared_table(gm_instance):
+    """Test that Database agents share one in-memory table across games."""
+    from agents.database_agent import DatabaseAgent
+
+    agent_x = gm_instance._create_agent("Database", "X")
+    agent_o = gm_instance._create_agent("Database", "O")
+    assert isinstance(agent_x, DatabaseAgent)
+    assert agent_x.lookup == "memory"
+    assert agent_x.table is agent_o.table
+
+
+def test_create_agent_qlearning_prefers_policy_file(gm_instance, tmp_path, monkeypatch):
+    """Q-table より新しい q_policy.bin があれば推論モードで生成する"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "q_table.json").write_text("{}")
+    (tmp_path / "q_policy.bin").write_bytes(b"")
+    q_learning_class_mock = MagicMock()
+    monkeypatch.setitem(gm_instance.AGENT_CLASSES, "QLearning", q_learning_class_mock)
+
+    gm_instance._create_agent("QLearning", "X")
+    q_learning_class_mock.assert_called_once_with("X", policy_file="q_policy.bin")
+
+    # Q-table の方が新しければ、古いポリシーは使わない
+    os.utime(tmp_path / "q_policy.bin", (0, 0))
+    q_learning_class_mock.reset_mock()
+    gm_instance._create_agent("QLearning", "X")
+    q_learning_class_mock.assert_called_once_with("X", q_table_file="q_table.json")
@@ -0,0 +1,187 @@
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import league
+from agents.base_agent import BaseAgent
+from agents.perfect_agent import PerfectAgent
+from agents.q_learning_agent import QLearningAgent
+from agents.random_agent import RandomAgent
+from server.game_manager import PERFECT_MOVES_BIN, PERFECT_MOVES_FILE, prefer_binary
+
+
+class _NoProbabilityAgent(RandomAgent):
+    """手の確率を公開しない (サンプリングで評価される) エージェント"""
+
+    get_move_probabilities = BaseAgent.get_move_probabilities
+
+
+class TestBradleyTerry(unittest.TestCase):
+    def test_symmetric_results_rate_equally(self):
+        """対称な結果なら同じレーティングになり、平均が 1500 か"""
+        matchups = [
+            {"x": "a", "o": "b", "x_wins": 5, "o_wins": 5, "draws": 0, "weight": 10},
+            {"x": "b", "o": "a", "x_wins": 5, "o_wins": 5, "draws": 0, "weight": 10},
+        ]
+        ratings = league.bradley_terry(matchups, ["a", "b"])
+        self.assertAlmostEqual(ratings["a"], 1500)
+        self.assertAlmostEqual(ratings["b"], 1500)
+
+    def test_stronger_agent_rates_higher(self):
+        """勝ち越したエージェントのレーティングが高く、無敗でも有限か"""
+        matchups = [
+            {"x": "a", "o": "b", "x_wins": 1.0, "o_wins": 0, "draws": 0, "weight": 100},
+            {
+                "x": "b",
+                "o": "a",
+                "x_wins": 0,
+                "o_wins": 0.5,
+                "draws": 0.5,
+                "weight": 100,
+            },
+        ]
+        ratings = league.bradley_terry(matchups, ["a", "b"])
+        self.assertGreater(ratings["a"], ratings["b"])
+        self.assertLess(ratings["a"], 3000)
+        self.assertAlmostEqual((ratings["a"] + ratings["b"]) / 2, 1500)
+
+    def test_prior_is_one_drawn_game(self):
+        """事前分布は各組に引き分け 1 局を加えたものになるか"""
+        matchups = [
+            {"x": "a", "o": "b", "x_wins": 9, "o_wins": 0, "draws": 0, "weight": 9},
+        ]
+        ratings = league.bradley_terry(matchups, ["a", "b"])
+        # a の得点 9.5、b の得点 0.5 (10 局) の最尤推定
+        self.assertAlmostEqual(ratings["a"] - ratings["b"], 400 * math.log10(9.5 / 0.5))
+
+
+class TestLeague(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, "league.db")
+        self.q_table_file = os.path.join(self.tmpdir.name, "q_table.json")
+        self._write_q_table(0.0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_q_table(self, value):
+        with open(self.q_table_file, "w") as f:
+            json.dump({"         ": [value] * 9}, f)
+
+    def _league(self, agents=None, num_games=20):
+        agents = agents or {
+            "Random": RandomAgent,
+            "Perfect": PerfectAgent,
+            "QLearning": QLearningAgent,
+        }
+        return league.League(
+            agents,
+            model_files={"QLearningAgent": self.q_table_file},
+            cache_path=self.cache_path,
+            num_games=num_games,
+        )
+
+    def test_round_robin_exact(self):
+        """全組み合わせを先手・後手で対戦し、確率を厳密に求めるか"""
+        results = self._league().run(workers=1)
+        self.assertEqual(len(results["matchups"]), 6)
+        self.assertEqual(results["played"], 6)
+        self.assertEqual(results["cached"], 0)
+        for matchup in results["matchups"]:
+            self.assertEqual(matchup["method"], league.EXACT)
+            total = matchup["x_wins"] + matchup["o_wins"] + matchup["draws"]
+            self.assertAlmostEqual(total, 1.0)
+        ratings = results["ratings"]
+        self.assertGreater(ratings["Perfect"], ratings["Random"])
+        json.dumps(results)
+
+    def test_rerun_uses_cache(self):
+        """2回目は結果をキャッシュから読み、同じレーティングになるか"""
+        first = self._league().run(workers=1)
+        second = self._league().run(workers=1)
+        self.assertEqual(second["played"], 0)
+        self.assertEqual(second["cached"], 6)
+        self.assertEqual(first["ratings"], second["ratings"])
+
+    def test_changed_model_replays_its_matchups(self):
+        """モデルファイルが変わると、そのエージェントの対戦だけを再実行するか"""
+        first = self._league().run(workers=1)
+        self._write_q_table(1.0)
+        second = self._league().run(workers=1)
+        self.assertEqual(second["played"], 4)
+        self.assertEqual(second["cached"], 2)
+        self.assertNotEqual(first["agents"]["QLearning"], second["agents"]["QLearning"])
+        self.assertEqual(first["agents"]["Random"], second["agents"]["Random"])
+
+    def test_sampled_matchups(self):
+        """確率を公開しないエージェントとはゲーム数だけ対戦するか"""
+        agents = {"Sampled": _NoProbabilityAgent, "Perfect": PerfectAgent}
+        results = self._league(agents, num_games=30).run(workers=1)
+        for matchup in results["matchups"]:
+            self.assertEqual(matchup["method"], league.SAMPLED)
+            self.assertEqual(matchup["games"], 30)
+            total = matchup["x_wins"] + matchup["o_wins"] + matchup["draws"]
+            self.assertEqual(total, 30)
+        perfect_as_o = next(m for m in results["matchups"] if m["o"] == "Perfect")
+        self.assertEqual(perfect_as_o["x_wins"], 0)
+
+        # ゲーム数が変わると再実行する
+        rerun = self._league(agents, num_games=40).run(workers=1)
+        self.assertEqual(rerun["played"], 2)
+
+    def test_sampled_cache_is_keyed_by_seed(self):
+        """別のシードではサンプリングの対戦だけを再実行するか"""
+        agents = {
+            "Sampled": _NoProbabilityAgent,
+            "Perfect": PerfectAgent,
+            "Random": RandomAgent,
+        }
+        self._league(agents).run(workers=1, seed=1)
+        rerun = self._league(agents).run(workers=1, seed=2)
+        self.assertEqual(rerun["played"], 4)
+        self.assertEqual(rerun["cached"], 2)
+        same_seed = self._league(agents).run(workers=1, seed=1)
+        self.assertEqual(same_seed["played"], 0)
+
+    def test_cache_without_seed_is_replaced(self):
+        """シードの列がない古いキャッシュは作り直すか"""
+        conn = sqlite3.connect(self.cache_path)
+        conn.execute(
+            "CREATE TABLE matchups (x_key TEXT, o_key TEXT, method TEXT, "
+            "games INTEGER, x_wins REAL, o_wins REAL, draws REAL, "
+            "PRIMARY KEY (x_key, o_key, method, games))"
+        )
+        conn.commit()
+        conn.close()
+        results = self._league().run(workers=1)
+        self.assertEqual(results["played"], 6)
+
+    def test_parallel_matches_inline(self):
+        """並列に実行しても 1 プロセスと同じ結果になるか"""
+        agents = {"Sampled": _NoProbabilityAgent, "Perfect": PerfectAgent}
+        inline = self._league(agents).run(workers=1, seed=3)
+        os.remove(self.cache_path)
+        parallel = self._league(agents).run(workers=2, seed=3)
+        self.assertEqual(inline["matchups"], parallel["matchups"])
+
+    def test_default_model_files_match_server(self):
+        """既定のモデルファイルはサーバーと同じ選び方になるか"""
+        perfect = league.League({"Perfect": PerfectAgent}, cache_path=self.cache_path)
+        self.assertEqual(
+            perfect.model_file("Perfect"),
+            prefer_binary(PERFECT_MOVES_BIN, PERFECT_MOVES_FILE),
+        )
+
+    def test_default_agents_exclude_chatgpt(self):
+        """既定の参加者は検出されたエージェントで、ChatGPT を除くか"""
+        agents = league.League(cache_path=self.cache_path).agents
+        self.assertNotIn("ChatGPT", agents)
+        self.assertIn(QLearningAgent, agents.values())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest
+from unittest.mock import patch
+
 from agents.minimax_agent import MinimaxAgent
 
 
@@ -94,6 +96,14 @@ class TestMinimaxAgent(unittest.TestCase):
         move = self.agent.get_move(board)
         self.assertEqual(move, (1, 1))
 
+    def test_search_does_not_touch_caller_board(self):
+        """探索が例外で中断しても、渡した盤面が変更されないか"""
+        board = [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+        with patch.object(self.agent, "_search", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.agent.get_move(board)
+        self.assertEqual(board, [["X", " ", " "], [" ", " ", " "], [" ", " ", " "]])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from move_table import (
+    MISSING,
+    TERMINAL,
+    build_move_table,
+    open_move_table,
+    write_move_table,
+)
+from state_graph import NUM_CODES, string_to_code
+
+
+class TestMoveTable(unittest.TestCase):
+    def test_build_move_table(self):
+        """盤面コードの位置に最善手と番兵値が入るか"""
+        table = build_move_table([("         ", 4), ("XXXOO    ", -1)])
+        self.assertEqual(len(table), NUM_CODES)
+        self.assertEqual(table[string_to_code("         ")], 4)
+        self.assertEqual(table[string_to_code("XXXOO    ")], TERMINAL)
+        self.assertEqual(table[string_to_code("X        ")], MISSING)
+
+    def test_write_and_open_move_table(self):
+        """書き出したファイルをメモリマップで読み、同じファイルは共有されるか"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "moves.bin")
+            write_move_table(path, [("X        ", 4)])
+            table = open_move_table(path)
+            self.assertEqual(table[string_to_code("X        ")], 4)
+            self.assertIs(open_move_table(path), table)
+            table.close()
+
+    def test_open_invalid_file(self):
+        """サイズが合わないファイルは ValueError になるか"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "broken.bin")
+            with open(path, "wb") as f:
+                f.write(b"\x00" * 10)
+            with self.assertRaises(ValueError):
+                open_move_table(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+import fast_trainer
+from agents.minimax_agent import MinimaxAgent
+from agents.perfect_agent import PerfectAgent
+from opponent_pool import (
+    OpponentPool,
+    minimax_policy,
+    perfect_policy,
+    policy_from_moves,
+    random_policy,
+    snapshot_policy,
+)
+from state_graph import NUM_CODES, code_to_string, load_state_graph, string_to_code
+from symmetry import string_to_board
+
+
+def moves_of(policy, board_str):
+    mask = int(policy[string_to_code(board_str)])
+    return [i for i in range(9) if mask >> i & 1]
+
+
+class TestOpponentPool(unittest.TestCase):
+    def test_random_policy_allows_every_legal_move(self):
+        """ランダム方策は空きマスすべてを候補にし、終局盤面では手がないか"""
+        policy = random_policy()
+        self.assertEqual(policy.shape, (NUM_CODES,))
+        self.assertEqual(moves_of(policy, "X   O    "), [1, 2, 3, 5, 6, 7, 8])
+        self.assertEqual(moves_of(policy, "XXXOO    "), [])
+
+    def test_minimax_policy_matches_minimax_agent(self):
+        """Minimax 方策が MinimaxAgent と同じ手を選ぶか"""
+        policy = minimax_policy()
+        graph = load_state_graph()
+        rng = np.random.default_rng(0)
+        playable = np.flatnonzero(~graph.terminal & (graph.moves >= 3))
+        for sid in rng.choice(playable, size=20, replace=False):
+            board_str = code_to_string(int(graph.codes[sid]))
+            player = "X" if graph.moves[sid] % 2 == 0 else "O"
+            row, col = MinimaxAgent(player).get_move(string_to_board(board_str))
+            self.assertEqual(moves_of(policy, board_str), [row * 3 + col])
+
+    def test_perfect_policy_matches_perfect_agent(self):
+        """完全AI方策が PerfectAgent と同じ手を選ぶか"""
+        policy = perfect_policy()
+        agent = PerfectAgent("O")
+        for board_str in ("X        ", "X   O   X", "XO  X    "):
+            row, col = agent.get_move(string_to_board(board_str))
+            self.assertEqual(moves_of(policy, board_str), [row * 3 + col])
+
+    def test_policy_from_moves_ignores_sentinels(self):
+        """手表の番兵値 (TERMINAL / MISSING) は手なしになるか"""
+        moves = np.full(NUM_CODES, 0xFE, dtype=np.uint8)
+        moves[0] = 4
+        policy = policy_from_moves(moves)
+        self.assertEqual(policy[0], 1 << 4)
+        self.assertEqual(np.count_nonzero(policy), 1)
+
+    def test_snapshot_policy_keeps_ties(self):
+        """スナップショットは同点の最善手をすべて残し、未訪問の盤面はランダムになるか"""
+        values = np.zeros((NUM_CODES, 9))
+        visited = np.zeros(NUM_CODES, dtype=np.uint8)
+        code = string_to_code("X        ")
+        values[code] = [-1e9, 5, 1, 5, 0, 0, 0, 0, 0]
+        visited[code] = 1
+        policy = snapshot_policy(values, visited)
+        self.assertEqual(moves_of(policy, "X        "), [1, 3])
+        self.assertEqual(len(moves_of(policy, "    X    ")), 8)
+
+    def test_pool_stacks_policies_and_snapshots(self):
+        """プールが方策を一度だけ構築して積み重ね、自己対戦のスナップショットを更新するか"""
+        pool = OpponentPool(["random", "self"])
+        self.assertEqual(pool.stack().shape, (2, NUM_CODES))
+        self.assertEqual(pool.index("self"), 1)
+        agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 0.0, 0.0, 0.0, True)
+        agent.q_table.set_table({"         ": [0, 0, 0, 0, 9, 0, 0, 0, 0]})
+        pool.snapshot(agent.q_table)
+        self.assertEqual(moves_of(pool.policy("self"), "         "), [4])
+        with self.assertRaises(ValueError):
+            pool.add("unknown")
+
+    def test_train_native_with_policy_stack(self):
+        """方策テーブルの積み重ねとスケジュールでネイティブ学習できるか"""
+        pool = OpponentPool(["perfect", "random"])
+        agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+        schedule = np.array([0, 1] * 50, dtype=np.uint8)
+        self.assertGreater(
+            agent.train_native(pool.stack(), 100, 3, 0, 100, schedule), 0
+        )
+        with self.assertRaises(ValueError):
+            agent.train_native(pool.stack(), 2, 0, 0, 2, np.array([0, 2]))
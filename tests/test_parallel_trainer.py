@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import fast_trainer
+from parallel_trainer import merge_shards, train_parallel, train_shard
+from state_graph import string_to_code
+from train_q_learning import load_opponent_moves, train_q_learning_agent_parallel
+
+PARAMS = (0.1, 0.9, 1.0, 0.05, 0.0)
+
+
+def make_agent():
+    return fast_trainer.FastQLearningAgent("X", *PARAMS, True)
+
+
+class TestParallelTrainer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.opponent_moves = load_opponent_moves()
+
+    def test_merge_shards_weights_by_updates(self):
+        """更新回数で重み付けした平均で統合され、未更新の値は保たれるか"""
+        states = np.array([0, 5], dtype=np.int32)
+        first = np.zeros((2, 9))
+        second = np.zeros((2, 9))
+        first[0, 4], second[0, 4] = 10.0, 40.0
+        first[1, 1] = second[1, 1] = -1e9
+        counts_first = np.zeros((2, 9), dtype=np.uint32)
+        counts_second = np.zeros((2, 9), dtype=np.uint32)
+        counts_first[0, 4], counts_second[0, 4] = 2, 1
+        merged_states, merged_values = merge_shards(
+            [
+                (states, first, counts_first),
+                (states[:1], second[:1], counts_second[:1]),
+            ]
+        )
+        self.assertEqual(merged_states.tolist(), [0, 5])
+        self.assertAlmostEqual(merged_values[0, 4], 20.0)
+        self.assertEqual(merged_values[1, 1], -1e9)
+
+    def test_train_shard_uses_global_episode_numbers(self):
+        """奇数番目から始まる区間では学習者が O として学習するか"""
+        empty = np.zeros(0, dtype=np.int32), np.zeros((0, 9))
+        codes, _, counts, updates = train_shard(
+            PARAMS, *empty, self.opponent_moves, 1, 1, 10, seed=0
+        )
+        self.assertGreater(updates, 0)
+        # 完全AIが先手で (0, 0) に打った盤面から学習者の更新が始まる
+        first_state = string_to_code("X        ")
+        self.assertGreater(counts[codes.tolist().index(first_state)].sum(), 0)
+        self.assertNotIn(0, codes[counts.sum(axis=1) > 0].tolist())
+
+    def test_train_parallel_is_seeded(self):
+        """同じシードとワーカー数で同じQテーブルになり、探索率が減衰するか"""
+        tables = []
+        for _ in range(2):
+            agent = make_agent()
+            synced = []
+            updates = train_parallel(
+                agent,
+                self.opponent_moves,
+                2000,
+                workers=2,
+                sync_every=300,
+                seed=11,
+                on_sync=lambda done, updates: synced.append(done),
+            )
+            self.assertGreater(updates, 0)
+            self.assertEqual(synced, [600, 1200, 1800, 2000])
+            self.assertLess(agent.exploration_rate, 0.06)
+            tables.append(agent.q_table.get_table())
+        self.assertEqual(tables[0], tables[1])
+
+    @patch("builtins.print")
+    def test_train_q_learning_agent_parallel_saves_checkpoints(self, mock_print):
+        """マージごとにチェックポイントが QLearningAgent 形式で保存されるか"""
+        with patch("train_q_learning.QLearningAgent.save_q_table") as mock_save:
+            train_q_learning_agent_parallel(
+                1000, False, workers=2, sync_every=200, seed=1
+            )
+        # 400 と 800 エピソード時点のチェックポイントと最後の保存
+        self.assertEqual(mock_save.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
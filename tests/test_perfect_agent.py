@@ -1,5 +1,9 @@
+import json
+import os
+import tempfile
 import unittest
 from agents.perfect_agent import PerfectAgent
+from symmetry import canonicalize, to_canonical_move, transform_string
 
 
 class TestPerfectAgent(unittest.TestCase):
@@ -87,5 +91,67 @@ class TestPerfectAgent(unittest.TestCase):
         self.assertEqual(self.agent.index_to_move(8), (2, 2))
 
 
+    def test_get_move_with_symmetry(self):
+        """use_symmetry=True で対称な盤面に対して対応する手が選ばれるか"""
+        agent = PerfectAgent("O", use_symmetry=True)
+        board_str = "X        "
+        canonical_moves = set()
+        for t in range(8):
+            image = transform_string(board_str, t)
+            board = [list(image[r * 3 : r * 3 + 3]) for r in range(3)]
+            row, col = agent.get_move(board)
+            self.assertEqual(board[row][col], " ")
+            canonical_moves.add(to_canonical_move(row * 3 + col, canonicalize(image)[1]))
+        self.assertEqual(len(canonical_moves), 1)
+
+
+    def test_perfect_moves_shared_between_instances(self):
+        """同じファイルの手順表がインスタンス間で共有され、読み取り専用か"""
+        other = PerfectAgent("O")
+        self.assertIs(other.perfect_moves, self.agent.perfect_moves)
+        with self.assertRaises(TypeError):
+            other.perfect_moves["         "] = 8
+
+    def test_perfect_moves_reloaded_when_file_changes(self):
+        """ファイルが更新された場合だけ再読み込みされるか"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "moves.json")
+            with open(path, "w") as f:
+                json.dump({"         ": 4}, f)
+            first = PerfectAgent("X", perfect_moves_file=path)
+            again = PerfectAgent("X", perfect_moves_file=path)
+            self.assertIs(again.perfect_moves, first.perfect_moves)
+
+            with open(path, "w") as f:
+                json.dump({"         ": 8, "X        ": 4}, f)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+            second = PerfectAgent("X", perfect_moves_file=path)
+            self.assertIsNot(second.perfect_moves, first.perfect_moves)
+            self.assertEqual(second.get_move([[" "] * 3 for _ in range(3)]), (2, 2))
+
+    def test_binary_table_matches_json(self):
+        """バイナリ形式の手順表で JSON と同じ手が選ばれるか"""
+        agent = PerfectAgent("X", perfect_moves_file="perfect_moves.bin")
+        self.assertIsNone(agent.perfect_moves)
+        for board_str, best_move in list(self.agent.perfect_moves.items())[:500]:
+            board = [list(board_str[r * 3 : r * 3 + 3]) for r in range(3)]
+            if best_move == -1:
+                with self.assertRaises(KeyError):
+                    agent.get_move(board)
+            else:
+                self.assertEqual(agent.get_move(board), divmod(best_move, 3))
+
+    def test_binary_table_shared_and_missing_board(self):
+        """バイナリ形式はインスタンス間で共有され、未登録の盤面は KeyError になるか"""
+        agent = PerfectAgent("X", perfect_moves_file="perfect_moves.bin")
+        other = PerfectAgent("O", perfect_moves_file="perfect_moves.bin")
+        self.assertIs(other.move_table, agent.move_table)
+        board = [["O", "O", "O"], ["X", "X", " "], [" ", " ", " "]]
+        with self.assertRaises(KeyError):
+            agent.get_move(board)
+        with self.assertRaises(FileNotFoundError):
+            PerfectAgent("X", perfect_moves_file="nonexistent.bin")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from policy_table import (
+    compile_policy,
+    export_policy,
+    open_policy_table,
+    write_policy_table,
+)
+from q_table_io import q_table_to_arrays, save_q_table_npz
+from state_graph import NUM_CODES, string_to_code
+from symmetry import canonicalize, from_canonical_move
+
+
+class TestPolicyTable(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "q_policy.bin")
+        # 空盤面は中央と角 (0) が同点、X を角に置いた盤面は 5 が最善
+        self.q_table = {
+            "         ": [2.0, 0.0, 0.0, 0.0, 2.0, 0.0, 0.0, 0.0, 0.0],
+            "X        ": [-1e9, 0.0, 0.0, 0.0, 0.0, 3.0, 0.0, 0.0, 0.0],
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_compile_keeps_ties(self):
+        """同点の最善手がすべてビットとして残り、未訪問の盤面は合法手すべてになるか"""
+        policy = compile_policy(*q_table_to_arrays(self.q_table))
+        self.assertEqual(policy.dtype, np.uint16)
+        self.assertEqual(policy[0], 0b000010001)
+        self.assertEqual(policy[string_to_code("X        ")], 1 << 5)
+        self.assertEqual(policy[string_to_code("    X    ")], 0b111101111)
+        # 終局した盤面と到達不能な盤面は 0
+        self.assertEqual(policy[string_to_code("XXXOO    ")], 0)
+        self.assertEqual(policy[string_to_code("XXXXXXXXX")], 0)
+
+    def test_compile_expands_symmetric_table(self):
+        """正規形だけのQテーブルから、すべての向きの盤面の手が得られるか"""
+        # X を右下の角に置いた盤面 (正規形) では 5 が最善
+        q_table = {"        X": [0.0, 0.0, 0.0, 0.0, 0.0, 3.0, 0.0, 0.0, -1e9]}
+        policy = compile_policy(*q_table_to_arrays(q_table), use_symmetry=True)
+        for board_str in ("X        ", "  X      ", "      X  ", "        X"):
+            canonical, transform = canonicalize(board_str)
+            self.assertEqual(canonical, "        X")
+            expected = 1 << from_canonical_move(5, transform)
+            self.assertEqual(policy[string_to_code(board_str)], expected)
+
+    def test_write_and_open(self):
+        """3**9 個の uint16 として書き出し、読み取り専用でメモリマップできるか"""
+        policy = compile_policy(*q_table_to_arrays(self.q_table))
+        write_policy_table(self.path, policy)
+        self.assertEqual(os.path.getsize(self.path), 2 * NUM_CODES)
+        table = open_policy_table(self.path)
+        self.assertFalse(table.flags.writeable)
+        np.testing.assert_array_equal(table, policy)
+
+    def test_invalid_file(self):
+        """サイズの異なるファイルや要素数の異なる配列を拒否するか"""
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * NUM_CODES)
+        with self.assertRaises(ValueError):
+            open_policy_table(self.path)
+        with self.assertRaises(ValueError):
+            write_policy_table(self.path, np.zeros(9, dtype=np.uint16))
+
+    def test_export_json_and_npz(self):
+        """JSON と .npz のQテーブルから同じポリシーファイルを生成するか"""
+        json_path = os.path.join(self.tmpdir.name, "q_table.json")
+        npz_path = os.path.join(self.tmpdir.name, "q_table.npz")
+        with open(json_path, "w") as f:
+            json.dump(self.q_table, f)
+        save_q_table_npz(npz_path, *q_table_to_arrays(self.q_table))
+        self.assertEqual(export_policy(json_path, self.path), 2)
+        from_json = np.array(open_policy_table(self.path))
+        self.assertEqual(export_policy(npz_path, self.path), 2)
+        np.testing.assert_array_equal(open_policy_table(self.path), from_json)
+
+    def test_export_reads_use_symmetry_metadata(self):
+        """.npz のメタデータに use_symmetry があれば対称展開するか"""
+        npz_path = os.path.join(self.tmpdir.name, "q_table.npz")
+        q_table = {"        X": [0.0, 0.0, 0.0, 0.0, 0.0, 3.0, 0.0, 0.0, -1e9]}
+        save_q_table_npz(npz_path, *q_table_to_arrays(q_table), {"use_symmetry": True})
+        export_policy(npz_path, self.path)
+        table = open_policy_table(self.path)
+        self.assertEqual(bin(int(table[string_to_code("X        ")])).count("1"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
+import tempfile
 import unittest
 import os
 import json
 from unittest.mock import patch
 from agents.q_learning_agent import QLearningAgent
 from game_logic import TicTacToe
+from policy_table import write_policy_table
+from q_table_io import QuantizedRows, save_q_table_npz
+from state_graph import string_to_code
+from symmetry import string_to_board
 import numpy as np
 
 
@@ -130,3 +135,244 @@ class TestQLearningAgent(unittest.TestCase):
         # 環境変数を元に戻す
         if original_pytest_current_test:
             os.environ["PYTEST_CURRENT_TEST"] = original_pytest_current_test
+
+
+class TestDenseQTable(unittest.TestCase):
+    def setUp(self):
+        self.agent = QLearningAgent("X", q_table_file="nonexistent_q_table.json")
+
+    def test_q_table_is_dense_array(self):
+        """Qテーブルが盤面コードで引く (3**9, 9) の配列に保存されるか"""
+        from state_graph import NUM_CODES, string_to_code
+
+        table = self.agent._fast_agent.q_table
+        self.assertEqual(table.values.shape, (NUM_CODES, 9))
+        self.agent.update_q_table("X        ", 4, 1.0, "X   O    ")
+        self.assertIn("X        ", table)
+        self.assertIn("X   O    ", table)
+        self.assertEqual(len(table), 2)
+        row = table.values[string_to_code("X        ")]
+        self.assertEqual(row[0], -1e9)
+        self.assertAlmostEqual(row[4], 0.1)
+        self.assertIsNone(table.get_values("XO       "))
+
+    def test_q_table_round_trip(self):
+        """辞書との相互変換で値と訪問済みの盤面が保たれるか"""
+        q_table = {"         ": [float(i) for i in range(9)], "X        ": [1.0] * 9}
+        self.agent.q_table = q_table
+        self.assertEqual(self.agent.q_table, q_table)
+        self.agent.q_table = {}
+        self.assertEqual(self.agent.q_table, {})
+
+    def test_invalid_state_raises(self):
+        """不正な盤面文字列は ValueError になるか"""
+        with self.assertRaises(ValueError):
+            self.agent.update_q_table("bad", 0, 1.0, "         ")
+
+
+class TestBinaryQTable(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "q_table.npz")
+        # load_q_table はテスト中はファイルを読まないため一時的に外す
+        self.pytest_current_test = os.environ.pop("PYTEST_CURRENT_TEST", None)
+
+    def tearDown(self):
+        if self.pytest_current_test is not None:
+            os.environ["PYTEST_CURRENT_TEST"] = self.pytest_current_test
+        self.tmpdir.cleanup()
+
+    def test_save_and_load_npz(self):
+        """.npz 形式で保存したQテーブルとメタデータを読み込めるか"""
+        agent = QLearningAgent("X", q_table_file=self.path, learning_rate=0.2)
+        agent.update_q_table("         ", 4, 10.0, "    X    ")
+        agent.episodes_trained = 500
+        agent.seed = 7
+        agent.save_q_table()
+
+        loaded = QLearningAgent("X", q_table_file=self.path, is_training=False)
+        self.assertEqual(loaded.q_table, agent.q_table)
+        self.assertEqual(loaded.episodes_trained, 500)
+        self.assertEqual(loaded.seed, 7)
+        self.assertEqual(loaded.get_move([[" "] * 3 for _ in range(3)]), (1, 1))
+
+    def test_read_only_agent_uses_mapped_rows(self):
+        """読み取り専用のエージェントは密な表にコピーせず、マップした行を引くか"""
+        agent = QLearningAgent("X", q_table_file=self.path)
+        agent.update_q_table("         ", 4, 10.0, "    X    ")
+        agent.update_q_table("X   O    ", 8, 5.0, "X   O   X")
+        agent.save_q_table()
+
+        loaded = QLearningAgent("X", q_table_file=self.path, is_training=False)
+        self.assertIsInstance(loaded._mapped[1], np.memmap)
+        self.assertEqual(len(loaded._fast_agent.q_table), 0)
+        board = [["X", " ", " "], [" ", "O", " "], [" ", " ", " "]]
+        self.assertEqual(loaded.get_move(board), (2, 2))
+        self.assertEqual(loaded.get_move_probabilities(board), {(2, 2): 1.0})
+        # 表にない盤面は空きマスから選び、表は変更しない
+        unvisited = [["O", " ", " "], [" ", " ", " "], [" ", " ", " "]]
+        self.assertIn(
+            loaded.get_move(unvisited), loaded.get_move_probabilities(unvisited)
+        )
+        self.assertEqual(loaded.q_table, agent.q_table)
+
+        # 更新するときは密な表にコピーしてから更新する
+        loaded.update_q_table("         ", 0, 1.0, "X        ")
+        self.assertIsNone(loaded._mapped)
+        self.assertIn("X   O    ", loaded._fast_agent.q_table)
+        self.assertNotEqual(loaded.q_table["         "][0], 0.0)
+
+    def test_read_only_agent_keeps_quantized_rows(self):
+        """量子化したQテーブルは量子化したまま保持し、1行ずつ復元して引くか"""
+        save_q_table_npz(
+            self.path,
+            [string_to_code("X   O    ")],
+            [[-1e9, 0.1, 0.2, 0.3, -1e9, 0.5, 0.6, 0.7, 0.9]],
+            dtype="int8",
+        )
+        loaded = QLearningAgent("X", q_table_file=self.path, is_training=False)
+        rows = loaded._mapped[1]
+        self.assertIsInstance(rows, QuantizedRows)
+        self.assertEqual(rows.quantized.dtype, np.int8)
+        board = [["X", " ", " "], [" ", "O", " "], [" ", " ", " "]]
+        self.assertEqual(loaded.get_move(board), (2, 2))
+        self.assertEqual(loaded.get_move_probabilities(board), {(2, 2): 1.0})
+
+        # 更新するときは float64 に戻して密な表にコピーする
+        loaded.update_q_table("X   O    ", 1, 1.0, "XX  O    ")
+        self.assertIsNone(loaded._mapped)
+        self.assertAlmostEqual(loaded.q_table["X   O    "][8], 0.9, places=2)
+
+    def test_invalid_npz_starts_empty(self):
+        """読み込めない .npz ファイルの場合、空のQテーブルになるか"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a zip file")
+        with patch("builtins.print"):
+            agent = QLearningAgent("X", q_table_file=self.path)
+        self.assertEqual(agent.q_table, {})
+
+
+class TestMoveProbabilities(unittest.TestCase):
+    def setUp(self):
+        self.agent = QLearningAgent(
+            "X", q_table_file="nonexistent_q_table.json", exploration_rate=0.2
+        )
+        self.board = [["X", "O", " "], [" ", " ", " "], [" ", " ", " "]]
+
+    def test_unvisited_board_is_uniform(self):
+        """Qテーブルにない盤面は空きマスが等確率で、テーブルは変更されないか"""
+        probabilities = self.agent.get_move_probabilities(self.board)
+        self.assertEqual(len(probabilities), 7)
+        for p in probabilities.values():
+            self.assertAlmostEqual(p, 1 / 7)
+        self.assertEqual(self.agent.q_table, {})
+
+    def test_exploration_mixed_with_greedy_moves(self):
+        """探索率の分を一様に、残りを最善手に割り当てるか"""
+        self.agent.q_table = {
+            "XO       ": [-1e9, -1e9, 1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+        }
+        probabilities = self.agent.get_move_probabilities(self.board)
+        self.assertAlmostEqual(probabilities[(0, 2)], 0.2 / 7 + 0.4)
+        self.assertAlmostEqual(probabilities[(1, 1)], 0.2 / 7 + 0.4)
+        self.assertAlmostEqual(probabilities[(2, 2)], 0.2 / 7)
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+
+    def test_symmetric_table(self):
+        """use_symmetry では正規形の最善手を元の盤面の手に戻すか"""
+        agent = QLearningAgent(
+            "X",
+            q_table_file="nonexistent_q_table.json",
+            is_training=False,
+            use_symmetry=True,
+        )
+        agent.update_q_table("X        ", 1, 10.0, "XO       ")
+        for board_str in ("X        ", "  X      ", "      X  ", "        X"):
+            board = string_to_board(board_str)
+            probabilities = agent.get_move_probabilities(board)
+            self.assertEqual(list(probabilities.values()), [1.0])
+            self.assertEqual(list(probabilities), [agent.get_move(board)])
+
+
+class TestPolicyInference(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "q_policy.bin")
+        policy = np.zeros(3**9, dtype=np.uint16)
+        policy[0] = 0b000010001  # 空盤面では 0 と 4 が同点
+        write_policy_table(self.path, policy)
+        self.agent = QLearningAgent("X", policy_file=self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_move_from_policy(self):
+        """ポリシーの同点手の中からランダムに選ぶか"""
+        board = [[" "] * 3 for _ in range(3)]
+        moves = {self.agent.get_move(board) for _ in range(50)}
+        self.assertEqual(moves, {(0, 0), (1, 1)})
+        self.assertFalse(self.agent.is_training)
+        self.assertEqual(self.agent.q_table, {})
+
+    def test_board_outside_policy(self):
+        """ポリシーが 0 の盤面では空きマスから選び、満杯なら None を返すか"""
+        board = [["X", "O", "X"], ["O", "X", "O"], ["O", "X", " "]]
+        self.assertEqual(self.agent.get_move(board), (2, 2))
+        board[2][2] = "O"
+        self.assertIsNone(self.agent.get_move(board))
+
+    def test_move_probabilities_from_policy(self):
+        """推論モードでは同点手が等確率になるか"""
+        board = [[" "] * 3 for _ in range(3)]
+        self.assertEqual(
+            self.agent.get_move_probabilities(board), {(0, 0): 0.5, (1, 1): 0.5}
+        )
+
+    def test_read_only(self):
+        """推論モードでは Q テーブルの更新と保存を拒否するか"""
+        with self.assertRaises(RuntimeError):
+            self.agent.update_q_table("         ", 4, 1.0, "    X    ")
+        with self.assertRaises(RuntimeError):
+            self.agent.save_q_table()
+
+
+class TestSymmetricUpdates(unittest.TestCase):
+    def setUp(self):
+        self.agent = QLearningAgent(
+            "X", q_table_file="nonexistent_q_table.json", symmetric_updates=True
+        )
+
+    def test_update_reaches_all_images(self):
+        """1 回の更新が対称な盤面と対応する手のすべてに適用されるか"""
+        from state_graph import string_to_code
+
+        table = self.agent._fast_agent.q_table
+        self.agent.update_q_table("X        ", 1, 1.0, "XO       ")
+        # X を角に置いた 4 盤面と、辺の 2 通りの手で 8 エントリ
+        self.assertEqual(int(table.counts.sum()), 8)
+        self.assertAlmostEqual(table.values[string_to_code("X        "), 1], 0.1)
+        self.assertAlmostEqual(table.values[string_to_code("X        "), 3], 0.1)
+        self.assertAlmostEqual(table.values[string_to_code("        X"), 5], 0.1)
+        self.assertAlmostEqual(table.values[string_to_code("        X"), 7], 0.1)
+        self.assertIn("X  O     ", table)
+        # 初期化は各盤面の行だけに行われ、他の行の非合法手を書き換えない
+        row = table.values[string_to_code("  X      ")]
+        self.assertEqual(row[2], -1e9)
+        self.assertEqual((row == -1e9).sum(), 1)
+
+    def test_invariant_images_are_updated_once(self):
+        """対称変換で自分自身に移る (盤面, 手) は 1 回だけ更新されるか"""
+        table = self.agent._fast_agent.q_table
+        self.agent.update_q_table("         ", 4, 1.0, "    X    ")
+        self.assertEqual(int(table.counts.sum()), 1)
+        self.assertAlmostEqual(table.get_values("         ")[4], 0.1)
+
+    def test_conflicts_with_use_symmetry(self):
+        """use_symmetry と同時に指定すると ValueError になるか"""
+        with self.assertRaises(ValueError):
+            QLearningAgent(
+                "X",
+                q_table_file="nonexistent_q_table.json",
+                use_symmetry=True,
+                symmetric_updates=True,
+            )
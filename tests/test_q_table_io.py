@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from q_table_io import (
+    QuantizedRows,
+    arrays_to_q_table,
+    convert_json_to_npz,
+    dequantize_values,
+    load_q_table_file,
+    load_q_table_npz,
+    quantize_values,
+    q_table_to_arrays,
+    save_q_table_npz,
+)
+from state_graph import string_to_code
+
+
+class TestQTableIO(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "q_table.npz")
+        self.q_table = {
+            "X        ": [-1e9, 0.5, 0.0, 1.0, 2.0, 0.0, 0.0, 0.0, 0.0],
+            "         ": [float(i) for i in range(9)],
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_and_load(self):
+        """状態コード順に保存され、値とメタデータが復元されるか"""
+        states, values = q_table_to_arrays(self.q_table)
+        metadata = {"episodes_trained": 10, "seed": 3}
+        save_q_table_npz(self.path, states, values, metadata)
+        states, values, metadata = load_q_table_npz(self.path)
+        self.assertEqual(states.tolist(), [0, string_to_code("X        ")])
+        self.assertEqual(values.shape, (2, 9))
+        self.assertEqual(metadata["episodes_trained"], 10)
+        self.assertEqual(metadata["seed"], 3)
+        self.assertEqual(arrays_to_q_table(states, values), self.q_table)
+
+    def test_load_with_mmap(self):
+        """mmap=True の場合、値がメモリマップされた読み取り専用配列になるか"""
+        states, values = q_table_to_arrays(self.q_table)
+        save_q_table_npz(self.path, states, values)
+        states, values, _ = load_q_table_npz(self.path, mmap=True)
+        self.assertIsInstance(values, np.memmap)
+        self.assertFalse(values.flags.writeable)
+        self.assertEqual(arrays_to_q_table(states, values), self.q_table)
+
+    def test_empty_table(self):
+        """空のQテーブルも保存・読み込みできるか"""
+        save_q_table_npz(self.path, [], np.zeros((0, 9)))
+        states, values, _ = load_q_table_npz(self.path, mmap=True)
+        self.assertEqual(len(states), 0)
+        self.assertEqual(values.shape, (0, 9))
+
+    def test_convert_json_to_npz(self):
+        """既存の JSON 形式のQテーブルを変換できるか"""
+        json_path = os.path.join(self.tmpdir.name, "q_table.json")
+        with open(json_path, "w") as f:
+            json.dump(self.q_table, f)
+        self.assertEqual(convert_json_to_npz(json_path, self.path), 2)
+        states, values, metadata = load_q_table_npz(self.path)
+        self.assertEqual(arrays_to_q_table(states, values), self.q_table)
+        self.assertEqual(metadata["source"], json_path)
+
+    def test_quantize_values(self):
+        """非合法手が番兵値ではなくビットマスクになり、量子化誤差が小さいか"""
+        _, values = q_table_to_arrays(self.q_table)
+        for dtype, tolerance in (("float16", 1e-2), ("int8", 8 / 254)):
+            quantized, legal, quantization = quantize_values(values, dtype)
+            self.assertEqual(quantized.dtype, np.dtype(dtype))
+            self.assertEqual(legal.tolist(), [0b111111110, 0b111111111])
+            self.assertEqual(quantized[0, 0], 0)
+            restored = dequantize_values(quantized, legal, quantization)
+            self.assertEqual(restored[0, 0], -1e9)
+            np.testing.assert_allclose(restored[:, 1:], values[:, 1:], atol=tolerance)
+        with self.assertRaises(ValueError):
+            quantize_values(values, "int4")
+
+    def test_save_and_load_quantized(self):
+        """量子化して保存したQテーブルが float64 と番兵値に復元されるか"""
+        states, values = q_table_to_arrays(self.q_table)
+        save_q_table_npz(self.path, states, values, {"seed": 1}, dtype="int8")
+        with np.load(self.path) as data:
+            self.assertEqual(data["values"].dtype, np.int8)
+            self.assertEqual(data["legal"].dtype, np.uint16)
+        for mmap in (False, True):
+            states, restored, metadata = load_q_table_npz(self.path, mmap=mmap)
+            self.assertEqual(restored.dtype, np.float64)
+            self.assertEqual(restored[1, 0], -1e9)
+            self.assertEqual(np.argmax(restored[0]), 8)
+            self.assertEqual(metadata["quantization"]["dtype"], "int8")
+            self.assertEqual(metadata["seed"], 1)
+
+    def test_load_quantized_rows(self):
+        """dequantize=False なら量子化したまま返し、1行ずつ復元できるか"""
+        states, values = q_table_to_arrays(self.q_table)
+        save_q_table_npz(self.path, states, values, dtype="int8")
+        expected = load_q_table_npz(self.path)[1]
+        for mmap in (False, True):
+            _, rows, _ = load_q_table_npz(self.path, mmap=mmap, dequantize=False)
+            self.assertIsInstance(rows, QuantizedRows)
+            self.assertEqual(rows.quantized.dtype, np.int8)
+            self.assertEqual(rows.shape, (2, 9))
+            np.testing.assert_array_equal(rows[1], expected[1])
+            np.testing.assert_array_equal(np.asarray(rows), expected)
+
+    def test_load_q_table_file(self):
+        """JSON と .npz のどちらのQテーブルも同じ配列として読み込めるか"""
+        json_path = os.path.join(self.tmpdir.name, "q_table.json")
+        with open(json_path, "w") as f:
+            json.dump(self.q_table, f)
+        convert_json_to_npz(json_path, self.path)
+        states, values, metadata = load_q_table_file(json_path)
+        self.assertEqual(metadata, {})
+        self.assertEqual(arrays_to_q_table(states, values), self.q_table)
+        states, values, _ = load_q_table_file(self.path)
+        self.assertEqual(arrays_to_q_table(states, values), self.q_table)
+
+    def test_not_a_q_table(self):
+        """Qテーブル以外の .npz ファイルは ValueError になるか"""
+        np.savez(self.path, other=np.zeros(3))
+        with self.assertRaises(ValueError):
+            load_q_table_npz(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from q_table_io import q_table_to_arrays
+from quantization_report import quantization_report
+from state_graph import load_state_graph
+
+
+class TestQuantizationReport(unittest.TestCase):
+    def test_exact_table(self):
+        """量子化で値が変わらないQテーブルは、すべての局面で方策が一致するか"""
+        q_table = {
+            "         ": [0.0, 0.0, 0.0, 0.0, 100.0, 0.0, 0.0, 0.0, 0.0],
+            "X        ": [-1e9, 0.0, 0.0, 0.0, -200.0, 100.0, 0.0, 0.0, 0.0],
+        }
+        graph = load_state_graph()
+        report = quantization_report(*q_table_to_arrays(q_table), "float16")
+        self.assertEqual(report["positions"], int((~graph.terminal).sum()))
+        self.assertEqual(report["same_policy"], 1.0)
+        self.assertEqual(report["optimal"], 1.0)
+        self.assertEqual(report["max_error"], 0.0)
+        self.assertEqual(report["bytes"], 2 * 9 * 2 + 2 * 2)
+        self.assertEqual(report["float64_bytes"], 2 * 9 * 8)
+
+    def test_int8_merges_close_values(self):
+        """int8 で近い値が同点になると、一致率と最善手のみの割合が下がるか"""
+        q_table = {
+            "         ": [-200.0, 0.0, 0.0, 0.0, 100.0, 99.99, 0.0, 0.0, 0.0],
+        }
+        report = quantization_report(*q_table_to_arrays(q_table), "int8")
+        self.assertLess(report["same_policy"], 1.0)
+        self.assertLess(report["optimal"], 1.0)
+        self.assertGreater(report["max_error"], 0.0)
+        self.assertLess(report["max_error"], 300 / 254)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,15 @@ class TestRandomAgent(unittest.TestCase):
         move = self.agent.get_move(board)
         self.assertIsNone(move)
 
+    def test_get_move_probabilities(self):
+        """空きマスが等確率になり、埋まった盤面では空になるか"""
+        board = [["X", "O", " "], [" ", " ", " "], [" ", " ", " "]]
+        probabilities = self.agent.get_move_probabilities(board)
+        self.assertEqual(len(probabilities), 7)
+        self.assertAlmostEqual(probabilities[(0, 2)], 1 / 7)
+        board = [["X", "O", "X"], ["X", "O", "X"], ["O", "X", "O"]]
+        self.assertEqual(self.agent.get_move_probabilities(board), {})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from solver import DRAW, LOSS, WIN, solve
+from state_graph import StateGraph
+
+
+class TestSolver(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = StateGraph.build()
+        cls.solution = solve(cls.graph)
+
+    def test_empty_board_is_draw(self):
+        """空の盤面は引き分けで、全ての手が最適か"""
+        self.assertEqual(self.solution.value[0], DRAW)
+        self.assertEqual(self.solution.distance[0], 9)
+        self.assertEqual(self.solution.optimal_moves[0], 0b111111111)
+
+    def test_immediate_win(self):
+        """即勝ちできる盤面で勝ち・距離 1・勝ち手が選ばれるか"""
+        sid = self.graph.id_of_string("XX OO    ")
+        self.assertEqual(self.solution.value[sid], WIN)
+        self.assertEqual(self.solution.distance[sid], 1)
+        self.assertEqual(self.solution.best_move[sid], 2)
+        self.assertEqual(self.solution.optimal_moves[sid], 1 << 2)
+
+    def test_lost_position(self):
+        """ダブルリーチを受けた盤面は負けと判定されるか"""
+        sid = self.graph.id_of_string("XX OX  O ")
+        # O の手番。X は 2 と 8 の二箇所で勝てる
+        self.assertEqual(self.solution.value[sid], LOSS)
+        self.assertEqual(self.solution.optimal_moves[sid], self.graph.legal[sid])
+
+    def test_terminal_states(self):
+        """終局盤面は best_move が -1 で、勝敗が確定しているか"""
+        terminal = self.graph.terminal
+        self.assertTrue((self.solution.best_move[terminal] == -1).all())
+        self.assertTrue((self.solution.distance[terminal] == 0).all())
+        self.assertTrue((self.solution.value[self.graph.winner == 2] == DRAW).all())
+
+    def test_best_moves_match_perfect_moves(self):
+        """最善手が perfect_moves.json（minimax で生成）と一致するか"""
+        with open("perfect_moves.json", "r", encoding="latin-1") as f:
+            perfect_moves = json.load(f)
+        for sid in range(len(self.graph)):
+            board_str = self.graph.board_string(sid)
+            self.assertEqual(self.solution.best_move[sid], perfect_moves[board_str])
+            if perfect_moves[board_str] >= 0:
+                self.assertTrue(
+                    self.solution.optimal_moves[sid] >> perfect_moves[board_str] & 1
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
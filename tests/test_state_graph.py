@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import state_graph
+from batch_game_logic import DRAW, ONGOING, O_WINS, PLAYER_O, PLAYER_X, X_WINS
+from game_logic import TicTacToe
+from state_graph import (
+    StateGraph,
+    board_to_code,
+    cells_to_codes,
+    code_to_string,
+    load_state_graph,
+    string_to_code,
+)
+
+
+class TestStateGraph(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = StateGraph.build()
+
+    def test_codes_round_trip(self):
+        """盤面と base-3 コードの相互変換"""
+        board = [["X", "O", " "], [" ", "X", " "], [" ", " ", "O"]]
+        code = board_to_code(board)
+        self.assertEqual(code, string_to_code("XO  X   O"))
+        self.assertEqual(code_to_string(code), "XO  X   O")
+        cells = np.array([[1, -1, 0, 0, 1, 0, 0, 0, -1]], dtype=np.int8)
+        self.assertEqual(cells_to_codes(cells)[0], code)
+
+    def test_reachable_states_match_perfect_moves(self):
+        """到達可能な盤面が perfect_moves.json の盤面と一致するか"""
+        with open("perfect_moves.json", "r", encoding="latin-1") as f:
+            perfect_moves = json.load(f)
+        self.assertEqual(len(self.graph), 5478)
+        boards = {self.graph.board_string(sid) for sid in range(len(self.graph))}
+        self.assertEqual(boards, set(perfect_moves))
+
+    def test_terminal_counts(self):
+        """終局盤面の数（X 勝ち 626 / O 勝ち 316 / 引き分け 16）"""
+        counts = {v: int((self.graph.winner == v).sum()) for v in (X_WINS, O_WINS, DRAW)}
+        self.assertEqual(counts, {X_WINS: 626, O_WINS: 316, DRAW: 16})
+        np.testing.assert_array_equal(self.graph.terminal, self.graph.winner != ONGOING)
+        self.assertTrue((self.graph.legal[self.graph.terminal] == 0).all())
+
+    def test_successors_and_winner_line(self):
+        """後続状態・手番・勝利ラインが TicTacToe と一致するか"""
+        game = TicTacToe()
+        sid = self.graph.id_of_board(game.board)
+        self.assertEqual(sid, 0)
+        for row, col in [(0, 0), (1, 0), (1, 1), (2, 0), (2, 2)]:
+            self.assertEqual(
+                self.graph.to_move[sid], PLAYER_X if game.current_player == "X" else PLAYER_O
+            )
+            self.assertTrue(self.graph.legal[sid] >> (row * 3 + col) & 1)
+            sid = int(self.graph.successors[sid, row * 3 + col])
+            game.make_move(row, col)
+            game.switch_player()
+            self.assertEqual(sid, self.graph.id_of_board(game.board))
+        game.check_winner()
+        self.assertEqual(self.graph.winner[sid], X_WINS)
+        self.assertEqual(self.graph.winner_line_of(sid), game.winner_line)
+
+    def test_unreachable_board(self):
+        """到達不能な盤面の ID が -1 になるか"""
+        self.assertEqual(self.graph.id_of_string("OOO      "), -1)
+
+    def test_load_state_graph_caches_on_disk(self):
+        """load_state_graph がディスクにキャッシュし、再読み込みできるか"""
+        path = os.path.join(tempfile.mkdtemp(), "state_graph.npz")
+        graph = load_state_graph(path)
+        self.assertTrue(os.path.exists(path))
+        self.assertIs(load_state_graph(path), graph)
+        self.assertFalse(graph.successors.flags.writeable)
+
+        state_graph._cache.pop(path)
+        reloaded = load_state_graph(path)
+        np.testing.assert_array_equal(reloaded.successors, self.graph.successors)
+        np.testing.assert_array_equal(reloaded.state_id, self.graph.state_id)
+
+    def test_load_state_graph_rebuilds_corrupt_cache(self):
+        """途中までしか書かれていないキャッシュを作り直すか"""
+        path = os.path.join(tempfile.mkdtemp(), "state_graph.npz")
+        self.graph.save(path)
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) // 2)
+
+        graph = load_state_graph(path)
+        np.testing.assert_array_equal(graph.successors, self.graph.successors)
+        state_graph._cache.pop(path)
+        np.testing.assert_array_equal(load_state_graph(path).codes, self.graph.codes)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["state_graph.npz"])
+
+
+    def test_load_state_graph_without_writable_cache(self):
+        """キャッシュを書き込めなくても、メモリ上のグラフを返すか"""
+        path = os.path.join(tempfile.mkdtemp(), "state_graph.npz")
+        with patch.object(StateGraph, "save", side_effect=PermissionError(path)):
+            graph = load_state_graph(path)
+        np.testing.assert_array_equal(graph.successors, self.graph.successors)
+        self.assertFalse(os.path.exists(path))
+        self.assertIs(load_state_graph(path), graph)
+
+if __name__ == "__main__":
+    unittest.main()
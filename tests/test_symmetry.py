@@ -0,0 +1,65 @@
+import json
+import unittest
+
+from symmetry import (
+    INVERSE_TRANSFORMS,
+    TRANSFORMS,
+    board_to_string,
+    canonicalize,
+    from_canonical_move,
+    is_canonical,
+    string_to_board,
+    to_canonical_move,
+    transform_string,
+)
+
+
+class TestSymmetry(unittest.TestCase):
+    def test_transforms_are_distinct_permutations(self):
+        """8 つの変換がすべて異なる置換であるか"""
+        self.assertEqual(len(set(TRANSFORMS)), 8)
+        for perm, inverse in zip(TRANSFORMS, INVERSE_TRANSFORMS):
+            self.assertEqual(sorted(perm), list(range(9)))
+            self.assertEqual([perm[inverse[i]] for i in range(9)], list(range(9)))
+
+    def test_canonicalize_is_invariant(self):
+        """対称な盤面がすべて同じ正規形になるか"""
+        board_str = "XO  X   O"
+        canonical, transform = canonicalize(board_str)
+        self.assertEqual(transform_string(board_str, transform), canonical)
+        for t in range(8):
+            self.assertEqual(canonicalize(transform_string(board_str, t))[0], canonical)
+        self.assertTrue(is_canonical(canonical))
+
+    def test_canonical_board_uses_identity(self):
+        """正規形の盤面では恒等変換が返るか"""
+        canonical, _ = canonicalize("X        ")
+        self.assertEqual(canonicalize(canonical), (canonical, 0))
+
+    def test_move_round_trip(self):
+        """手のインデックスが変換前後で対応しているか"""
+        board_str = "X O  X  O"
+        for t in range(8):
+            image = transform_string(board_str, t)
+            for index in range(9):
+                canonical_index = to_canonical_move(index, t)
+                self.assertEqual(image[canonical_index], board_str[index])
+                self.assertEqual(from_canonical_move(canonical_index, t), index)
+
+    def test_reachable_states_shrink(self):
+        """perfect_moves.json の盤面数が正規化で約 1/8 になるか"""
+        with open("perfect_moves.json", "r", encoding="latin-1") as f:
+            boards = json.load(f).keys()
+        canonical = {canonicalize(board)[0] for board in boards}
+        self.assertEqual(len(boards), 5478)
+        self.assertEqual(len(canonical), 765)
+
+    def test_board_string_conversion(self):
+        """盤面リストと文字列の相互変換"""
+        board = [["X", "O", " "], [" ", "X", " "], [" ", " ", "O"]]
+        self.assertEqual(board_to_string(board), "XO  X   O")
+        self.assertEqual(string_to_board("XO  X   O"), board)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import fast_trainer
+import tournament
+from evaluate_models import evaluate_models
+from opponent_pool import perfect_policy, random_policy
+from policy_table import write_policy_table
+from state_graph import NUM_CODES
+
+
+class TestPlayPolicies(unittest.TestCase):
+    def test_deterministic_by_seed(self):
+        """同じシードなら同じ結果になり、合計がゲーム数に一致するか"""
+        policy = random_policy()
+        counts = fast_trainer.play_policies(policy, policy, 2000, 5)
+        self.assertEqual(counts, fast_trainer.play_policies(policy, policy, 2000, 5))
+        self.assertNotEqual(counts, fast_trainer.play_policies(policy, policy, 2000, 6))
+        self.assertEqual(sum(counts), 2000)
+
+    def test_empty_policy_plays_random(self):
+        """手のない方策は空きマスからランダムに選ぶか"""
+        empty = np.zeros(NUM_CODES, dtype=np.uint16)
+        x_wins, o_wins, draws = fast_trainer.play_policies(empty, empty, 20000, 1)
+        # ランダム同士の先手勝率は約 58.5%
+        self.assertAlmostEqual(x_wins / 20000, 0.585, delta=0.02)
+
+    def test_perfect_never_loses(self):
+        """完全AIはランダム相手に先手でも後手でも負けないか"""
+        perfect, rand = perfect_policy(), random_policy()
+        self.assertEqual(fast_trainer.play_policies(perfect, rand, 5000, 1)[1], 0)
+        self.assertEqual(fast_trainer.play_policies(rand, perfect, 5000, 1)[0], 0)
+
+
+class TestTournament(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.policy_file = os.path.join(self.tmpdir.name, "q_policy.bin")
+        write_policy_table(self.policy_file, random_policy())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_results_independent_of_workers(self):
+        """ワーカー数によらず同じ結果になるか"""
+        models = {"a": self.policy_file, "b": "perfect"}
+        with patch.object(tournament, "CHUNK_GAMES", 300):
+            single = tournament.run_tournament(models, 1000, workers=1, seed=3)
+            parallel = tournament.run_tournament(models, 1000, workers=2, seed=3)
+        self.assertEqual(single, parallel)
+
+    def test_matchups_and_totals(self):
+        """すべての組み合わせを先手・後手で対戦し、合計が集計されるか"""
+        models = {"a": "random", "b": "perfect", "c": self.policy_file}
+        results = tournament.run_tournament(models, 500, workers=1)
+        self.assertEqual(len(results["matchups"]), 6)
+        for matchup in results["matchups"]:
+            self.assertEqual(
+                matchup["x_wins"] + matchup["o_wins"] + matchup["draws"], 500
+            )
+        self.assertEqual(results["totals"]["b"]["losses"], 0)
+        self.assertEqual(results["totals"]["a"]["games"], 2000)
+        wins = sum(total["wins"] for total in results["totals"].values())
+        losses = sum(total["losses"] for total in results["totals"].values())
+        self.assertEqual(wins, losses)
+        json.dumps(results)
+
+    def test_models_loaded_once(self):
+        """同じモデルファイルは 1 回だけ読み込まれるか"""
+        with patch.object(
+            tournament, "load_policy", return_value=random_policy()
+        ) as load_policy:
+            pool = tournament.load_models({"a": "m.json", "b": "m.json"})
+        load_policy.assert_called_once_with("m.json")
+        self.assertEqual(pool.names, ["a", "b"])
+
+    def test_invalid_num_games(self):
+        """ゲーム数が 0 以下なら ValueError になるか"""
+        with self.assertRaises(ValueError):
+            tournament.run_tournament({"a": "random", "b": "perfect"}, 0)
+
+    def test_evaluate_models_writes_json(self):
+        """evaluate_models が結果を JSON に保存するか"""
+        output = os.path.join(self.tmpdir.name, "results.json")
+        with patch("builtins.print"):
+            results = evaluate_models(
+                self.policy_file, "perfect", 200, workers=1, output=output
+            )
+        with open(output) as f:
+            self.assertEqual(json.load(f), results)
+        self.assertEqual(results["totals"]["Agent2"]["losses"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,24 @@
+import io
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call, PropertyMock
 import sys
+import numpy as np
+import fast_trainer
 from train_q_learning import (
     train_q_learning_agent,
+    train_q_learning_agent_native,
+    train_q_learning_agent_batch,
+    train_q_learning_agent_curriculum,
+    train_q_learning_agent_exact,
+    load_opponent_moves,
     main,
 )
 from agents.q_learning_agent import QLearningAgent
+from state_graph import string_to_code
+from training_metrics import TrainingMonitor
 
 
 class TestTrainQLearning(unittest.TestCase):
@@ -95,7 +108,9 @@ class TestTrainQLearning(unittest.TestCase):
     def test_main_with_episodes(self, mock_train):
         """--episodesオプションが正しく渡される"""
         main()
-        mock_train.assert_called_once_with(100, False)
+        mock_train.assert_called_once_with(
+            100, False, symmetric_updates=False, monitor=None
+        )
 
     @patch(
         "sys.argv", ["train_q_learning.py", "--episodes", "50", "--continue_training"]
@@ -104,7 +119,9 @@ class TestTrainQLearning(unittest.TestCase):
     def test_main_with_continue(self, mock_train):
         """--continue_trainingオプションが正しく渡される"""
         main()
-        mock_train.assert_called_once_with(50, True)
+        mock_train.assert_called_once_with(
+            50, True, symmetric_updates=False, monitor=None
+        )
 
     @patch("train_q_learning.PerfectAgent")
     @patch("train_q_learning.TicTacToe")
@@ -229,6 +246,263 @@ class TestTrainQLearning(unittest.TestCase):
         args, kwargs = mock_agent.update_q_table.call_args
         self.assertAlmostEqual(args[2], -200.1)
 
+    @patch(
+        "sys.argv",
+        [
+            "train_q_learning.py",
+            "--episodes",
+            "10",
+            "--engine",
+            "native",
+            "--seed",
+            "7",
+        ],
+    )
+    @patch("train_q_learning.train_q_learning_agent_native")
+    def test_main_native_engine(self, mock_train_native):
+        """--engine native でネイティブ学習ループが呼ばれる"""
+        main()
+        mock_train_native.assert_called_once_with(
+            10, False, seed=7, symmetric_updates=False, monitor=None
+        )
+
+    @patch(
+        "sys.argv",
+        [
+            "train_q_learning.py",
+            "--episodes",
+            "10",
+            "--engine",
+            "batch",
+            "--batch-size",
+            "4",
+        ],
+    )
+    @patch("train_q_learning.train_q_learning_agent_batch")
+    def test_main_batch_engine(self, mock_train_batch):
+        """--engine batch でバッチ学習が呼ばれる"""
+        main()
+        mock_train_batch.assert_called_once_with(
+            10, False, batch_size=4, seed=None, symmetric_updates=False, monitor=None
+        )
+
+    @patch("train_q_learning.QLearningAgent.save_q_table")
+    @patch("builtins.print")
+    def test_train_q_learning_agent_batch(self, mock_print, mock_save):
+        """バッチ学習の結果が保存され、速度が表示される"""
+        train_q_learning_agent_batch(
+            100, continue_training=False, batch_size=16, seed=1
+        )
+        mock_save.assert_called_once()
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn("episodes/sec", printed)
+
+    @patch(
+        "sys.argv",
+        ["train_q_learning.py", "--episodes", "10", "--workers", "4", "--seed", "2"],
+    )
+    @patch("train_q_learning.train_q_learning_agent_parallel")
+    def test_main_workers(self, mock_train_parallel):
+        """--workers 2 以上で複数プロセスの学習が呼ばれる"""
+        main()
+        mock_train_parallel.assert_called_once_with(
+            10,
+            False,
+            4,
+            sync_every=10000,
+            seed=2,
+            symmetric_updates=False,
+            monitor=None,
+        )
+
+    def test_train_native_is_seeded(self):
+        """ネイティブ学習ループが同じシードで同じQ値を生成する"""
+        opponent_moves = load_opponent_moves()
+        results = []
+        for _ in range(2):
+            agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+            updates = agent.train_native(opponent_moves, 200, 42)
+            self.assertGreater(updates, 0)
+            self.assertLess(agent.exploration_rate, 1.0)
+            results.append(agent.q_table.values)
+        np.testing.assert_array_equal(results[0], results[1])
+        # 空盤面の合法手はすべて更新対象で、非合法手の番兵値はない
+        self.assertTrue((results[0][string_to_code("         ")] > -1e9).all())
+
+    def test_train_native_slices_match_single_call(self):
+        """前の呼び出しの rng_state を引き継げば、分割しても同じQ値になるか"""
+        opponent_moves = load_opponent_moves()
+        whole = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+        whole.train_native(opponent_moves, 300, 42)
+        sliced = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+        rng_state = 42
+        for first_episode in range(0, 300, 70):
+            size = min(70, 300 - first_episode)
+            sliced.train_native(opponent_moves, size, rng_state, first_episode, 300)
+            rng_state = sliced.rng_state
+        self.assertEqual(sliced.rng_state, whole.rng_state)
+        np.testing.assert_array_equal(sliced.q_table.values, whole.q_table.values)
+
+    @patch("train_q_learning.QLearningAgent.save_q_table")
+    @patch("builtins.print")
+    def test_train_q_learning_agent_native(self, mock_print, mock_save):
+        """ネイティブ学習の結果が QLearningAgent の q_table 形式で保存される"""
+        train_q_learning_agent_native(100, continue_training=False, seed=1)
+        mock_save.assert_called_once()
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn("episodes/sec", printed)
+
+    @patch(
+        "sys.argv",
+        [
+            "train_q_learning.py",
+            "--episodes",
+            "10",
+            "--engine",
+            "native",
+            "--symmetric-updates",
+        ],
+    )
+    @patch("train_q_learning.train_q_learning_agent_native")
+    def test_main_symmetric_updates(self, mock_train_native):
+        """--symmetric-updates が学習関数に渡される"""
+        main()
+        mock_train_native.assert_called_once_with(
+            10, False, seed=None, symmetric_updates=True, monitor=None
+        )
+
+    @patch(
+        "sys.argv",
+        ["train_q_learning.py", "--episodes", "10", "--curriculum", "plan.json"],
+    )
+    @patch("train_q_learning.train_q_learning_agent_curriculum")
+    def test_main_curriculum(self, mock_train_curriculum):
+        """--curriculum でカリキュラム学習が呼ばれる"""
+        main()
+        mock_train_curriculum.assert_called_once_with(
+            10, False, "plan.json", seed=None, symmetric_updates=False, monitor=None
+        )
+
+    @patch(
+        "sys.argv",
+        [
+            "train_q_learning.py",
+            "--engine",
+            "exact",
+            "--opponent",
+            "random",
+            "--episodes",
+            "5000",
+        ],
+    )
+    @patch("train_q_learning.train_q_learning_agent_exact")
+    def test_main_exact_engine(self, mock_train_exact):
+        """--engine exact で価値反復が指定した相手に対して呼ばれる"""
+        main()
+        mock_train_exact.assert_called_once_with("random", max_sampled_episodes=5000)
+
+    @patch("train_q_learning.QLearningAgent.save_q_table")
+    @patch("builtins.print")
+    def test_train_q_learning_agent_exact(self, mock_print, mock_save):
+        """価値反復の Q テーブルが保存され、サンプル学習との比較が表示される"""
+        train_q_learning_agent_exact("perfect", max_sampled_episodes=1000)
+        mock_save.assert_called_once()
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn("4520 states", printed)
+        self.assertIn("Sampled Q-learning", printed)
+
+    @patch(
+        "sys.argv",
+        [
+            "train_q_learning.py",
+            "--engine",
+            "native",
+            "--stop-when-perfect",
+            "--metrics-every",
+            "500",
+        ],
+    )
+    @patch("train_q_learning.train_q_learning_agent_native")
+    def test_main_stop_when_perfect(self, mock_train_native):
+        """--stop-when-perfect で早期終了するモニターが渡される"""
+        main()
+        monitor = mock_train_native.call_args.kwargs["monitor"]
+        self.assertTrue(monitor.stop_when_perfect)
+        self.assertEqual(monitor.every, 500)
+        self.assertIsNone(monitor.path)
+
+    @patch("train_q_learning.QLearningAgent.save_q_table")
+    @patch("builtins.print")
+    def test_batch_and_curriculum_stop_when_perfect(self, mock_print, mock_save):
+        """バッチ学習とカリキュラム学習でも、完全にプレイできたら早期終了する"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            plan = os.path.join(tmpdir, "plan.json")
+            with open(plan, "w") as f:
+                json.dump({"stages": [{"opponents": {"perfect": 1}}]}, f)
+            runs = (
+                lambda monitor: train_q_learning_agent_batch(
+                    200000, False, batch_size=1024, seed=1, monitor=monitor
+                ),
+                lambda monitor: train_q_learning_agent_curriculum(
+                    200000, False, plan, seed=1, monitor=monitor
+                ),
+            )
+            for run in runs:
+                monitor = TrainingMonitor(None, 10000, stop_when_perfect=True)
+                run(monitor)
+                self.assertIsNotNone(monitor.stopped_at)
+                self.assertLess(monitor.stopped_at, 200000)
+                self.assertEqual(monitor.records[-1]["episodes"], monitor.stopped_at)
+
+    def _assert_rejected(self, argv):
+        with patch("sys.argv", ["train_q_learning.py"] + argv), patch(
+            "sys.stderr", new_callable=io.StringIO
+        ) as stderr:
+            with self.assertRaises(SystemExit):
+                main()
+        return stderr.getvalue()
+
+    def test_main_workers_conflicting_engine(self):
+        """--workers と native 以外のエンジンを同時に指定するとエラーになる"""
+        for engine in ("python", "batch"):
+            message = self._assert_rejected(["--engine", engine, "--workers", "4"])
+            self.assertIn("--workers", message)
+        self._assert_rejected(["--workers", "0"])
+
+    def test_main_curriculum_conflicting_options(self):
+        """--curriculum と別のエンジンや --workers を同時に指定するとエラーになる"""
+        for argv in (["--engine", "batch"], ["--engine", "exact"], ["--workers", "2"]):
+            message = self._assert_rejected(["--curriculum", "plan.json"] + argv)
+            self.assertIn("--curriculum", message)
+
+    def test_main_exact_conflicting_options(self):
+        """--engine exact が使わないオプションを指定するとエラーになる"""
+        for argv in (
+            ["--continue_training"],
+            ["--seed", "1"],
+            ["--symmetric-updates"],
+            ["--workers", "2"],
+            ["--stop-when-perfect"],
+            ["--metrics", "metrics.csv"],
+        ):
+            self._assert_rejected(["--engine", "exact"] + argv)
+        message = self._assert_rejected(["--engine", "native", "--opponent", "random"])
+        self.assertIn("--opponent", message)
+
+
+    def test_main_rejects_unused_options(self):
+        """選んだエンジンが使わない --seed・--batch-size・--sync-every はエラーになる"""
+        for argv, option in (
+            (["--seed", "1"], "--seed"),
+            (["--engine", "python", "--seed", "1"], "--seed"),
+            (["--batch-size", "8"], "--batch-size"),
+            (["--engine", "native", "--batch-size", "8"], "--batch-size"),
+            (["--workers", "2", "--batch-size", "8"], "--batch-size"),
+            (["--sync-every", "100"], "--sync-every"),
+            (["--engine", "native", "--sync-every", "100"], "--sync-every"),
+            (["--workers", "1", "--sync-every", "100"], "--sync-every"),
+        ):
+            self.assertIn(option, self._assert_rejected(argv))
 
 if __name__ == "__main__":
     unittest.main()
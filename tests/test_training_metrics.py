@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import fast_trainer
+from opponent_pool import perfect_policy
+from state_graph import NUM_CODES
+from training_metrics import METRIC_FIELDS, PolicyChecker, TrainingMonitor
+from train_q_learning import train_q_learning_agent_native
+
+
+def trained_agent(num_episodes):
+    agent = fast_trainer.FastQLearningAgent("X", 0.1, 0.9, 1.0, 0.05, 0.0, True)
+    agent.train_native(perfect_policy(), num_episodes, 0)
+    return agent
+
+
+class TestPolicyChecker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.checker = PolicyChecker()
+
+    def test_untrained_table_disagrees(self):
+        """未学習のQテーブル（全手同点）は完全な方策と一致しないか"""
+        agreement, path_agreement = self.checker.agreement(np.zeros((NUM_CODES, 9)))
+        self.assertLess(agreement, 1.0)
+        self.assertLess(path_agreement, 1.0)
+
+    def test_trained_table_plays_perfectly(self):
+        """十分に学習したQテーブルは実際に到達する盤面で完全に一致するか"""
+        agent = trained_agent(30000)
+        _, path_agreement = self.checker.agreement(agent.q_table.values)
+        self.assertEqual(path_agreement, 1.0)
+
+
+class TestTrainingMonitor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.agent = trained_agent(1000)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_csv_records(self):
+        """CSV ファイルにヘッダーと各記録が書き出されるか"""
+        path = os.path.join(self.tmpdir.name, "metrics.csv")
+        monitor = TrainingMonitor(path, every=500)
+        self.assertFalse(monitor.record(500, 4000, self.agent))
+        self.assertFalse(monitor.record(1000, 8000, self.agent))
+        monitor.close()
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(tuple(rows[0]), METRIC_FIELDS)
+        self.assertEqual(rows[1]["episodes"], "1000")
+        self.assertEqual(int(rows[1]["q_table_states"]), len(self.agent.q_table))
+
+    def test_jsonl_records(self):
+        """.csv 以外の拡張子では JSON Lines で書き出されるか"""
+        path = os.path.join(self.tmpdir.name, "metrics.jsonl")
+        monitor = TrainingMonitor(path, every=500)
+        monitor.record(500, 4000, self.agent)
+        monitor.close()
+        with open(path) as f:
+            row = json.loads(f.readline())
+        self.assertEqual(row["episodes"], 500)
+        self.assertGreater(row["updates_per_sec"], 0)
+        self.assertAlmostEqual(row["exploration_rate"], self.agent.exploration_rate)
+
+    @patch("train_q_learning.QLearningAgent.save_q_table")
+    @patch("builtins.print")
+    def test_native_training_stops_when_perfect(self, mock_print, mock_save):
+        """--stop-when-perfect 相当の設定で収束した時点で学習が止まるか"""
+        monitor = TrainingMonitor(every=5000, stop_when_perfect=True)
+        train_q_learning_agent_native(200000, False, seed=0, monitor=monitor)
+        self.assertIsNotNone(monitor.stopped_at)
+        self.assertLess(monitor.stopped_at, 200000)
+        self.assertEqual(monitor.records[-1]["path_agreement"], 1.0)
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn(f"Stopped after {monitor.stopped_at} episodes", printed)
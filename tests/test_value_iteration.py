@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from opponent_pool import perfect_policy, random_policy
+from state_graph import NUM_CODES, string_to_code
+from value_iteration import (
+    DRAW_REWARD,
+    ILLEGAL_Q,
+    STEP_REWARD,
+    WIN_REWARD,
+    episodes_to_match,
+    expected_return,
+    q_value_iteration,
+)
+
+
+def dense(states, values):
+    table = np.zeros((NUM_CODES, 9))
+    table[states] = values
+    return table
+
+
+class TestValueIteration(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.perfect = perfect_policy()
+        cls.random = random_policy()
+        cls.states, cls.values, cls.sweeps = q_value_iteration(cls.perfect)
+        cls.table = dense(cls.states, cls.values)
+
+    def test_converges_in_few_sweeps(self):
+        """非巡回なゲームグラフなので数回の掃引で不動点に達するか"""
+        self.assertLessEqual(self.sweeps, 7)
+        self.assertEqual(len(self.states), 4520)
+
+    def test_terminal_rewards(self):
+        """勝ちで終わる手と引き分けで終わる手の Q 値が報酬そのものか"""
+        row = self.table[string_to_code("XX OO    ")]
+        self.assertAlmostEqual(row[2], STEP_REWARD + WIN_REWARD)
+        self.assertEqual(row[0], ILLEGAL_Q)
+        row = self.table[string_to_code("XOXXOOOX ")]
+        self.assertAlmostEqual(row[8], STEP_REWARD + DRAW_REWARD)
+
+    def test_optimal_policy_never_loses_to_perfect(self):
+        """完全AI相手の最適方策は負けず、期待収益が引き分けの価値になるか"""
+        value = expected_return(self.table, self.perfect)
+        zero = expected_return(np.zeros((NUM_CODES, 9)), self.perfect)
+        self.assertGreater(value, zero)
+        self.assertGreater(value, 0.0)
+        self.assertLess(value, DRAW_REWARD)
+
+    def test_opponent_changes_values(self):
+        """ランダム相手では勝てる分だけ期待収益が高くなるか"""
+        states, values, _ = q_value_iteration(self.random)
+        random_value = expected_return(dense(states, values), self.random)
+        self.assertGreater(random_value, expected_return(self.table, self.perfect))
+
+    def test_episodes_to_match(self):
+        """届く目標なら最初の試行の回数を、届かなければ None を返すか"""
+        self.assertEqual(episodes_to_match(self.perfect, -1e6, max_episodes=1000), 1000)
+        self.assertIsNone(episodes_to_match(self.perfect, 1e6, max_episodes=2000))
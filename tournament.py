@@ -0,0 +1,158 @@
+"""
+tournament.py: Parallel matches between Q-learning models and built-in agents.
+
+Each model is loaded once as an opponent_pool policy table:
+
+    q_table.json / .npz   The greedy policy of the Q-table with its tied best
+                          moves (policy_table.load_policy); agents evaluated
+                          with is_training=False do not explore.
+    q_policy.bin          A compiled policy file, memory-mapped.
+    random / minimax / perfect
+                          The tables of RandomAgent, MinimaxAgent and
+                          PerfectAgent.
+
+Games are played in C by fast_trainer.play_policies. The games of every
+matchup are split into chunks of CHUNK_GAMES that run on a process pool. The
+seed of a chunk derives from the tournament seed, the matchup and the chunk
+index, so the counts are the same for any number of workers.
+
+With exact=True no games are sampled: every matchup is evaluated by
+exact_evaluation.policy_outcome_probabilities, and counts become probabilities.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fast_trainer
+from exact_evaluation import policy_outcome_probabilities
+from opponent_pool import OpponentPool, minimax_policy, perfect_policy, random_policy
+from policy_table import load_policy
+
+CHUNK_GAMES = 50000
+
+_BUILT_IN = {
+    "random": random_policy,
+    "minimax": minimax_policy,
+    "perfect": perfect_policy,
+}
+
+
+def load_models(models: dict) -> OpponentPool:
+    """
+    Loads every model once.
+
+    Args:
+        models (dict): {name: model}; a model is a built-in opponent name
+            ("random", "minimax", "perfect") or a Q-table / policy file.
+
+    Returns:
+        OpponentPool: The policy table of each model under its name.
+    """
+    pool = OpponentPool()
+    loaded = {}
+    for name, model in models.items():
+        if model not in loaded:
+            build = _BUILT_IN.get(model)
+            loaded[model] = build() if build else load_policy(model)
+        pool.add(name, loaded[model])
+    return pool
+
+
+def _chunks(num_games: int) -> list:
+    return [
+        min(CHUNK_GAMES, num_games - first)
+        for first in range(0, num_games, CHUNK_GAMES)
+    ]
+
+
+def run_tournament(
+    models: dict,
+    num_games: int,
+    workers: int | None = None,
+    seed: int = 0,
+    exact: bool = False,
+) -> dict:
+    """
+    Plays every model against every other one, as X and as O.
+
+    Args:
+        models (dict): {name: model} as for load_models().
+        num_games (int): Games per matchup (ordered pair of models).
+        workers (int | None): Worker processes (os.cpu_count() when None);
+            1 plays in this process.
+        seed (int): Seed of the tournament.
+        exact (bool): Compute exact probabilities instead of playing games.
+
+    Returns:
+        dict: JSON-serializable results: the settings, one entry per matchup
+            with "x", "o", "x_wins", "o_wins" and "draws", and per-model
+            "totals" of wins, draws, losses and games. With exact, matchups
+            hold probabilities, and totals sum them with one game per matchup.
+
+    Raises:
+        ValueError: If num_games is not positive (and exact is not set).
+    """
+    if num_games <= 0 and not exact:
+        raise ValueError("num_games must be positive")
+    pool = load_models(models)
+    pairs = [(x, o) for x in pool.names for o in pool.names if x != o]
+    if exact:
+        outcomes = [
+            policy_outcome_probabilities(pool.policy(x), pool.policy(o))
+            for x, o in pairs
+        ]
+        return _results(models, pool, pairs, outcomes, 1, seed, exact)
+    jobs = [
+        (
+            pool.policy(x),
+            pool.policy(o),
+            games,
+            fast_trainer.derive_seed(seed, index, chunk),
+        )
+        for index, (x, o) in enumerate(pairs)
+        for chunk, games in enumerate(_chunks(num_games))
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        counts = [fast_trainer.play_policies(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            counts = list(executor.map(fast_trainer.play_policies, *zip(*jobs)))
+
+    chunks_per_pair = len(_chunks(num_games))
+    outcomes = []
+    for index in range(len(pairs)):
+        chunk_counts = counts[index * chunks_per_pair : (index + 1) * chunks_per_pair]
+        x_wins, o_wins, draws = (int(sum(c)) for c in zip(*chunk_counts))
+        outcomes.append({"x_wins": x_wins, "o_wins": o_wins, "draws": draws})
+    return _results(models, pool, pairs, outcomes, num_games, seed, exact)
+
+
+def _results(models, pool, pairs, outcomes, games, seed, exact) -> dict:
+    totals = {
+        name: {"wins": 0, "draws": 0, "losses": 0, "games": 0} for name in pool.names
+    }
+    matchups = []
+    for (x, o), outcome in zip(pairs, outcomes):
+        matchups.append(dict(x=x, o=o, **outcome))
+        x_wins, o_wins = outcome["x_wins"], outcome["o_wins"]
+        for name, wins, losses in ((x, x_wins, o_wins), (o, o_wins, x_wins)):
+            totals[name]["wins"] += wins
+            totals[name]["losses"] += losses
+            totals[name]["draws"] += outcome["draws"]
+            totals[name]["games"] += games
+    return {
+        "num_games": None if exact else games,
+        "seed": seed,
+        "exact": exact,
+        "models": dict(models),
+        "matchups": matchups,
+        "totals": totals,
+    }
+
+
+def write_results(path: str, results: dict):
+    """Writes tournament results as JSON."""
+    with open(path, "w") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -1,25 +1,49 @@
 import argparse
+import os
+import time
+import numpy as np
 from tqdm import tqdm
 from game_logic import TicTacToe
 from agents.q_learning_agent import QLearningAgent
 from agents.perfect_agent import PerfectAgent
+from batch_trainer import train_batch
+from curriculum import Curriculum, train_curriculum
+from opponent_pool import PERFECT_MOVES_BIN, OpponentPool, load_perfect_moves
+from parallel_trainer import train_parallel
+from rewards import DRAW_REWARD, LOSS_REWARD, STEP_REWARD, WIN_REWARD
+from state_graph import NUM_CODES
+from training_metrics import TrainingMonitor
+from value_iteration import episodes_to_match, expected_return, q_value_iteration
 
 # fast_trainer is used by QLearningAgent internally
 
 
-def train_q_learning_agent(num_episodes, continue_training):
-    """Trains the Q-learning agent using the fast Cython module."""
-    q_agent = QLearningAgent(player="X", is_training=True)  # This is a wrapper
+def train_q_learning_agent(
+    num_episodes, continue_training, symmetric_updates=False, monitor=None
+):
+    """
+    Trains the Q-learning agent using the fast Cython module.
+
+    A training_metrics.TrainingMonitor, if given, records metrics every
+    monitor.every episodes and can end training early.
+    """
+    q_agent = QLearningAgent(
+        player="X", is_training=True, symmetric_updates=symmetric_updates
+    )  # This is a wrapper
     if not continue_training:
         print("Starting new training. Resetting Q-table.")
         q_agent.q_table = {}
+        q_agent.episodes_trained = 0
+
+    # One opponent per side, built once for the whole run
+    opponents = {"X": PerfectAgent(player="O"), "O": PerfectAgent(player="X")}
+    updates = 0
+    episodes_played = num_episodes
 
     for episode in tqdm(range(num_episodes), desc="Training Q-Agent", unit="episode"):
         player_symbol = "X" if episode % 2 == 0 else "O"
         q_agent.player = player_symbol
-
-        opponent_player = "O" if player_symbol == "X" else "X"
-        opponent = PerfectAgent(player=opponent_player)
+        opponent = opponents[player_symbol]
 
         # --- Start of inlined train_episode ---
         if player_symbol == "X":
@@ -42,21 +66,21 @@ def train_q_learning_agent(num_episodes, continue_training):
                 winner = game.check_winner()
 
                 reward = 0
-                intermediate_reward = -0.1  # 中間報酬の導入
                 if winner:
                     if winner == q_agent.player:
-                        reward = 100
+                        reward = WIN_REWARD
                     elif winner == "draw":
-                        reward = 75
+                        reward = DRAW_REWARD
                     else:
-                        reward = -200
-                reward += intermediate_reward  # 中間報酬を加算
+                        reward = LOSS_REWARD
+                reward += STEP_REWARD  # 中間報酬を加算
 
                 next_state_str = "".join(cell for row in game.board for cell in row)
                 # Delegate to the fast update method
                 q_agent.update_q_table(
                     state_str, action, reward, next_state_str, bool(winner)
                 )
+                updates += 1
 
             else:  # Opponent's turn
                 move = opponent.get_move(game.board)
@@ -73,10 +97,276 @@ def train_q_learning_agent(num_episodes, continue_training):
 
         q_agent.decay_exploration_rate(episode, num_episodes)
 
+        played = episode + 1
+        if monitor is not None and (
+            played % monitor.every == 0 or played == num_episodes
+        ):
+            if monitor.record(played, updates, q_agent._fast_agent):
+                episodes_played = played
+                break
+
+    q_agent.episodes_trained += episodes_played
     q_agent.save_q_table()
     print("\n✅ Training complete.")
     print(f"  - Q-table size: {len(q_agent.q_table)} states")
     print(f"  - Final exploration rate: {q_agent.exploration_rate:.4f}")
+    _print_early_stop(monitor)
+
+
+def load_opponent_moves(path: str = PERFECT_MOVES_BIN) -> np.ndarray:
+    """Returns the perfect opponent as a move table indexed by board code."""
+    return load_perfect_moves(path)
+
+
+def train_q_learning_agent_native(
+    num_episodes, continue_training, seed=None, symmetric_updates=False, monitor=None
+):
+    """
+    Trains the Q-learning agent with the native episode loop in fast_trainer.
+
+    Whole episodes against PerfectAgent run in C directly on the agent's dense
+    Q-table (see FastQLearningAgent.train_native), with the same rewards,
+    update rule and exploration schedule as train_q_learning_agent. With a
+    monitor, the run is split into calls of monitor.every episodes that carry
+    the random state over, so the table is the same as without a monitor.
+    """
+
+    def train(q_agent, opponent_moves, seed):
+        agent = q_agent._fast_agent
+        if monitor is None:
+            return agent.train_native(opponent_moves, num_episodes, seed)
+        updates, rng_state = 0, seed
+        for first_episode in range(0, num_episodes, monitor.every):
+            size = min(monitor.every, num_episodes - first_episode)
+            updates += agent.train_native(
+                opponent_moves, size, rng_state, first_episode, num_episodes
+            )
+            rng_state = agent.rng_state
+            if monitor.record(first_episode + size, updates, agent):
+                break
+        return updates
+
+    _train_on_dense_table(
+        num_episodes, continue_training, seed, train, symmetric_updates, monitor
+    )
+
+
+def train_q_learning_agent_batch(
+    num_episodes,
+    continue_training,
+    batch_size=1024,
+    seed=None,
+    symmetric_updates=False,
+    monitor=None,
+):
+    """
+    Trains the Q-learning agent on batch_size games played in lockstep with NumPy.
+
+    See batch_trainer.train_batch; rewards, update rule and exploration
+    schedule are the same as train_q_learning_agent. A monitor records
+    metrics each time another monitor.every episodes have completed.
+    """
+
+    def train(q_agent, opponent_moves, seed):
+        agent = q_agent._fast_agent
+        return train_batch(
+            agent,
+            opponent_moves,
+            num_episodes,
+            batch_size,
+            seed,
+            **_progress_options(monitor, agent),
+        )
+
+    _train_on_dense_table(
+        num_episodes, continue_training, seed, train, symmetric_updates, monitor
+    )
+
+
+def train_q_learning_agent_parallel(
+    num_episodes,
+    continue_training,
+    workers,
+    sync_every=10000,
+    seed=None,
+    symmetric_updates=False,
+    monitor=None,
+):
+    """
+    Trains the Q-learning agent with the native loop in several processes.
+
+    Workers play separate slices of the episodes with their own seeds and are
+    merged every sync_every episodes per worker (see parallel_trainer). The
+    merged table is saved as a checkpoint after every merge; a monitor
+    records metrics at the merges.
+    """
+
+    def train(q_agent, opponent_moves, seed):
+        base_episodes = q_agent.episodes_trained
+
+        def save_checkpoint(episodes_done, updates_done):
+            if monitor is not None and monitor.record(
+                episodes_done, updates_done, q_agent._fast_agent
+            ):
+                return True
+            if episodes_done < num_episodes:
+                q_agent.episodes_trained = base_episodes + episodes_done
+                q_agent.save_q_table()
+                q_agent.episodes_trained = base_episodes
+            return False
+
+        return train_parallel(
+            q_agent._fast_agent,
+            opponent_moves,
+            num_episodes,
+            workers,
+            sync_every=sync_every,
+            seed=seed,
+            on_sync=save_checkpoint,
+        )
+
+    _train_on_dense_table(
+        num_episodes, continue_training, seed, train, symmetric_updates, monitor
+    )
+
+
+def train_q_learning_agent_curriculum(
+    num_episodes,
+    continue_training,
+    curriculum_file,
+    seed=None,
+    symmetric_updates=False,
+    monitor=None,
+):
+    """
+    Trains the Q-learning agent with the native loop against a curriculum.
+
+    The opponents of curriculum_file (see curriculum.py) are built once as
+    policy tables; each episode plays the opponent its stage draws. A monitor
+    records metrics every monitor.every episodes.
+    """
+    curriculum = Curriculum.from_file(curriculum_file)
+    pool = OpponentPool(curriculum.opponents)
+
+    def train(q_agent, opponent_moves, seed):
+        agent = q_agent._fast_agent
+        return train_curriculum(
+            agent,
+            pool,
+            curriculum,
+            num_episodes,
+            seed,
+            **_progress_options(monitor, agent),
+        )
+
+    _train_on_dense_table(
+        num_episodes, continue_training, seed, train, symmetric_updates, monitor
+    )
+
+
+def train_q_learning_agent_exact(opponent="perfect", max_sampled_episodes=1000000):
+    """
+    Computes the optimal Q-table against an opponent by value iteration.
+
+    The table (see value_iteration.py) replaces the agent's Q-table and is
+    saved like the online trainers' tables. The report includes how many
+    sampled episodes the native online trainer needs for a greedy policy of
+    the same expected return, searched up to max_sampled_episodes.
+    """
+    q_agent = QLearningAgent(player="X", is_training=True)
+    policy = OpponentPool([opponent]).policy(opponent)
+    discount_factor = q_agent._fast_agent.discount_factor
+
+    start = time.perf_counter()
+    states, values, sweeps = q_value_iteration(policy, discount_factor)
+    elapsed = time.perf_counter() - start
+    q_agent._fast_agent.q_table.set_rows(states, values)
+    q_agent.episodes_trained = 0
+    q_agent.seed = None
+    q_agent.save_q_table()
+
+    dense = np.zeros((NUM_CODES, 9))
+    dense[states] = values
+    target = expected_return(dense, policy, discount_factor)
+    sampled = episodes_to_match(
+        policy,
+        target,
+        q_agent._fast_agent.learning_rate,
+        discount_factor,
+        q_agent._fast_agent.initial_exploration_rate,
+        q_agent.min_exploration_rate,
+        max_episodes=max_sampled_episodes,
+    )
+    print("\n✅ Value iteration complete.")
+    print(f"  - Opponent: {opponent}")
+    print(f"  - Q-table size: {len(states)} states")
+    print(f"  - Sweeps: {sweeps} ({elapsed * 1000:.1f} ms)")
+    print(f"  - Expected return per episode: {target:.4f}")
+    if sampled is None:
+        print(
+            f"  - Sampled Q-learning: not matched within {max_sampled_episodes:,} episodes"
+        )
+    else:
+        print(f"  - Sampled Q-learning: matched after about {sampled:,} episodes")
+
+
+def _train_on_dense_table(
+    num_episodes, continue_training, seed, train, symmetric_updates=False, monitor=None
+):
+    # Shared setup and reporting of the engines that bypass TicTacToe objects.
+    # train(q_agent, opponent_moves, seed) plays the episodes and returns the
+    # number of Q-value updates; it stops early when the monitor says so.
+    q_agent = QLearningAgent(
+        player="X", is_training=True, symmetric_updates=symmetric_updates
+    )
+    if not continue_training:
+        print("Starting new training. Resetting Q-table.")
+        q_agent.q_table = {}
+        q_agent.episodes_trained = 0
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), "little")
+
+    opponent_moves = load_opponent_moves()
+    start = time.perf_counter()
+    updates = train(q_agent, opponent_moves, seed)
+    elapsed = time.perf_counter() - start
+    played = num_episodes
+    if monitor is not None:
+        if monitor.stopped_at is not None:
+            played = monitor.stopped_at
+        elif not monitor.records or monitor.records[-1]["episodes"] != num_episodes:
+            monitor.record(num_episodes, updates, q_agent._fast_agent)
+    q_agent.episodes_trained += played
+    q_agent.seed = seed
+
+    q_agent.save_q_table()
+    episodes_per_sec = played / elapsed if elapsed > 0 else float(played)
+    print("\n✅ Training complete.")
+    print(f"  - Q-table size: {len(q_agent.q_table)} states")
+    print(f"  - Final exploration rate: {q_agent.exploration_rate:.4f}")
+    print(f"  - Q-value updates: {updates}")
+    print(f"  - Speed: {episodes_per_sec:,.0f} episodes/sec")
+    _print_early_stop(monitor)
+
+
+def _progress_options(monitor, agent) -> dict:
+    # progress_every / on_progress arguments that record metrics with a monitor.
+    if monitor is None:
+        return {}
+    return {
+        "progress_every": monitor.every,
+        "on_progress": lambda episodes, updates: monitor.record(
+            episodes, updates, agent
+        ),
+    }
+
+
+def _print_early_stop(monitor):
+    if monitor is not None and monitor.stopped_at is not None:
+        print(
+            f"  - Stopped after {monitor.stopped_at} episodes: "
+            "the greedy policy plays perfectly."
+        )
 
 
 def main():
@@ -91,8 +381,182 @@ def main():
         action="store_true",
         help="Continue training from existing Q-table.",
     )
+    parser.add_argument(
+        "--engine",
+        choices=("python", "native", "batch", "exact"),
+        default=None,
+        help=(
+            "Play episodes via Python objects, a native C loop or NumPy batches, "
+            "or compute the optimal table by value iteration (exact). "
+            "Default: native with --workers, python otherwise."
+        ),
+    )
+    parser.add_argument(
+        "--opponent",
+        choices=("perfect", "random", "minimax"),
+        default=None,
+        help=(
+            "Opponent of --engine exact (default: perfect); "
+            "--episodes caps its sampled comparison."
+        ),
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Random seed for --engine native/batch."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Number of games played in lockstep with --engine batch (default: 1024).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes for the native engine (merged periodically).",
+    )
+    parser.add_argument(
+        "--sync-every",
+        type=int,
+        default=None,
+        help="Episodes each worker plays between merges with --workers (default: 10000).",
+    )
+    parser.add_argument(
+        "--symmetric-updates",
+        action="store_true",
+        help="Also apply every update to the 7 other orientations of the board.",
+    )
+    parser.add_argument(
+        "--curriculum",
+        default=None,
+        help="JSON opponent schedule (see curriculum.py); uses the native loop in one process.",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Write training metrics to this .csv (or JSON Lines) file.",
+    )
+    parser.add_argument(
+        "--metrics-every",
+        type=int,
+        default=10000,
+        help="Episodes between metrics records (and perfect-play checks).",
+    )
+    parser.add_argument(
+        "--stop-when-perfect",
+        action="store_true",
+        help="Stop once the greedy policy plays perfectly against PerfectAgent.",
+    )
     args = parser.parse_args()
-    train_q_learning_agent(args.episodes, args.continue_training)
+    _check_engine(parser, args)
+    monitor = None
+    if args.metrics or args.stop_when_perfect:
+        monitor = TrainingMonitor(
+            args.metrics, args.metrics_every, args.stop_when_perfect
+        )
+    try:
+        _run(args, monitor)
+    finally:
+        if monitor is not None:
+            monitor.close()
+
+
+def _check_engine(parser, args):
+    # Rejects options the chosen engine would ignore, then fills in the default.
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.engine not in (None, "native"):
+        parser.error(
+            f"--workers runs the native engine; it cannot be used with --engine {args.engine}"
+        )
+    if args.curriculum:
+        if args.engine not in (None, "native"):
+            parser.error(
+                f"--curriculum runs the native engine; it cannot be used with --engine {args.engine}"
+            )
+        if args.workers > 1:
+            parser.error(
+                "--curriculum trains in one process; it cannot be used with --workers"
+            )
+    if args.engine == "exact":
+        ignored = [
+            option
+            for option, given in (
+                ("--continue_training", args.continue_training),
+                ("--seed", args.seed is not None),
+                ("--symmetric-updates", args.symmetric_updates),
+                ("--metrics", args.metrics is not None),
+                ("--stop-when-perfect", args.stop_when_perfect),
+            )
+            if given
+        ]
+        if ignored:
+            parser.error(
+                f"--engine exact computes the table from scratch; remove {', '.join(ignored)}"
+            )
+        args.opponent = args.opponent or "perfect"
+    elif args.opponent is not None:
+        parser.error("--opponent only applies to --engine exact")
+    if args.engine is None:
+        args.engine = "native" if args.workers > 1 or args.curriculum else "python"
+    if args.engine == "python" and args.seed is not None:
+        parser.error("--engine python is not seeded; remove --seed")
+    if args.batch_size is not None and args.engine != "batch":
+        parser.error("--batch-size only applies to --engine batch")
+    if args.sync_every is not None and args.workers == 1:
+        parser.error("--sync-every only applies to --workers 2 or more")
+    if args.batch_size is None:
+        args.batch_size = 1024
+    if args.sync_every is None:
+        args.sync_every = 10000
+
+
+def _run(args, monitor):
+    if args.curriculum:
+        train_q_learning_agent_curriculum(
+            args.episodes,
+            args.continue_training,
+            args.curriculum,
+            seed=args.seed,
+            symmetric_updates=args.symmetric_updates,
+            monitor=monitor,
+        )
+    elif args.engine == "exact":
+        train_q_learning_agent_exact(args.opponent, max_sampled_episodes=args.episodes)
+    elif args.workers > 1:
+        train_q_learning_agent_parallel(
+            args.episodes,
+            args.continue_training,
+            args.workers,
+            sync_every=args.sync_every,
+            seed=args.seed,
+            symmetric_updates=args.symmetric_updates,
+            monitor=monitor,
+        )
+    elif args.engine == "native":
+        train_q_learning_agent_native(
+            args.episodes,
+            args.continue_training,
+            seed=args.seed,
+            symmetric_updates=args.symmetric_updates,
+            monitor=monitor,
+        )
+    elif args.engine == "batch":
+        train_q_learning_agent_batch(
+            args.episodes,
+            args.continue_training,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            symmetric_updates=args.symmetric_updates,
+            monitor=monitor,
+        )
+    else:
+        train_q_learning_agent(
+            args.episodes,
+            args.continue_training,
+            symmetric_updates=args.symmetric_updates,
+            monitor=monitor,
+        )
 
 
 if __name__ == "__main__":
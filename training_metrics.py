@@ -0,0 +1,185 @@
+"""
+training_metrics.py: Periodic training metrics and convergence detection.
+
+TrainingMonitor is called by the trainers in train_q_learning.py every
+``every`` episodes. Each record holds the episodes played, episodes/sec and
+Q-value updates/sec since the previous record, the Q-table size, the
+exploration rate, and the agreement of the greedy policy with perfect play.
+Records are appended to a .csv file or, for any other extension, a JSON Lines
+file.
+
+Agreement is measured against the perfect solution (the moves of
+perfect_moves.json and every other move that keeps the game-theoretic value,
+see solver.py). A board agrees when all of its greedy moves are optimal.
+Two sets of boards are checked:
+
+    agreement       Every board where the learner moves in games against
+                    PerfectAgent, whatever the learner plays.
+    path_agreement  The boards the greedy learner actually reaches against
+                    PerfectAgent (from both sides).
+
+Training counts as converged when path_agreement is 1: the greedy policy
+plays perfectly on every reachable board of its games.
+"""
+
+import csv
+import json
+import time
+
+import numpy as np
+
+from opponent_pool import perfect_policy
+from solver import solve
+from state_graph import CELL_BITS, load_state_graph
+
+METRIC_FIELDS = (
+    "episodes",
+    "elapsed_sec",
+    "episodes_per_sec",
+    "updates_per_sec",
+    "q_table_states",
+    "exploration_rate",
+    "agreement",
+    "path_agreement",
+)
+
+
+class PolicyChecker:
+    """Compares greedy policies of dense Q-tables with perfect play."""
+
+    def __init__(self, opponent_policy=None, graph=None):
+        self.graph = graph if graph is not None else load_state_graph()
+        self.optimal_moves = solve(self.graph).optimal_moves.astype(np.int64)
+        policy = perfect_policy() if opponent_policy is None else opponent_policy
+        masks = np.asarray(policy)[self.graph.codes].astype(np.int64)
+        self.opponent_moves = (masks[:, None] & CELL_BITS) != 0
+        self.legal = self.graph.successors >= 0
+        self.reachable = self._reachable(self.legal)
+
+    def _reachable(self, learner_moves) -> np.ndarray:
+        # Learner boards reached when it plays learner_moves, as X and as O.
+        graph = self.graph
+        playing = ~graph.terminal
+        reached = np.zeros(len(graph), dtype=bool)
+        frontier = np.zeros(len(graph), dtype=bool)
+        frontier[0] = True
+        frontier[graph.successors[0][self.opponent_moves[0]]] = True
+        while frontier.any():
+            frontier &= playing
+            reached |= frontier
+            after_move = graph.successors[frontier][learner_moves[frontier]]
+            after_move = after_move[playing[after_move]]
+            replies = graph.successors[after_move][self.opponent_moves[after_move]]
+            frontier = np.zeros(len(graph), dtype=bool)
+            frontier[replies] = True
+        return reached
+
+    def greedy_moves(self, values) -> np.ndarray:
+        """Returns the ``(N, 9)`` greedy move sets of a ``(3**9, 9)`` Q-table."""
+        rows = np.where(self.legal, np.asarray(values)[self.graph.codes], -np.inf)
+        return self.legal & (rows == rows.max(axis=1, keepdims=True))
+
+    def agreement(self, values) -> tuple[float, float]:
+        """
+        Measures how much of a Q-table's greedy policy is perfect play.
+
+        Args:
+            values (np.ndarray): ``(3**9, 9)`` Q-values (C_QTable.values).
+
+        Returns:
+            tuple[float, float]: agreement and path_agreement (see module docstring).
+        """
+        greedy = self.greedy_moves(values)
+        agrees = ((greedy * CELL_BITS).sum(axis=1) & ~self.optimal_moves) == 0
+        path = self._reachable(greedy)
+        return float(agrees[self.reachable].mean()), float(agrees[path].mean())
+
+
+class TrainingMonitor:
+    """
+    Writes training metrics every ``every`` episodes and detects convergence.
+
+    Attributes:
+        every (int): Episodes between records.
+        stop_when_perfect (bool): Whether record() asks to stop once
+            path_agreement reaches 1.
+        stopped_at (int | None): The episode count training stopped at.
+        records (list[dict]): Every record written so far.
+    """
+
+    def __init__(self, path=None, every=10000, stop_when_perfect=False, checker=None):
+        if every <= 0:
+            raise ValueError("every must be positive")
+        self.path = path
+        self.every = every
+        self.stop_when_perfect = stop_when_perfect
+        self.stopped_at = None
+        self.records = []
+        self._checker = checker
+        self._file = None
+        self._writer = None
+        self._start = self._last_time = time.perf_counter()
+        self._last_episodes = 0
+        self._last_updates = 0
+
+    @property
+    def checker(self) -> PolicyChecker:
+        if self._checker is None:
+            self._checker = PolicyChecker()
+        return self._checker
+
+    def record(self, episodes: int, updates: int, agent) -> bool:
+        """
+        Adds a record for the current state of training.
+
+        Args:
+            episodes (int): Episodes played so far in this run.
+            updates (int): Q-value updates so far in this run.
+            agent: The fast_trainer.FastQLearningAgent being trained.
+
+        Returns:
+            bool: True if training should stop.
+        """
+        now = time.perf_counter()
+        interval = max(now - self._last_time, 1e-9)
+        agreement, path_agreement = self.checker.agreement(agent.q_table.values)
+        row = {
+            "episodes": episodes,
+            "elapsed_sec": round(now - self._start, 6),
+            "episodes_per_sec": (episodes - self._last_episodes) / interval,
+            "updates_per_sec": (updates - self._last_updates) / interval,
+            "q_table_states": len(agent.q_table),
+            "exploration_rate": agent.exploration_rate,
+            "agreement": agreement,
+            "path_agreement": path_agreement,
+        }
+        self.records.append(row)
+        self._write(row)
+        # Evaluation time does not count towards the next interval.
+        self._last_time = time.perf_counter()
+        self._last_episodes, self._last_updates = episodes, updates
+        if self.stop_when_perfect and path_agreement == 1.0:
+            self.stopped_at = episodes
+            return True
+        return False
+
+    def _write(self, row: dict):
+        if self.path is None:
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", newline="")
+            if self.path.endswith(".csv"):
+                self._writer = csv.DictWriter(self._file, fieldnames=METRIC_FIELDS)
+                self._writer.writeheader()
+        if self._writer is not None:
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """Closes the metrics file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
@@ -0,0 +1,178 @@
+"""
+value_iteration.py: Exact Q-values against a fixed opponent by value iteration.
+
+Instead of sampling episodes, the learner's Bellman backup is applied to every
+reachable position at once over state_graph.StateGraph. The learner moves in
+state s with action a (STEP_REWARD, plus WIN or DRAW if the game ends); the
+opponent then answers with each move of its opponent_pool policy table with
+equal probability (LOSS or DRAW if that ends the game, otherwise the learner
+continues from the new state with discount factor gamma):
+
+    Q(s, a) = STEP + [ends] R(s') + [continues] E_b[R(s'') or gamma max Q(s'', .)]
+
+Rewards are those of rewards.py, as in train_q_learning.py. The backup is synchronous and
+vectorized over an (N, 9, 9) array of learner moves times opponent replies.
+Because the game graph is acyclic, repeated sweeps reach the exact fixed
+point Q* after at most one sweep per learner move.
+"""
+
+import numpy as np
+
+import fast_trainer
+from batch_game_logic import DRAW
+from rewards import DRAW_REWARD, ILLEGAL_Q, LOSS_REWARD, STEP_REWARD, WIN_REWARD
+from state_graph import CELL_BITS, load_state_graph
+
+
+class _Transitions:
+    # Learner move / opponent reply arrays for one opponent policy.
+    def __init__(self, graph, opponent_policy):
+        n = len(graph)
+        me = graph.to_move[:, None]
+        self.legal = graph.successors >= 0
+        after_move = np.where(self.legal, graph.successors, 0)
+        self.move_ends = self.legal & graph.terminal[after_move]
+        self.move_reward = np.where(
+            graph.winner[after_move] == me, WIN_REWARD, DRAW_REWARD
+        )
+
+        masks = np.asarray(opponent_policy)[graph.codes[after_move]].astype(np.int64)
+        replies = (masks[..., None] & CELL_BITS) != 0
+        replies &= (self.legal & ~self.move_ends)[..., None]
+        counts = replies.sum(axis=2, keepdims=True)
+        self.reply_weight = replies / np.maximum(counts, 1)
+        after_reply = graph.successors[after_move]
+        after_reply = np.where(replies, after_reply, 0)
+        self.after_reply = after_reply
+        winner = graph.winner[after_reply]
+        reply_ends = replies & graph.terminal[after_reply]
+        self.reply_continues = replies & ~reply_ends
+        self.reply_reward = np.where(
+            reply_ends, np.where(winner == DRAW, DRAW_REWARD, LOSS_REWARD), 0.0
+        )
+        self.playing = ~graph.terminal
+        self.num_states = n
+
+    def backup(self, values, gamma):
+        # One synchronous Bellman backup from state values to Q-values.
+        future = self.reply_reward + np.where(
+            self.reply_continues, gamma * values[self.after_reply], 0.0
+        )
+        q = STEP_REWARD + np.where(
+            self.move_ends,
+            self.move_reward,
+            (self.reply_weight * future).sum(axis=2),
+        )
+        return np.where(self.legal, q, ILLEGAL_Q)
+
+
+def _state_values(q, playing):
+    return np.where(playing, q.max(axis=1), 0.0)
+
+
+def q_value_iteration(opponent_policy, discount_factor: float = 0.9, graph=None):
+    """
+    Computes the optimal Q-values of every position against an opponent.
+
+    Args:
+        opponent_policy (np.ndarray): uint16 ``(3**9,)`` opponent_pool policy table.
+        discount_factor (float): The discount factor gamma.
+        graph (StateGraph | None): The state graph (load_state_graph() when None).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: Base-3 codes of the non-terminal
+            positions, their ``(N, 9)`` Q-values (ILLEGAL_Q for occupied
+            cells) and the number of sweeps until nothing changed.
+    """
+    graph = graph if graph is not None else load_state_graph()
+    transitions = _Transitions(graph, opponent_policy)
+    values = np.zeros(transitions.num_states)
+    sweeps = 0
+    while True:
+        q = transitions.backup(values, discount_factor)
+        new_values = _state_values(q, transitions.playing)
+        sweeps += 1
+        if np.array_equal(new_values, values):
+            break
+        values = new_values
+    playing = transitions.playing
+    return graph.codes[playing], q[playing], sweeps
+
+
+def expected_return(
+    q_values, opponent_policy, discount_factor: float = 0.9, graph=None
+) -> float:
+    """
+    Evaluates the greedy policy of a Q-table exactly against an opponent.
+
+    Args:
+        q_values (np.ndarray): ``(3**9, 9)`` Q-values indexed by board code
+            (e.g. C_QTable.values). Ties are broken uniformly at random.
+        opponent_policy (np.ndarray): uint16 ``(3**9,)`` policy table.
+        discount_factor (float): The discount factor gamma.
+        graph (StateGraph | None): The state graph.
+
+    Returns:
+        float: The expected return of an episode, averaged over playing X
+            (moving first) and O (the opponent opens).
+    """
+    graph = graph if graph is not None else load_state_graph()
+    transitions = _Transitions(graph, opponent_policy)
+    rows = np.where(transitions.legal, np.asarray(q_values)[graph.codes], -np.inf)
+    greedy = transitions.legal & (rows == rows.max(axis=1, keepdims=True))
+    greedy = greedy / np.maximum(greedy.sum(axis=1, keepdims=True), 1)
+    values = np.zeros(transitions.num_states)
+    while True:
+        q = transitions.backup(values, discount_factor)
+        new_values = np.where(transitions.playing, (greedy * q).sum(axis=1), 0.0)
+        if np.array_equal(new_values, values):
+            break
+        values = new_values
+
+    # As O, the learner starts after each opening move of the opponent.
+    openings = (int(opponent_policy[graph.codes[0]]) & CELL_BITS) != 0
+    as_o = values[graph.successors[0][openings]].mean() if openings.any() else 0.0
+    return float((values[0] + as_o) / 2)
+
+
+def episodes_to_match(
+    opponent_policy,
+    target_return: float,
+    learning_rate: float = 0.1,
+    discount_factor: float = 0.9,
+    exploration_rate: float = 1.0,
+    min_exploration_rate: float = 0.05,
+    max_episodes: int = 1000000,
+    seed: int = 0,
+    graph=None,
+):
+    """
+    Estimates how many sampled episodes the online trainer needs to reach a return.
+
+    Fresh runs of FastQLearningAgent.train_native with 1,000, 2,000, 4,000, ...
+    episodes are evaluated with expected_return() until one reaches
+    target_return (e.g. the return of the q_value_iteration table).
+
+    Returns:
+        int | None: The episodes of the first matching run, or None if no run
+            of at most max_episodes matched.
+    """
+    graph = graph if graph is not None else load_state_graph()
+    tolerance = 1e-6 * max(1.0, abs(target_return))
+    num_episodes = 1000
+    while num_episodes <= max_episodes:
+        agent = fast_trainer.FastQLearningAgent(
+            "X",
+            learning_rate,
+            discount_factor,
+            exploration_rate,
+            min_exploration_rate,
+        )
+        agent.train_native(opponent_policy, num_episodes, seed)
+        achieved = expected_return(
+            agent.q_table.values, opponent_policy, discount_factor, graph
+        )
+        if achieved >= target_return - tolerance:
+            return num_episodes
+        num_episodes *= 2
+    return None
@@ -5,6 +5,7 @@ from agents.q_learning_agent import QLearningAgent
 from agents.random_agent import RandomAgent
 from agents.minimax_agent import MinimaxAgent
 from agents.perfect_agent import PerfectAgent
+from exact_evaluation import outcome_probabilities
 
 
 def parse_args():
@@ -18,6 +19,11 @@ def parse_args():
         default=10,
         help="Number of games to play for each evaluation.",
     )
+    parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Compute exact outcome probabilities instead of playing games.",
+    )
     return parser.parse_args()
 
 
@@ -77,21 +83,56 @@ def evaluate(q_agent_player: str, opponent_class, opponent_name: str, num_games:
     print(f"引き分け: {draws} ({draws/num_games*100:.1f}%)")
 
 
+def evaluate_exact(q_agent_player: str, opponent_class, opponent_name: str):
+    """
+    Computes the exact outcome probabilities of the Q-learning agent against an opponent.
+
+    Args:
+        q_agent_player (str): The player symbol for the Q-learning agent ('X' or 'O').
+        opponent_class: The class of the opponent agent.
+        opponent_name (str): The name of the opponent agent.
+
+    Returns:
+        dict: The probabilities "wins", "losses" and "draws" of the Q-learning agent.
+    """
+    q_agent = QLearningAgent(player=q_agent_player, is_training=False)
+    opponent_player = "O" if q_agent_player == "X" else "X"
+    opponent_agent = opponent_class(player=opponent_player)
+    if q_agent_player == "X":
+        outcome = outcome_probabilities(q_agent, opponent_agent)
+        wins, losses = outcome["x_wins"], outcome["o_wins"]
+    else:
+        outcome = outcome_probabilities(opponent_agent, q_agent)
+        wins, losses = outcome["o_wins"], outcome["x_wins"]
+
+    print(f"\n--- Q-Agent({q_agent_player}) vs {opponent_name}({opponent_player}) ---")
+    print(f"勝ち: {wins:.2%}")
+    print(f"負け: {losses:.2%}")
+    print(f"引き分け: {outcome['draws']:.2%}")
+    return {"wins": wins, "losses": losses, "draws": outcome["draws"]}
+
+
 def main():
     """Main function to run the evaluation."""
     args = parse_args()
     print("=== 強さ検証レポート ===")
-    print(f"総エピソード数: {args.num_games}回/対戦")
-
-    print("\n\n--- Q-Agentが先手 ('X') の場合 ---")
-    evaluate("X", RandomAgent, "RandomAgent", args.num_games)
-    evaluate("X", MinimaxAgent, "MinimaxAgent", args.num_games)
-    evaluate("X", PerfectAgent, "PerfectAgent", args.num_games)
+    if args.exact:
+        print("厳密計算: 全局面の確率を計算します（サンプリングなし）")
+    else:
+        print(f"総エピソード数: {args.num_games}回/対戦")
 
-    print("\n\n--- Q-Agentが後手 ('O') の場合 ---")
-    evaluate("O", RandomAgent, "RandomAgent", args.num_games)
-    evaluate("O", MinimaxAgent, "MinimaxAgent", args.num_games)
-    evaluate("O", PerfectAgent, "PerfectAgent", args.num_games)
+    opponents = (
+        (RandomAgent, "RandomAgent"),
+        (MinimaxAgent, "MinimaxAgent"),
+        (PerfectAgent, "PerfectAgent"),
+    )
+    for player, label in (("X", "先手 ('X')"), ("O", "後手 ('O')")):
+        print(f"\n\n--- Q-Agentが{label} の場合 ---")
+        for opponent_class, opponent_name in opponents:
+            if args.exact:
+                evaluate_exact(player, opponent_class, opponent_name)
+            else:
+                evaluate(player, opponent_class, opponent_name, args.num_games)
 
 
 if __name__ == "__main__":